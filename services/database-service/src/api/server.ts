@@ -223,9 +223,28 @@ app.delete('/problem_areas/:id', async (req: Request, res: Response) => {
 });
 
 // -------------------------------\n// Persona Endpoints (Existing)\n// -------------------------------
-// GET personas for a specific user
+// GET personas for a specific user, or for several users at once via ?userIds=a,b,c
+// res.json attaches an ETag, and Express answers a matching If-None-Match with an empty 304
 app.get('/personas', async (req: Request, res: Response) => {
   try {
+    const userIdsParam = req.query.userIds as string;
+    if (userIdsParam) {
+      const userIds = Array.from(new Set(userIdsParam.split(',').map(id => id.trim()).filter(Boolean)));
+      if (userIds.length === 0) {
+        return res.status(400).json({
+          status: 'error',
+          message: 'Query parameter userIds must contain at least one user ID',
+        });
+      }
+      console.log(`[DB Service] Fetching personas for ${userIds.length} users...`);
+      const personasByUser = await personaRepository.findManyByUserIds(userIds);
+      return res.json({
+        status: 'success',
+        message: 'User personas retrieved successfully',
+        data: personasByUser,
+      });
+    }
+
     const userId = req.query.userId as string;
     if (!userId) {
       return res.status(400).json({
@@ -625,11 +644,43 @@ app.get('/interviews', async (req: Request, res: Response) => {
   }
 });
 
+/**
+ * Copy only the requested dotted paths (e.g. "analysis_data.transcript") from source.
+ * Missing paths are skipped; parent objects are recreated as needed.
+ */
+function pickFields(source: Record<string, any>, paths: string[]): Record<string, any> {
+  const projected: Record<string, any> = {};
+  for (const path of paths) {
+    const keys = path.split('.');
+    let value: any = source;
+    for (const key of keys) {
+      value = value !== null && typeof value === 'object' ? value[key] : undefined;
+      if (value === undefined) break;
+    }
+    if (value === undefined) continue;
+
+    let target = projected;
+    keys.slice(0, -1).forEach(key => {
+      target[key] = target[key] ?? {};
+      target = target[key];
+    });
+    target[keys[keys.length - 1]] = value;
+  }
+  return projected;
+}
+
 // Get interview by ID (Uses findByIdWithRelations)
+// Optional ?fields=a,b.c projects the response to those paths and skips loading relations
 app.get('/interviews/:id', async (req: Request, res: Response) => {
   try {
+    const fields = typeof req.query.fields === 'string'
+      ? req.query.fields.split(',').map(field => field.trim()).filter(Boolean)
+      : [];
+
     // Uses findByIdWithRelations, which now includes ProblemAreas/Excerpts
-    const interview = await interviewRepository.findByIdWithRelations(req.params.id);
+    const interview = fields.length > 0
+      ? await interviewRepository.findById(req.params.id)
+      : await interviewRepository.findByIdWithRelations(req.params.id);
     
     if (!interview) {
       return res.status(404).json({
@@ -650,7 +701,7 @@ app.get('/interviews/:id', async (req: Request, res: Response) => {
     res.json({
       status: 'success',
       message: 'Interview retrieved successfully',
-      data: interview
+      data: fields.length > 0 ? pickFields(interview, fields) : interview
     });
   } catch (error: any) {
     console.error(`Error retrieving interview ${req.params.id}:`, error);
@@ -662,6 +713,42 @@ app.get('/interviews/:id', async (req: Request, res: Response) => {
   }
 });
 
+// Get the formatted transcript stored for an interview at analysis time
+app.get('/interviews/:id/formatted_transcript', async (req: Request, res: Response) => {
+  try {
+    const result = await interviewRepository.findFormattedTranscript(req.params.id);
+
+    if (!result) {
+      return res.status(404).json({
+        status: 'error',
+        message: 'Interview not found'
+      });
+    }
+
+    // Auth check: Ensure user owns the interview
+    const requestedUserId = req.query.userId as string;
+    if (requestedUserId && result.userId && result.userId !== requestedUserId) {
+      return res.status(403).json({
+        status: 'error',
+        message: 'Not authorized to access this interview'
+      });
+    }
+
+    res.json({
+      status: 'success',
+      message: 'Formatted transcript retrieved successfully',
+      data: { formatted_transcript: result.formattedTranscript }
+    });
+  } catch (error: any) {
+    console.error(`Error retrieving formatted transcript for interview ${req.params.id}:`, error);
+    res.status(500).json({
+      status: 'error',
+      message: 'Failed to retrieve formatted transcript',
+      error: process.env.NODE_ENV === 'development' ? error.message : undefined
+    });
+  }
+});
+
 // Create a new interview (MODIFIED to handle problemAreasData)
 app.post('/interviews', async (req: Request, res: Response) => {
   try {
@@ -724,6 +811,43 @@ app.post('/interviews', async (req: Request, res: Response) => {
   }
 });
 
+// Merge the synthesis into an interview stored while it was still being generated
+app.put('/interviews/:id/synthesis', async (req: Request, res: Response) => {
+  try {
+    const { title, synthesis, suggested_title } = req.body;
+
+    if (typeof synthesis !== 'string') {
+      return res.status(400).json({
+        status: 'error',
+        message: 'Missing required field: synthesis',
+        required: ['synthesis']
+      });
+    }
+
+    const interview = await interviewRepository.updateSynthesis(
+      req.params.id,
+      { synthesis, suggested_title: suggested_title ?? null },
+      typeof title === 'string' ? title : undefined
+    );
+    if (!interview) {
+      return res.status(404).json({ status: 'error', message: 'Interview not found' });
+    }
+
+    res.json({
+      status: 'success',
+      message: 'Interview synthesis updated successfully',
+      data: { id: interview.id }
+    });
+  } catch (error: any) {
+    console.error(`[PUT /interviews/:id/synthesis] Error for interview ${req.params.id}:`, error);
+    res.status(500).json({
+      status: 'error',
+      message: 'Failed to update interview synthesis',
+      error: process.env.NODE_ENV === 'development' ? error.message : undefined
+    });
+  }
+});
+
 // Update interview by ID (Base fields only)
 app.put('/interviews/:id', async (req: Request, res: Response) => {
   try {
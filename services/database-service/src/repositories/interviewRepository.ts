@@ -72,24 +72,7 @@ export class InterviewRepository {
         const newInterview = await tx.interview.create({ data: interviewData });
 
         for (const paData of problemAreasData) {
-          // Access model via lowercase property on tx client
-          const newProblemArea = await tx.problemArea.create({
-            data: {
-              interview_id: newInterview.id,
-              title: paData.title,
-              description: paData.description,
-            },
-          });
-
-          if (paData.excerpts && paData.excerpts.length > 0) {
-            // Access model via lowercase property on tx client
-            await tx.excerpt.createMany({
-              data: paData.excerpts.map((exData) => ({
-                problem_area_id: newProblemArea.id,
-                ...exData, // Spread remaining fields
-              })),
-            });
-          }
+          await this.createProblemArea(tx, newInterview.id, paData);
         }
         return newInterview;
       });
@@ -99,6 +82,35 @@ export class InterviewRepository {
     }
   }
 
+  /**
+   * Create one Problem Area and its Excerpts inside a transaction.
+   */
+  private async createProblemArea(
+    tx: Prisma.TransactionClient,
+    interviewId: string,
+    paData: ProblemAreaData
+  ): Promise<Prisma.ProblemAreaGetPayload<{}>> {
+    // Access model via lowercase property on tx client
+    const newProblemArea = await tx.problemArea.create({
+      data: {
+        interview_id: interviewId,
+        title: paData.title,
+        description: paData.description,
+      },
+    });
+
+    if (paData.excerpts && paData.excerpts.length > 0) {
+      // Access model via lowercase property on tx client
+      await tx.excerpt.createMany({
+        data: paData.excerpts.map((exData) => ({
+          problem_area_id: newProblemArea.id,
+          ...exData, // Spread remaining fields
+        })),
+      });
+    }
+    return newProblemArea;
+  }
+
   /**
    * Find multiple interviews with basic fields (no relations by default).
    */
@@ -191,6 +203,65 @@ export class InterviewRepository {
     }
   }
 
+  /**
+   * Find the stored formatted transcript of an interview (no relations).
+   * Returns null when the interview does not exist; formattedTranscript is
+   * null for interviews analyzed before it was persisted.
+   */
+  async findFormattedTranscript(id: string): Promise<{ userId: string | null; formattedTranscript: string | null } | null> {
+    try {
+      const interview = await this.prisma.interview.findUnique({
+        where: { id },
+        select: { userId: true, analysis_data: true },
+      });
+      if (!interview) {
+        return null;
+      }
+      const analysisData = interview.analysis_data as Prisma.JsonObject | null;
+      const formattedTranscript = analysisData?.formatted_transcript;
+      return {
+        userId: interview.userId,
+        formattedTranscript: typeof formattedTranscript === 'string' ? formattedTranscript : null,
+      };
+    } catch (error) {
+      console.error(`Error finding formatted transcript for interview ${id}:`, error);
+      throw error;
+    }
+  }
+
+  /**
+   * Merge the synthesis step's output into an interview stored before it finished.
+   * Returns null when the interview does not exist.
+   */
+  async updateSynthesis(
+    id: string,
+    synthesis: Prisma.JsonObject,
+    title?: string
+  ): Promise<Interview | null> {
+    try {
+      return await this.prisma.$transaction(async (tx) => {
+        const interview = await tx.interview.findUnique({
+          where: { id },
+          select: { analysis_data: true },
+        });
+        if (!interview) {
+          return null;
+        }
+        const analysisData = (interview.analysis_data as Prisma.JsonObject | null) ?? {};
+        return tx.interview.update({
+          where: { id },
+          data: {
+            analysis_data: { ...analysisData, ...synthesis },
+            ...(title ? { title } : {}),
+          },
+        });
+      });
+    } catch (error) {
+      console.error(`Error updating synthesis for interview ${id}:`, error);
+      throw error;
+    }
+  }
+
   /**
    * Find multiple interviews with all nested relations.
    */
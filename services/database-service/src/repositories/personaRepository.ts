@@ -63,6 +63,26 @@ export class PersonaRepository extends BaseRepository<Persona> {
     });
   }
 
+  /**
+   * Finds the personas of several users in one query, grouped by user.
+   * @param userIds - The IDs of the users.
+   * @returns A promise resolving to a map of user ID to that user's personas (empty array if none).
+   */
+  async findManyByUserIds(userIds: string[]): Promise<Record<string, Persona[]>> {
+    if (!userIds || userIds.length === 0) {
+        throw new Error("At least one user ID must be provided to fetch personas.");
+    }
+    const personas = await this.prisma.persona.findMany({
+      where: { userId: { in: userIds } },
+      orderBy: { name: 'asc' }, // Order alphabetically by name
+    });
+    const byUser: Record<string, Persona[]> = Object.fromEntries(userIds.map(id => [id, [] as Persona[]]));
+    for (const persona of personas) {
+      byUser[persona.userId]?.push(persona);
+    }
+    return byUser;
+  }
+
   /**
    * Creates a new persona for a user.
    * Ensures the persona name is unique for the user.
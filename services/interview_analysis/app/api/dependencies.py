@@ -1,30 +1,46 @@
 """
 Dependency injection for the API routes.
 """
+import functools
 import logging # Add logging import
 from fastapi import Depends, HTTPException, Request
+from ..config.settings import settings
 from ..domain.workflows import InterviewWorkflow
 from ..services.analysis.analyzer import TranscriptAnalyzer
+from ..services.analysis.analysis_cache import SemanticAnalysisCache
 from ..services.storage.repository import InterviewRepository
+from ..utils.cloud_auth import get_http_client
 from ..services.analysis.gemini_pipeline.analysis_pipeline import create_analysis_pipeline
 
 # Import new dependencies for Persona Workflow
 from ..services.persona.workflow import PersonaWorkflow
 from ..services.persona.persona_suggester import PersonaSuggester
+from ..services.persona.persona_ranker import PersonaRanker, create_gemini_embedder
 # Import the persona Gemini pipeline creator
 from ..services.persona.gemini_pipeline.pipeline import create_persona_pipeline
 
 # Setup logger for this module
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
 def get_analyzer() -> TranscriptAnalyzer:
     """
     Dependency to get the transcript analyzer service.
     
+    The analyzer keeps no per-request state, so one instance is shared by
+    all requests.
+    
     Returns:
         TranscriptAnalyzer: Configured transcript analyzer
     """
-    return TranscriptAnalyzer()
+    semantic_cache = None
+    if settings.ANALYSIS_SEMANTIC_CACHE_TTL > 0:
+        semantic_cache = SemanticAnalysisCache(
+            embed_fn=create_gemini_embedder(),
+            threshold=settings.ANALYSIS_SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=settings.ANALYSIS_SEMANTIC_CACHE_TTL
+        )
+    return TranscriptAnalyzer(semantic_cache=semantic_cache)
 
 
 def get_repository() -> InterviewRepository:
@@ -32,9 +48,9 @@ def get_repository() -> InterviewRepository:
     Dependency to get the interview repository service.
     
     Returns:
-        InterviewRepository: Configured interview repository
+        InterviewRepository: Configured interview repository using the pooled HTTP client
     """
-    return InterviewRepository()
+    return InterviewRepository(client=get_http_client())
 
 
 def get_interview_workflow(
@@ -54,9 +70,8 @@ def get_interview_workflow(
     return InterviewWorkflow(analyzer, repository) 
 
 
-def get_persona_workflow() -> PersonaWorkflow:
+def get_persona_workflow(repository: InterviewRepository = Depends(get_repository)) -> PersonaWorkflow:
     """Dependency provider for PersonaWorkflow."""
-    repository = InterviewRepository()
     # Instantiate the actual Gemini pipeline for persona suggestion
     try:
         persona_pipeline = create_persona_pipeline()
@@ -68,8 +83,13 @@ def get_persona_workflow() -> PersonaWorkflow:
         # Depending on desired behavior, could raise HTTPException(503, ...) or allow app to start degraded.
         # For now, let's re-raise to prevent startup without the pipeline.
         raise RuntimeError(f"Persona Suggestion Pipeline initialization failed: {str(e)}") 
+
+    # Optional embedding pre-filter; genai is configured by create_persona_pipeline above
+    ranker = None
+    if settings.PERSONA_TOP_K > 0:
+        ranker = PersonaRanker(embed_fn=create_gemini_embedder(), top_k=settings.PERSONA_TOP_K)
         
-    return PersonaWorkflow(repository=repository, suggester=suggester)
+    return PersonaWorkflow(repository=repository, suggester=suggester, ranker=ranker)
 
 
 # Dependency to get User ID from forwarded header
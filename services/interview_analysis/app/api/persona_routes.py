@@ -2,7 +2,8 @@
 API routes for persona-related operations.
 """
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Request 
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request 
 
 from ..services.persona.workflow import PersonaWorkflow
 from ..utils.api_responses import APIResponse
@@ -24,6 +25,7 @@ router = APIRouter()
 )
 async def suggest_personas_endpoint(
     interview_id: str,
+    mode: Literal["all", "existing_only"] = Query("all", description="'existing_only' skips suggesting new personas"),
     user_id: str = Depends(get_forwarded_user_id), 
     workflow: PersonaWorkflow = Depends(get_persona_workflow) 
 ):
@@ -33,7 +35,7 @@ async def suggest_personas_endpoint(
     """
     logger.info(f"Received request to suggest personas for interview {interview_id} by user {user_id}")
     try:
-        suggestions = await workflow.suggest_personas_for_interview(interview_id, user_id)
+        suggestions = await workflow.suggest_personas_for_interview(interview_id, user_id, mode=mode)
         return APIResponse.success(
             message="Persona suggestions generated successfully",
             data=suggestions
@@ -26,6 +26,7 @@ async def analyze_interview(
     interviewee: Optional[str] = Form(None, description="Name of the interviewee"),
     interview_date: Optional[str] = Form(None, description="Date of the interview (ISO format)"),
     userId: Optional[str] = Form(None, description="User ID of the authenticated user"),
+    no_cache: bool = Form(False, description="Always run a fresh analysis, e.g. for sensitive transcripts"),
     workflow: InterviewWorkflow = Depends(get_interview_workflow)
 ):
     """
@@ -46,6 +47,7 @@ async def analyze_interview(
         interviewee: Optional name of the interviewee
         interview_date: Optional date of the interview
         userId: Optional user ID for the authenticated user
+        no_cache: Skip reusing cached analyses of near-identical transcripts
         workflow: Interview workflow service injected via dependency
     
     Returns:
@@ -87,7 +89,8 @@ async def analyze_interview(
             "interviewee": interviewee,
             "interview_date": interview_date,
             "title": f"Interview - {file.filename}",
-            "userId": userId
+            "userId": userId,
+            "no_cache": no_cache
         }
         
         # Process the interview through the workflow
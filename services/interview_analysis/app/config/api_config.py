@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 import logging
+from typing import Optional
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -51,4 +52,27 @@ try:
     APIConfig.validate_config()
 except ValueError as e:
     logger.error(f"API config validation failed: {str(e)}")
-    logger.error("The service will likely fail to process requests due to missing configuration") 
\ No newline at end of file
+    logger.error("The service will likely fail to process requests due to missing configuration")
+
+
+# API key google.generativeai was last configured with. genai.configure drops
+# the library's cached clients, and with them the gRPC channel (a single
+# multiplexed HTTP/2 connection) that every Gemini call reuses, so it is only
+# called again when the key changes.
+_configured_api_key: Optional[str] = None
+
+
+def configure_genai(api_key: str) -> None:
+    """
+    Configure google.generativeai with the API key, once per process.
+
+    Args:
+        api_key: The Gemini API key
+    """
+    global _configured_api_key
+    if api_key == _configured_api_key:
+        return
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    _configured_api_key = api_key
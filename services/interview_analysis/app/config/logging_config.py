@@ -1,8 +1,64 @@
 import logging.config
+import logging.handlers
 import os
+import queue
 import sys
+from typing import Dict, List, Optional
 from .settings import settings
 
+# Writes queued log records to the real handlers on a background thread
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+# Handlers each configured logger had before they were moved behind the queue
+_original_handlers: Dict[str, List[logging.Handler]] = {}
+
+# Loggers configured below; their handlers are moved behind the queue
+_CONFIGURED_LOGGERS = ("", "uvicorn", "uvicorn.error", "fastapi")
+
+
+def _start_queue_listener():
+    """
+    Route the configured loggers through a queue so stdout writes happen off the event loop.
+
+    Request handlers only enqueue records; a listener thread does the
+    formatting and the blocking writes.
+    """
+    global _queue_listener
+    stop_logging()
+
+    targets = []
+    for name in _CONFIGURED_LOGGERS:
+        handlers = logging.getLogger(name).handlers
+        _original_handlers[name] = list(handlers)
+        for handler in handlers:
+            if handler not in targets:
+                targets.append(handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    for name in _CONFIGURED_LOGGERS:
+        logging.getLogger(name).handlers = [queue_handler]
+
+    _queue_listener = logging.handlers.QueueListener(log_queue, *targets, respect_handler_level=True)
+    _queue_listener.start()
+
+
+def stop_logging():
+    """
+    Flush queued log records, stop the listener thread and restore the original handlers.
+
+    Safe to call more than once. Records logged afterwards are written
+    directly, so nothing is left in a queue that is no longer drained.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+    for name, handlers in _original_handlers.items():
+        logging.getLogger(name).handlers = handlers
+    _original_handlers.clear()
+
+
 def setup_logging():
     """Configure logging for the application."""
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
@@ -69,4 +125,6 @@ def setup_logging():
             stream=sys.stdout
         )
         logging.error(f"Failed to configure logging with dictConfig: {str(e)}")
-        logging.info("Using fallback basic logging configuration")
\ No newline at end of file
+        logging.info("Using fallback basic logging configuration")
+
+    _start_queue_listener()
@@ -18,6 +18,22 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_API_URL: str = os.getenv("DATABASE_API_URL", "http://localhost:5001")
+    # Seconds to cache a user's persona list between suggestion requests; persona
+    # edits can go unseen for this long since nothing invalidates the cache (0 disables)
+    PERSONA_CACHE_TTL_SECONDS: int = int(os.getenv("PERSONA_CACHE_TTL_SECONDS", "60"))
+    # Seconds to reuse persona suggestions for an unchanged interview + persona list (0 disables)
+    PERSONA_SUGGESTION_CACHE_TTL: int = int(os.getenv("PERSONA_SUGGESTION_CACHE_TTL", "3600"))
+    # Personas sent to Gemini per suggestion, pre-ranked by embedding similarity (0 disables ranking)
+    PERSONA_TOP_K: int = int(os.getenv("PERSONA_TOP_K", "10"))
+    # Seconds a cached analysis can be reused for an identical transcript (0 disables)
+    ANALYSIS_CACHE_TTL: int = int(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+    # Seconds a cached analysis can be reused for a near-duplicate transcript; off
+    # unless set, since a hit returns another upload's analysis (0 disables)
+    ANALYSIS_SEMANTIC_CACHE_TTL: int = int(os.getenv("ANALYSIS_SEMANTIC_CACHE_TTL", "0"))
+    # Minimum transcript embedding similarity for reusing a cached analysis
+    ANALYSIS_SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("ANALYSIS_SEMANTIC_CACHE_THRESHOLD", "0.97"))
+    # Compress large request bodies sent to the database service ("gzip" or empty to disable)
+    DB_SERVICE_COMPRESSION: str = os.getenv("DB_SERVICE_COMPRESSION", "")
     
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
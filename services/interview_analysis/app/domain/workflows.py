@@ -2,6 +2,7 @@
 Core domain workflows for the interview analysis service.
 These workflows orchestrate the business processes independent of implementation details.
 """
+import asyncio
 import logging
 from typing import Dict, Any, Optional, List
 from .models import InterviewAnalysis, StorageInfo
@@ -45,8 +46,34 @@ class InterviewWorkflow:
         """
         logger.info(f"Starting interview analysis workflow for file: {filename}")
         
-        # Step 1: Analyze the transcript
-        analysis_result = await self.analyzer.analyze_transcript(file_content, filename)
+        # Step 1: Analyze the transcript. Cached analyses are only reused within
+        # the same project and user, and never when the caller opted out.
+        # Anonymous uploads all share one namespace, so they only reuse analyses
+        # of identical transcripts, never another upload's near-duplicate.
+        cache_namespace = None
+        if not metadata.get("no_cache"):
+            cache_namespace = f"{metadata.get('project_id') or ''}:{metadata.get('userId') or ''}"
+
+        # Problem areas and excerpts are stored while the synthesis is generated;
+        # the synthesis and suggested title are merged in once it finishes.
+        store_task: Optional[asyncio.Future] = None
+
+        def store_early(partial_result: Dict[str, Any]) -> None:
+            nonlocal store_task
+            store_task = asyncio.ensure_future(
+                self.storage.store_interview(partial_result, self._storage_metadata(partial_result, metadata, filename))
+            )
+
+        try:
+            analysis_result = await self.analyzer.analyze_transcript(
+                file_content, filename, cache_namespace=cache_namespace, on_excerpts=store_early,
+                reuse_similar=bool(metadata.get("userId"))
+            )
+        except Exception as e:
+            if store_task is not None:
+                logger.warning("Analysis failed after storage started; discarding the early store")
+                await self._discard_early_store(store_task, metadata, e)
+            raise
         
         # --- Add Logging --- 
         # Log the raw speaker identification (if still relevant for debugging)
@@ -59,29 +86,26 @@ class InterviewWorkflow:
         
         # Step 2: Store the results
         try:
-            # Convert participants list to comma-separated string for storage
-            participants_string = None
-            if participants_list:
-                participants_string = ", ".join(participants_list)
-            
-            # Determine the title: Use suggested_title if available, otherwise fallback
-            suggested_title = analysis_result.get("suggested_title")
-            final_title = suggested_title if suggested_title else metadata.get("title", f"Interview - {filename}")
-            logger.info(f"Using title for storage: '{final_title}' (Suggested: '{suggested_title}')")
+            storage_metadata = self._storage_metadata(analysis_result, metadata, filename)
+            logger.info(f"Using title for storage: '{storage_metadata['title']}' (Suggested: '{analysis_result.get('suggested_title')}')")
 
-            # Prepare storage metadata using the final title and participants string
-            storage_metadata = {
-                "project_id": metadata.get("project_id"),
-                "participants": participants_string, 
-                "interview_date": metadata.get("interview_date"),
-                "title": final_title, # Use the determined title
-                "userId": metadata.get("userId")
-            }
-            
-            logger.info(f"Attempting to store interview with metadata: {storage_metadata}")
-            
-            # Store the interview (passing the full analysis result which includes the suggested title)
-            stored_data = await self.storage.store_interview(analysis_result, storage_metadata)
+            if store_task is None:
+                # Cached analysis: nothing was stored early
+                logger.info(f"Attempting to store interview with metadata: {storage_metadata}")
+                stored_data = await self.storage.store_interview(analysis_result, storage_metadata)
+            else:
+                # A failed early store raises here, with its own error
+                stored_data = await store_task
+                try:
+                    await self.storage.update_interview_synthesis(
+                        stored_data.get("id"),
+                        analysis_result.get("synthesis"),
+                        suggested_title=analysis_result.get("suggested_title"),
+                        title=storage_metadata["title"]
+                    )
+                except Exception as e:
+                    await self._discard_early_store(store_task, metadata, e)
+                    raise
                 
             # Add storage information to result
             analysis_result["storage"] = {
@@ -95,9 +119,71 @@ class InterviewWorkflow:
             logger.error(f"Error during storage process: {str(e)}", exc_info=True)
             # Re-raise a StorageError instead of continuing
             from ..utils.errors import StorageError
-            raise StorageError(f"Failed to store interview results: {str(e)}")
+            raise StorageError(f"Failed to store interview results: {str(e)}") from e
 
         # Remove the temporary suggested_title from the final returned result if desired
         # analysis_result.pop("suggested_title", None) 
+        # The formatted transcript is only needed in storage; keep it out of the API response
+        analysis_result.pop("formatted_transcript", None)
+        
+        return analysis_result
+
+    async def _discard_early_store(
+        self,
+        store_task: "asyncio.Future[Dict[str, Any]]",
+        metadata: Dict[str, Any],
+        error: Exception
+    ) -> None:
+        """
+        Remove an interview stored early by a workflow that then failed.
+        
+        Waits for the store rather than cancelling it, since a cancelled POST may
+        still have created the interview. The interview is deleted for its owner;
+        anonymous interviews can't be deleted through the database service, so
+        their synthesis records the failure instead. Cleanup errors are logged,
+        not raised, so they don't hide the original error.
         
-        return analysis_result 
\ No newline at end of file
+        Args:
+            store_task: The early store_interview task
+            metadata: Metadata from the upload request
+            error: The error the workflow failed with
+        """
+        try:
+            stored_data = await store_task
+        except Exception as store_error:
+            logger.error(f"Early store failed as well: {str(store_error)}")
+            return
+
+        interview_id = stored_data.get("id")
+        try:
+            if metadata.get("userId"):
+                await self.storage.delete_interview(interview_id, metadata["userId"])
+                logger.info(f"Deleted incomplete interview {interview_id}")
+            else:
+                await self.storage.update_interview_synthesis(interview_id, f"Analysis failed: {str(error)}")
+                logger.info(f"Marked incomplete interview {interview_id} as failed")
+        except Exception as cleanup_error:
+            logger.error(f"Failed to clean up incomplete interview {interview_id}: {str(cleanup_error)}")
+
+    @staticmethod
+    def _storage_metadata(analysis_result: Dict[str, Any], metadata: Dict[str, Any], filename: str) -> Dict[str, Any]:
+        """
+        Build the metadata an analysis is stored with.
+        
+        Args:
+            analysis_result: The (possibly partial) analysis result
+            metadata: Metadata from the upload request
+            filename: Original name of the uploaded file
+            
+        Returns:
+            Storage metadata; the title is the suggested title when there is one
+        """
+        # Convert participants list to comma-separated string for storage
+        participants_list = analysis_result.get("participants", [])
+        return {
+            "project_id": metadata.get("project_id"),
+            "participants": ", ".join(participants_list) if participants_list else None,
+            "interview_date": metadata.get("interview_date"),
+            "title": analysis_result.get("suggested_title") or metadata.get("title", f"Interview - {filename}"),
+            "userId": metadata.get("userId")
+        }
@@ -1,10 +1,11 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from .api.routes import router as analysis_router
 from .api.persona_routes import router as persona_router
-from .config.logging_config import setup_logging
+from .config.logging_config import setup_logging, stop_logging
 from .config.settings import settings
+from .utils.api_responses import FastJSONResponse
+from .utils.cloud_auth import close_http_client, get_http_client
 import logging
 import os
 import sys
@@ -66,7 +67,8 @@ logger.info(f"Environment variables: PORT={port}")
 app = FastAPI(
     title="Interview Analysis API",
     description="Core interview analysis service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 logger.info("FastAPI app created successfully")
 
@@ -121,7 +123,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     request_id = getattr(request.state, "request_id", str(uuid.uuid4()))
     logger.error(f"[{request_id}] Unhandled exception: {str(exc)}", exc_info=True)
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
@@ -201,7 +203,7 @@ async def health_check():
         
         if not all_dependencies_ok:
             health_status["status"] = "degraded"
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=200,  # Still return 200 so Cloud Run doesn't kill the instance
                 content=health_status
             )
@@ -210,7 +212,7 @@ async def health_check():
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,  # Still return 200 so Cloud Run doesn't kill the instance
             content={"status": "unhealthy", "error": str(e)}
         )
@@ -223,10 +225,14 @@ async def startup_event():
     logger.info(f"Environment: {os.getenv('NODE_ENV', 'development')}")
     logger.info(f"CORS Origins: {cors_origins}")
     logger.info(f"Database API URL: {settings.DATABASE_API_URL}")
+    # Create the pooled client up front rather than on the first request
+    get_http_client()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Interview Analysis Service shutting down")
+    await close_http_client()
+    stop_logging()
 
 # Run the application if executed directly
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""
+Caches for analysis pipeline results, so re-uploaded or near-identical
+transcripts skip the Gemini calls.
+"""
+import copy
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .gemini_pipeline.analysis_prompts import PROBLEM_PROMPT, EXCERPT_PROMPT, SYNTHESIS_PROMPT
+from ...config.api_config import APIConfig
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Async function embedding a batch of texts, one vector per input text
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# Identifies the prompts and model an analysis was produced with, so editing a
+# prompt or switching models naturally invalidates exact-match entries.
+_PROMPT_VERSION = hashlib.blake2b(
+    repr([PROBLEM_PROMPT.messages, EXCERPT_PROMPT.messages, SYNTHESIS_PROMPT.messages]).encode(),
+    digest_size=8
+).hexdigest()
+
+# Exact-match analyses keyed by namespace, normalized transcript, prompt version
+# and model: a dict lookup, no embedding call. Checked before the semantic cache.
+_EXACT_CACHE_MAXSIZE = 256
+_exact_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_exact_cache_stats = {"hits": 0, "lookups": 0}
+
+
+def exact_cache_key(namespace: str, transcript: str) -> str:
+    """Build the exact-match key; whitespace differences don't change it."""
+    normalized = " ".join(transcript.split())
+    return hashlib.blake2b(
+        "|".join((namespace, _PROMPT_VERSION, APIConfig.GEMINI_MODEL, normalized)).encode(),
+        digest_size=16
+    ).hexdigest()
+
+
+def get_exact_cached_analysis(key: str) -> Optional[Dict[str, Any]]:
+    """Return a copy of the cached analysis for the key, or None if absent or expired."""
+    _exact_cache_stats["lookups"] += 1
+    entry = _exact_cache.get(key)
+    if entry is not None and time.monotonic() >= entry[0]:
+        _exact_cache.pop(key, None)
+        entry = None
+    if entry is not None:
+        _exact_cache_stats["hits"] += 1
+    logger.info(
+        f"Exact analysis cache {'hit' if entry else 'miss'} "
+        f"(hit rate {_exact_cache_stats['hits']}/{_exact_cache_stats['lookups']})"
+    )
+    return copy.deepcopy(entry[1]) if entry else None
+
+
+def cache_exact_analysis(key: str, result: Dict[str, Any]) -> None:
+    """Cache an analysis for ANALYSIS_CACHE_TTL seconds, evicting the oldest entry when full."""
+    ttl = settings.ANALYSIS_CACHE_TTL
+    if ttl <= 0:
+        return
+    if key not in _exact_cache and len(_exact_cache) >= _EXACT_CACHE_MAXSIZE:
+        _exact_cache.pop(next(iter(_exact_cache)))
+    _exact_cache[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+
+# Cached analyses as (namespace, transcript embedding, expires_at, result). Kept
+# at module level so the entries survive get_analyzer's cache being cleared;
+# scanned with one matrix product, so a few hundred entries stay cheap.
+_SEMANTIC_CACHE_MAXSIZE = 256
+_semantic_entries: List[Tuple[str, np.ndarray, float, Dict[str, Any]]] = []
+
+# The embedding model only reads ~2k tokens per text, so a transcript is
+# embedded as evenly spaced windows and compared window by window.
+_EMBED_WINDOWS = 4
+_EMBED_WINDOW_CHARS = 6000
+
+
+def _transcript_windows(transcript: str) -> List[str]:
+    """Split a transcript into _EMBED_WINDOWS evenly spaced windows, or one window if it is short."""
+    if len(transcript) <= _EMBED_WINDOW_CHARS:
+        return [transcript]
+    step = (len(transcript) - _EMBED_WINDOW_CHARS) / (_EMBED_WINDOWS - 1)
+    return [
+        transcript[int(i * step):int(i * step) + _EMBED_WINDOW_CHARS]
+        for i in range(_EMBED_WINDOWS)
+    ]
+
+
+class SemanticAnalysisCache:
+    """
+    Reuses the analysis of a near-duplicate transcript in the same namespace.
+
+    Transcripts are compared by the mean cosine similarity of their window
+    embeddings; a match at or above the threshold is a hit.
+    """
+
+    def __init__(self, embed_fn: EmbedFn, threshold: float = 0.97, ttl_seconds: int = 7 * 24 * 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            embed_fn: Async function returning one embedding per input text.
+            threshold: Minimum similarity for a cached analysis to be reused.
+            ttl_seconds: How long a cached analysis stays reusable.
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+    async def embed(self, transcript: str) -> np.ndarray:
+        """
+        Embed a transcript for lookups and stores.
+
+        Args:
+            transcript: The formatted transcript.
+
+        Returns:
+            The unit-normalized window embeddings, concatenated and scaled so
+            that a dot product is their mean cosine similarity.
+        """
+        vectors = np.asarray(await self.embed_fn(_transcript_windows(transcript)), dtype=np.float32)
+        if len(vectors) == 1:
+            # Short transcripts are a single window; repeat it so every embedding has the same size
+            vectors = np.repeat(vectors, _EMBED_WINDOWS, axis=0)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.ravel() / np.sqrt(_EMBED_WINDOWS)
+
+    def lookup(self, namespace: str, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the closest cached analysis in the namespace, if it is similar enough.
+
+        Args:
+            namespace: Scope of the lookup (e.g. project and user).
+            embedding: The transcript embedding from embed().
+
+        Returns:
+            The cached analysis result, or None on a miss.
+        """
+        now = time.monotonic()
+        _semantic_entries[:] = [entry for entry in _semantic_entries if entry[2] > now]
+        candidates = [entry for entry in _semantic_entries if entry[0] == namespace]
+        if not candidates:
+            return None
+
+        scores = np.stack([entry[1] for entry in candidates]) @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            logger.info(f"Semantic analysis cache miss (best similarity {scores[best]:.3f})")
+            return None
+        logger.info(f"Semantic analysis cache hit (similarity {scores[best]:.3f})")
+        return copy.deepcopy(candidates[best][3])
+
+    def store(self, namespace: str, embedding: np.ndarray, result: Dict[str, Any]) -> None:
+        """
+        Cache an analysis result, evicting the oldest entry when full.
+
+        Args:
+            namespace: Scope the result may be reused in.
+            embedding: The transcript embedding from embed().
+            result: The analysis pipeline result.
+        """
+        if len(_semantic_entries) >= _SEMANTIC_CACHE_MAXSIZE:
+            _semantic_entries.pop(0)
+        _semantic_entries.append((namespace, embedding, time.monotonic() + self.ttl_seconds, copy.deepcopy(result)))
@@ -4,12 +4,16 @@ Service for analyzing interview transcripts and extracting insights.
 import logging
 import time
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable, Tuple
 import re
 import json
 from .gemini_pipeline import create_analysis_pipeline
+from .analysis_cache import (
+    SemanticAnalysisCache, exact_cache_key, get_exact_cached_analysis, cache_exact_analysis
+)
 from ...domain.models import InterviewAnalysis, TranscriptChunk
 from ...utils.errors import AnalysisError, FileProcessingError, ConfigurationError
+from ...utils.transcript_utils import format_chunks_for_analysis
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -21,18 +25,38 @@ class TranscriptAnalyzer:
     Uses Gemini-powered pipeline to process and analyze transcript content.
     """
     
-    def __init__(self):
-        """Initialize the transcript analyzer."""
+    def __init__(self, semantic_cache: Optional[SemanticAnalysisCache] = None):
+        """
+        Initialize the transcript analyzer.
+        
+        Args:
+            semantic_cache: Optional cache reusing analyses of near-duplicate transcripts
+        """
         logger.info("Initializing TranscriptAnalyzer")
         self.analysis_pipeline = create_analysis_pipeline()
+        self.semantic_cache = semantic_cache
     
-    async def analyze_transcript(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+    async def analyze_transcript(
+        self,
+        file_content: bytes,
+        filename: str,
+        cache_namespace: Optional[str] = None,
+        on_excerpts: Optional[Callable[[Dict[str, Any]], None]] = None,
+        reuse_similar: bool = True
+    ) -> Dict[str, Any]:
         """
         Analyze a transcript file to extract insights.
         
         Args:
             file_content: Raw bytes of the transcript file
             filename: The original filename (e.g., 'interview.vtt' or 'transcript.txt')
+            cache_namespace: Scope in which cached analyses may be reused (e.g. project and user);
+                             None skips the cache
+            on_excerpts: Called with the result minus the synthesis as soon as the
+                         pipeline has the problem areas and excerpts; not called
+                         when a cached analysis is reused
+            reuse_similar: Whether near-duplicate transcripts may reuse each other's
+                           analysis; only identical transcripts do when False
             
         Returns:
             Dict containing structured analysis results
@@ -74,7 +98,7 @@ class TranscriptAnalyzer:
             logger.info(f"Extracted unique participants from chunks: {extracted_participants}")
             
             # Step 3: Format transcript for LLM analysis
-            formatted_transcript = self._format_chunks_for_analysis(processed_chunks)
+            formatted_transcript = format_chunks_for_analysis(processed_chunks)
             
             # Step 4: Run the analysis pipeline (UPDATED CALL)
             logger.info("Starting analysis with Gemini pipeline")
@@ -86,11 +110,16 @@ class TranscriptAnalyzer:
                 # Calculate max_chunk_number (required by new pipeline)
                 max_chunk_number = max(chunk.get('number', 0) for chunk in processed_chunks) if processed_chunks else 0
 
-                # Call the pipeline with the required arguments
-                result = await self.analysis_pipeline.run_analysis(
-                    transcript_text=formatted_transcript, 
-                    transcript_chunks=processed_chunks, # Pass the structured chunks
-                    participants=extracted_participants # Pass the pre-parsed participants
+                partial_ready = None
+                if on_excerpts is not None:
+                    def partial_ready(partial: Dict[str, Any]) -> None:
+                        partial = self._add_full_transcript_to_result(partial, processed_chunks)
+                        partial["formatted_transcript"] = formatted_transcript
+                        on_excerpts(partial)
+
+                result = await self._run_pipeline(
+                    formatted_transcript, processed_chunks, extracted_participants, cache_namespace,
+                    on_excerpts=partial_ready, reuse_similar=reuse_similar
                 )
                 logger.info("Analysis pipeline completed successfully")
                 
@@ -102,6 +131,8 @@ class TranscriptAnalyzer:
             # The pipeline now returns the final structure including pre-parsed participants
             # We might still want to add the full transcript chunk data if not included by pipeline
             processed_result = self._add_full_transcript_to_result(result, processed_chunks)
+            # Persisted with analysis_data so persona suggestions can reuse it without re-formatting
+            processed_result["formatted_transcript"] = formatted_transcript
             
             # Log completion time
             duration = time.time() - start_time
@@ -116,6 +147,60 @@ class TranscriptAnalyzer:
             logger.error(f"Error in transcript analysis: {str(e)}", exc_info=True)
             raise AnalysisError(f"Transcript analysis failed: {str(e)}")
     
+    async def _run_pipeline(
+        self,
+        formatted_transcript: str,
+        processed_chunks: List[Dict[str, Any]],
+        participants: List[str],
+        cache_namespace: Optional[str],
+        on_excerpts: Optional[Callable[[Dict[str, Any]], None]] = None,
+        reuse_similar: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Run the analysis pipeline, reusing a cached analysis of the same or a near-duplicate transcript when possible.
+        
+        Args:
+            formatted_transcript: Formatted transcript text
+            processed_chunks: The structured transcript chunks
+            participants: Participants parsed from the chunks
+            cache_namespace: Scope for cached analyses, or None to skip the cache
+            on_excerpts: Passed to the pipeline; unused on a cache hit
+            reuse_similar: Whether to consult and fill the semantic cache
+            
+        Returns:
+            The pipeline result
+        """
+        if cache_namespace is not None:
+            # Identical transcripts are a dict lookup away; only misses pay for an embedding
+            exact_key = exact_cache_key(cache_namespace, formatted_transcript)
+            cached = get_exact_cached_analysis(exact_key)
+            embedding = None
+            if cached is None and self.semantic_cache and reuse_similar:
+                try:
+                    embedding = await self.semantic_cache.embed(formatted_transcript)
+                    cached = self.semantic_cache.lookup(cache_namespace, embedding)
+                except Exception as e:
+                    logger.warning(f"Semantic analysis cache unavailable, running the full pipeline: {str(e)}")
+                    embedding = None
+            if cached is not None:
+                # Participants come from this upload's chunks, not the cached one
+                cached["participants"] = participants
+                return cached
+
+        # Call the pipeline with the required arguments
+        result = await self.analysis_pipeline.run_analysis(
+            transcript_text=formatted_transcript, 
+            transcript_chunks=processed_chunks, # Pass the structured chunks
+            participants=participants, # Pass the pre-parsed participants
+            on_excerpts=on_excerpts
+        )
+        # Only cache analyses that found something; failed steps leave problem_areas empty
+        if cache_namespace is not None and result.get("problem_areas"):
+            cache_exact_analysis(exact_key, result)
+            if embedding is not None:
+                self.semantic_cache.store(cache_namespace, embedding, result)
+        return result
+
     def _parse_vtt(self, vtt_content: str) -> List[Dict[str, Any]]:
         """
         Parse standard VTT content, capturing timestamps.
@@ -123,10 +208,11 @@ class TranscriptAnalyzer:
         Returns: List of dictionaries with number, timestamp, text
         """
         logger.info("Parsing using VTT logic")
-        lines = vtt_content.strip().split("\n")
+        # Lines are stripped as they are read, so the content itself needs no strip() copy
+        lines = vtt_content.splitlines()
         chunks = []
         chunk_number = 0
-        current_text = []
+        current_text = []  # Reused across cues; cleared once each cue is joined
         current_timestamp = "" # Store the timestamp for the current cue
         in_cue_block = False 
 
@@ -139,8 +225,8 @@ class TranscriptAnalyzer:
                 if in_cue_block and current_text: # Finalize previous cue block
                     chunk_number += 1
                     # Include timestamp when adding chunk
-                    chunks.append({"number": chunk_number, "timestamp": current_timestamp, "text": " ".join(current_text).strip()})
-                current_text = []
+                    chunks.append((chunk_number, current_timestamp, " ".join(current_text)))
+                current_text.clear()
                 current_timestamp = line # Capture the timestamp line
                 in_cue_block = True 
                 continue 
@@ -149,8 +235,8 @@ class TranscriptAnalyzer:
                 if not line: 
                     if current_text:
                         chunk_number += 1
-                        chunks.append({"number": chunk_number, "timestamp": current_timestamp, "text": " ".join(current_text).strip()})
-                    current_text = []
+                        chunks.append((chunk_number, current_timestamp, " ".join(current_text)))
+                    current_text.clear()
                     current_timestamp = ""
                     in_cue_block = False
                     continue
@@ -162,7 +248,7 @@ class TranscriptAnalyzer:
 
         if in_cue_block and current_text: # Capture last cue
             chunk_number += 1
-            chunks.append({"number": chunk_number, "timestamp": current_timestamp, "text": " ".join(current_text).strip()})
+            chunks.append((chunk_number, current_timestamp, " ".join(current_text)))
 
         return self._post_process_chunks(chunks)
 
@@ -174,10 +260,10 @@ class TranscriptAnalyzer:
         Returns: List of dictionaries with number, timestamp, text
         """
         logger.info("Parsing using TXT logic")
-        lines = txt_content.strip().split("\n")
+        lines = txt_content.splitlines()
         chunks = []
         chunk_number = 0
-        current_text = []
+        current_text = []  # Reused across cues; cleared once each cue is joined
         current_timestamp = "" # Store the timestamp
         in_cue_block = False 
 
@@ -189,8 +275,8 @@ class TranscriptAnalyzer:
             if "-->" in line:
                 if in_cue_block and current_text:
                     chunk_number += 1
-                    chunks.append({"number": chunk_number, "timestamp": current_timestamp, "text": " ".join(current_text).strip()})
-                current_text = []
+                    chunks.append((chunk_number, current_timestamp, " ".join(current_text)))
+                current_text.clear()
                 current_timestamp = line # Capture timestamp
                 in_cue_block = True 
                 continue 
@@ -199,8 +285,8 @@ class TranscriptAnalyzer:
                 if not line: 
                     if current_text:
                         chunk_number += 1
-                        chunks.append({"number": chunk_number, "timestamp": current_timestamp, "text": " ".join(current_text).strip()})
-                    current_text = []
+                        chunks.append((chunk_number, current_timestamp, " ".join(current_text)))
+                    current_text.clear()
                     current_timestamp = ""
                     in_cue_block = False
                     continue
@@ -209,25 +295,24 @@ class TranscriptAnalyzer:
 
         if in_cue_block and current_text: # Capture last cue
             chunk_number += 1
-            chunks.append({"number": chunk_number, "timestamp": current_timestamp, "text": " ".join(current_text).strip()})
+            chunks.append((chunk_number, current_timestamp, " ".join(current_text)))
         
         return self._post_process_chunks(chunks)
 
-    def _post_process_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _post_process_chunks(self, chunks: List[Tuple[int, str, str]]) -> List[Dict[str, Any]]:
         """Shared logic to extract speaker from parsed chunks, preserving timestamp."""
+        # Parsers hand over (number, timestamp, text) tuples; each cue becomes a dict only here.
+        # Cue lines are stripped on read and joined with single spaces, so chunk
+        # text never carries outer whitespace; only the split point needs trimming.
         processed_chunks = []
-        for chunk in chunks:
-            text = chunk["text"]
-            timestamp = chunk.get("timestamp", "") # Get timestamp
-            number = chunk["number"]
-            
-            if ": " in text:
-                speaker, actual_text = text.split(": ", 1)
+        for number, timestamp, text in chunks:
+            sep = text.find(": ")
+            if sep != -1:
                 processed_chunks.append({
                     "number": number,
                     "timestamp": timestamp, # Keep timestamp
-                    "speaker": speaker.strip(),
-                    "text": actual_text.strip()
+                    "speaker": text[:sep].rstrip(),
+                    "text": text[sep + 2:].lstrip()
                 })
             else:
                 processed_chunks.append({
@@ -269,24 +354,6 @@ class TranscriptAnalyzer:
         
         return result
     
-    def _format_chunks_for_analysis(self, chunks: List[Dict[str, Any]]) -> str:
-        """
-        Format transcript chunks into a string for analysis.
-        
-        Args:
-            chunks: List of transcript chunks
-            
-        Returns:
-            Formatted string representation of the transcript
-        """
-        formatted_lines = []
-        
-        for chunk in chunks:
-            # Include speaker information in brackets plus the text
-            formatted_lines.append(f"[{chunk['speaker']}] (Chunk {chunk['number']}): {chunk['text']}")
-            
-        return "\n".join(formatted_lines)
-    
     def _add_full_transcript_to_result(self, 
                                        result: Dict[str, Any], 
                                        chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
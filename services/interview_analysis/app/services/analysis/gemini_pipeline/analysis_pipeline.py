@@ -1,16 +1,20 @@
 """
 Module for creating and managing Gemini API pipeline for interview analysis using LangChain prompts.
 """
+import asyncio
+import functools
 import os
+import re
 import logging
-import google.generativeai as genai
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable
 import json
 # Removed Pydantic validation imports for now, can be re-added per step
 # from pydantic import ValidationError
 # from .response_models import AnalysisResult, ProblemArea, Excerpt
-from .analysis_prompts import PROBLEM_PROMPT, EXCERPT_PROMPT, SYNTHESIS_PROMPT # Import new LangChain prompts
-from ....config.api_config import APIConfig
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from .analysis_prompts import render_problem_prompt, render_excerpt_prompt, render_synthesis_prompt # Pre-rendered LangChain prompts
+from ....config.api_config import APIConfig, configure_genai
+from ....utils.json_codec import dumps_json, loads_json
 import traceback # For more detailed error logging
 
 # Set up logging
@@ -27,6 +31,12 @@ def _extract_and_parse_json(response_text: str) -> Optional[Dict[str, Any]]:
     Returns:
         Parsed JSON dictionary or None if parsing fails.
     """
+    try:
+        # The model runs in JSON mode, so the response is normally bare JSON
+        return loads_json(response_text)
+    except ValueError:
+        pass # Fall back to extracting it from markdown fences or surrounding text
+
     try:
         json_str = response_text
         # Extract JSON if it's wrapped in markdown code blocks
@@ -57,7 +67,7 @@ def _extract_and_parse_json(response_text: str) -> Optional[Dict[str, Any]]:
                  logger.warning("Could not reliably find JSON structure in response.")
                  return None # Cannot reliably find JSON
 
-        return json.loads(json_str)
+        return loads_json(json_str)
 
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON: {str(e)}. Raw text: '{response_text[:200]}...'")
@@ -66,15 +76,99 @@ def _extract_and_parse_json(response_text: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Unexpected error during JSON extraction/parsing: {str(e)}")
         return None
 
+
+def _is_retryable(error: BaseException) -> bool:
+    """Retry rate limits and server errors; Google API errors carry the HTTP status as .code."""
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and (code == 429 or 500 <= code < 600)
+
+
+def _is_problem_area(pa: Any) -> bool:
+    """Check that a problem area has the non-empty fields later steps rely on."""
+    return isinstance(pa, dict) and bool(pa.get("problem_id") and pa.get("title") and pa.get("description"))
+
+
+# Characters that change the JSON scanner's state
+_JSON_STRUCTURE = re.compile(r'[{}\[\]"\\]')
+
+
+class _StreamedArrayItems:
+    """
+    Pull complete objects out of a streamed {"problem_areas": [{...}, ...]} response.
+
+    Tracks nesting and string state across chunks, so an item is only parsed
+    once its closing brace has arrived. Markdown fences around the JSON are
+    ignored because they contain no structural characters.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped_at = -1
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Add the next chunk of response text.
+
+        Args:
+            chunk: Newly streamed text.
+
+        Returns:
+            The objects completed by this chunk, in order.
+        """
+        start = len(self.text)
+        self.text += chunk
+        items = []
+        for match in _JSON_STRUCTURE.finditer(self.text, start):
+            ch, i = match.group(), match.start()
+            if self._in_string:
+                if i == self._escaped_at:
+                    continue
+                if ch == "\\":
+                    self._escaped_at = i + 1
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                # Top-level object, then the array, then an item
+                if self._depth == 3 and ch == "{":
+                    self._item_start = i
+            else:
+                if self._depth == 3 and ch == "}" and self._item_start != -1:
+                    try:
+                        items.append(loads_json(self.text[self._item_start:i + 1]))
+                    except ValueError:
+                        pass # Left for the full parse to report
+                    self._item_start = -1
+                self._depth -= 1
+        return items
+
 # --- End Helper Function ---
 
 
+# Configure safety settings to be less restrictive if needed (adjust as necessary)
+SAFETY_SETTINGS = [
+    { "category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE" },
+    { "category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE" },
+    { "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE" },
+    { "category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE" },
+]
+
+
+@functools.lru_cache(maxsize=1)
 def create_analysis_pipeline():
     """
     Create and configure an analysis pipeline with Google Gemini.
+
+    The pipeline holds no per-request state, so one instance is created per
+    process and shared by every analyzer.
     
     Returns:
-        An initialized GeminiAnalysisPipeline instance.
+        The shared GeminiAnalysisPipeline instance.
     """
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
@@ -82,17 +176,11 @@ def create_analysis_pipeline():
         raise ValueError("GEMINI_API_KEY environment variable not set")
     
     try:
-        genai.configure(api_key=api_key)
+        # Reuses the existing gRPC channel unless the key changed
+        configure_genai(api_key)
         model_name = APIConfig.GEMINI_MODEL
         logger.info(f"Using model: {model_name}")
-        # Configure safety settings to be less restrictive if needed (adjust as necessary)
-        safety_settings = [
-            { "category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE" },
-            { "category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE" },
-            { "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE" },
-            { "category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE" },
-        ]
-        return GeminiAnalysisPipeline(model_name, safety_settings)
+        return GeminiAnalysisPipeline(model_name, SAFETY_SETTINGS)
     except Exception as e:
         logger.error(f"Error creating analysis pipeline: {str(e)}")
         raise ValueError(f"Failed to create Gemini pipeline: {str(e)}")
@@ -106,11 +194,13 @@ class GeminiAnalysisPipeline:
 
     def __init__(self, model_name, safety_settings):
         """Initialize with a specific model and safety settings."""
+        import google.generativeai as genai
+
         self.model = genai.GenerativeModel(
             model_name=model_name,
             safety_settings=safety_settings,
-            # Consider adding generation_config if needed (e.g., temperature)
-            # generation_config=genai.types.GenerationConfig(temperature=0.7)
+            # JSON mode: responses come back as bare JSON, without markdown fences
+            generation_config={"response_mime_type": "application/json"}
             )
         # Prompts are imported constants now, no need for self.system_prompt
 
@@ -118,7 +208,8 @@ class GeminiAnalysisPipeline:
         self,
         transcript_text: str,
         transcript_chunks: List[Dict[str, Any]], # Used to get max_chunk_number
-        participants: List[str] # Pre-parsed participants
+        participants: List[str], # Pre-parsed participants
+        on_excerpts: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         Run the multi-step analysis pipeline on the given transcript.
@@ -127,6 +218,9 @@ class GeminiAnalysisPipeline:
             transcript_text: Formatted transcript text.
             transcript_chunks: List of transcript chunk dictionaries.
             participants: List of pre-parsed participant names.
+            on_excerpts: Called with a copy of the result once problem areas and
+                         excerpts are final, before synthesis starts, so the caller
+                         can store them while synthesis runs.
             
         Returns:
             Dictionary containing analysis results or error information.
@@ -140,15 +234,26 @@ class GeminiAnalysisPipeline:
             "suggested_title": None # Initialize suggested_title
         }
 
+        # Excerpt requests by problem_id, started while Step 1 is still streaming
+        excerpt_tasks: Dict[Any, asyncio.Future] = {}
+
         try:
-            # --- Step 1: Identify Problem Areas ---
+            # --- Step 1: Identify Problem Areas (streamed) ---
             logger.info("Step 1: Identifying Problem Areas...")
-            problem_prompt_formatted = PROBLEM_PROMPT.format_prompt(transcript=transcript_text).to_string()
+            problem_prompt_formatted = render_problem_prompt(transcript=transcript_text)
+            max_chunk_number = max(chunk.get('number', 0) for chunk in transcript_chunks) if transcript_chunks else 0
+
+            def start_excerpts(pa: Any) -> None:
+                # Each problem area's excerpt request starts as soon as the area is
+                # complete in the stream, while the rest is still being generated
+                if transcript_chunks and _is_problem_area(pa) and pa["problem_id"] not in excerpt_tasks:
+                    excerpt_tasks[pa["problem_id"]] = asyncio.ensure_future(
+                        self._extract_excerpts(pa, transcript_text, max_chunk_number)
+                    )
 
             problem_data = None
             try:
-                problem_response = await self.model.generate_content_async(problem_prompt_formatted)
-                problem_data = _extract_and_parse_json(problem_response.text)
+                problem_data = await self._stream_problem_areas(problem_prompt_formatted, start_excerpts)
             except Exception as e:
                 logger.error(f"Gemini API call failed during problem identification: {e}")
 
@@ -158,7 +263,7 @@ class GeminiAnalysisPipeline:
             else:
                 problem_areas = problem_data["problem_areas"]
                 logger.info(f"Identified {len(problem_areas)} potential problem areas.")
-                problem_areas = [pa for pa in problem_areas if isinstance(pa, dict) and "problem_id" in pa and "title" in pa and "description" in pa]
+                problem_areas = [pa for pa in problem_areas if _is_problem_area(pa)]
                 if not problem_areas:
                      logger.warning("No valid problem areas found after basic cleaning for Step 1.")
             
@@ -172,29 +277,15 @@ class GeminiAnalysisPipeline:
                     for pa in final_result["problem_areas"]:
                          pa["excerpts"] = []
                 else:
-                    max_chunk_number = max(chunk.get('number', 0) for chunk in transcript_chunks) if transcript_chunks else 0
-                    problem_areas_json_str = json.dumps({"problem_areas": problem_areas})
+                    # Areas the stream scanner missed (e.g. an unexpected layout) start now.
+                    # One small request per problem area, run concurrently over the shared
+                    # gRPC channel: latency follows the slowest area instead of one long generation
+                    for pa in problem_areas:
+                        start_excerpts(pa)
+                    excerpt_results = await asyncio.gather(*(excerpt_tasks[pa["problem_id"]] for pa in problem_areas))
 
-                    excerpt_prompt_formatted = EXCERPT_PROMPT.format_prompt(
-                        problem_areas=problem_areas_json_str,
-                        transcript=transcript_text,
-                        max_chunk_number=max_chunk_number
-                    ).to_string()
-
-                    excerpt_data = None
-                    try:
-                        excerpt_response = await self.model.generate_content_async(excerpt_prompt_formatted)
-                        excerpt_data = _extract_and_parse_json(excerpt_response.text)
-                    except Exception as e:
-                        logger.error(f"Gemini API call failed during excerpt extraction: {e}")
-
-                    if not excerpt_data or "problem_areas" not in excerpt_data or not isinstance(excerpt_data["problem_areas"], list):
-                        logger.warning("Failed to get valid excerpts from Step 2. Proceeding without excerpts.")
-                        for pa in final_result["problem_areas"]:
-                            pa["excerpts"] = []
-                    else:
-                        excerpts_map: Dict[str, List[Dict[str, Any]]] = {}
-                        raw_excerpt_problems = excerpt_data["problem_areas"]
+                    excerpts_map: Dict[str, List[Dict[str, Any]]] = {}
+                    for raw_excerpt_problems in excerpt_results:
                         for pa_excerpt_data in raw_excerpt_problems:
                             if isinstance(pa_excerpt_data, dict) and "problem_id" in pa_excerpt_data and isinstance(pa_excerpt_data.get("excerpts"), list):
                                 valid_excerpts = []
@@ -206,35 +297,42 @@ class GeminiAnalysisPipeline:
                                             ex["chunk_number"] = int(ex["chunk_number"])
                                             valid_excerpts.append(ex)
                                         except (ValueError, TypeError):
-                                            logger.warning(f"Invalid chunk_number format skipped: {ex.get('chunk_number')}")
+                                            logger.warning("Invalid chunk_number format skipped: %s", ex.get('chunk_number'))
                                     else:
-                                        logger.warning(f"Skipping invalid excerpt structure: {ex}")
+                                        logger.warning("Skipping invalid excerpt structure: %s", ex)
                                 if valid_excerpts:
                                     excerpts_map[pa_excerpt_data["problem_id"]] = valid_excerpts
 
-                        for pa in final_result["problem_areas"]:
-                            pa_id = pa.get("problem_id")
-                            if pa_id in excerpts_map:
-                                pa["excerpts"] = excerpts_map[pa_id]
-                            else:
-                                pa["excerpts"] = []
-                        logger.info("Successfully merged excerpts.")
+                    for pa in final_result["problem_areas"]:
+                        pa["excerpts"] = excerpts_map.get(pa.get("problem_id"), [])
+                    logger.info("Successfully merged excerpts.")
             else:
                  for pa in final_result["problem_areas"]:
                         pa["excerpts"] = []
 
-            # --- Step 3: Synthesize Findings & Title --- 
+            # --- Step 3: Calculate Metadata (independent of the synthesis) --- 
+            final_result["metadata"]["problem_areas_count"] = len(final_result["problem_areas"])
+            final_result["metadata"]["excerpts_count"] = sum(
+                len(pa.get("excerpts", [])) for pa in final_result["problem_areas"]
+            )
+            logger.info(f"Final metadata calculated: Problems={final_result['metadata']['problem_areas_count']}, Excerpts={final_result['metadata']['excerpts_count']}")
+
+            if on_excerpts is not None:
+                # Step 4 only sets top-level keys, so a shallow copy is stable
+                on_excerpts(dict(final_result))
+
+            # --- Step 4: Synthesize Findings & Title --- 
             logger.info("Step 3: Synthesizing Results and Suggesting Title...")
-            analysis_content_json_str = json.dumps({"problem_areas": final_result["problem_areas"]})
-            synthesis_prompt_formatted = SYNTHESIS_PROMPT.format_prompt(
+            analysis_content_json_str = dumps_json({"problem_areas": final_result["problem_areas"]}).decode()
+            synthesis_prompt_formatted = render_synthesis_prompt(
                 analyzed_content=analysis_content_json_str,
                 transcript=transcript_text
-            ).to_string()
+            )
 
             synthesis_data = None
             suggested_title = None
             try:
-                synthesis_response = await self.model.generate_content_async(synthesis_prompt_formatted)
+                synthesis_response = await self._generate(synthesis_prompt_formatted)
                 synthesis_data = _extract_and_parse_json(synthesis_response.text)
             except Exception as e:
                  logger.error(f"Gemini API call failed during synthesis/title step: {e}")
@@ -259,13 +357,6 @@ class GeminiAnalysisPipeline:
                 final_result["synthesis"] = "Synthesis generation failed." if not final_result["problem_areas"] else "Synthesis generation failed, but problem areas identified."
                 final_result["suggested_title"] = None
 
-            # --- Step 4: Calculate Metadata --- 
-            final_result["metadata"]["problem_areas_count"] = len(final_result["problem_areas"])
-            final_result["metadata"]["excerpts_count"] = sum(
-                len(pa.get("excerpts", [])) for pa in final_result["problem_areas"]
-            )
-            logger.info(f"Final metadata calculated: Problems={final_result['metadata']['problem_areas_count']}, Excerpts={final_result['metadata']['excerpts_count']}")
-
             logger.info("Multi-step analysis completed.")
             return final_result
                 
@@ -274,6 +365,90 @@ class GeminiAnalysisPipeline:
             logger.error(traceback.format_exc())
             final_result["synthesis"] = f"Analysis pipeline failed critically: {str(e)}"
             return final_result
+        finally:
+            # Excerpt requests for areas dropped by Step 1 (or left by a failure) aren't needed
+            for task in excerpt_tasks.values():
+                task.cancel()
+
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_exponential_jitter(initial=1, max=30),
+        stop=stop_after_attempt(4),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    )
+    async def _generate(self, prompt: str, **kwargs) -> Any:
+        """
+        Call Gemini, retrying transient failures with exponential backoff.
+
+        Only the failing step is retried, so a 429 during synthesis doesn't
+        cost the problem area and excerpt calls that already succeeded.
+
+        Args:
+            prompt: The rendered prompt.
+            **kwargs: Passed to generate_content_async (e.g. stream=True).
+
+        Returns:
+            The model response.
+        """
+        return await self.model.generate_content_async(prompt, **kwargs)
+
+    async def _stream_problem_areas(
+        self,
+        prompt: str,
+        on_problem_area: Callable[[Any], None]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Stream the problem area response, reporting each problem area as soon as it is complete.
+
+        Args:
+            prompt: The rendered problem identification prompt.
+            on_problem_area: Called with each complete problem area object.
+
+        Returns:
+            The parsed full response, or None if it could not be parsed.
+        """
+        response = await self._generate(prompt, stream=True)
+        scanner = _StreamedArrayItems()
+        async for chunk in response:
+            for item in scanner.feed(chunk.text):
+                on_problem_area(item)
+        return _extract_and_parse_json(scanner.text)
+
+    async def _extract_excerpts(
+        self,
+        problem_area: Dict[str, Any],
+        transcript_text: str,
+        max_chunk_number: int
+    ) -> List[Any]:
+        """
+        Extract supporting excerpts for a single problem area.
+
+        Args:
+            problem_area: The problem area to find excerpts for.
+            transcript_text: Formatted transcript text.
+            max_chunk_number: Highest chunk number in the transcript.
+
+        Returns:
+            The "problem_areas" list from the model response, or an empty list if the call or parsing failed.
+        """
+        excerpt_prompt_formatted = render_excerpt_prompt(
+            problem_areas=dumps_json({"problem_areas": [problem_area]}).decode(),
+            transcript=transcript_text,
+            max_chunk_number=max_chunk_number
+        )
+
+        try:
+            excerpt_response = await self._generate(excerpt_prompt_formatted)
+            excerpt_data = _extract_and_parse_json(excerpt_response.text)
+        except Exception as e:
+            logger.error(f"Gemini API call failed during excerpt extraction for problem area {problem_area.get('problem_id')}: {e}")
+            return []
+
+        if not excerpt_data or not isinstance(excerpt_data.get("problem_areas"), list):
+            logger.warning(f"Failed to get valid excerpts for problem area {problem_area.get('problem_id')}. Proceeding without them.")
+            return []
+        return excerpt_data["problem_areas"]
 
     # _create_prompt is removed as prompts are formatted per step
 
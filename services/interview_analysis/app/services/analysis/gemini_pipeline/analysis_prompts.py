@@ -1,6 +1,8 @@
 """
 Prompts for the multi-step Gemini API analysis pipeline using LangChain.
 """
+import re
+from typing import Callable
 
 from langchain.prompts import ChatPromptTemplate
 
@@ -123,5 +125,29 @@ SYNTHESIS_PROMPT = ChatPromptTemplate.from_messages([
     """)
 ])
 
+
+def compile_prompt(prompt: ChatPromptTemplate) -> Callable[..., str]:
+    """
+    Pre-render a prompt template so each call only joins in the variables.
+
+    The template is rendered once with a marker per variable and split on the
+    markers; calling the result gives the same string as
+    prompt.format_prompt(**values).to_string() without re-parsing the template.
+    """
+    rendered = prompt.format_prompt(**{name: f"\x00{name}\x00" for name in prompt.input_variables}).to_string()
+    # Even indexes are static text, odd indexes are variable names
+    parts = re.split(r"\x00(\w+)\x00", rendered)
+
+    def render(**values) -> str:
+        return "".join(part if i % 2 == 0 else str(values[part]) for i, part in enumerate(parts))
+
+    return render
+
+
+# Model-ready renderers for the pipeline's hot path
+render_problem_prompt = compile_prompt(PROBLEM_PROMPT)
+render_excerpt_prompt = compile_prompt(EXCERPT_PROMPT)
+render_synthesis_prompt = compile_prompt(SYNTHESIS_PROMPT)
+
 # Original single prompt (kept for reference, can be removed later)
 # SYSTEM_PROMPT = ... (old prompt content) ... 
\ No newline at end of file
@@ -1,27 +1,58 @@
 """
 Module for creating and managing the Gemini API pipeline for persona suggestion.
 """
+import functools
 import os
+import re
 import logging
-import google.generativeai as genai
 from typing import Dict, Any, List
 import json
-from pydantic import ValidationError
 
-from .persona_response_models import PersonaSuggestions
 from .persona_prompts import SYSTEM_PROMPT
-from ....config.api_config import APIConfig
+from ....config.api_config import APIConfig, configure_genai
 from ....utils.errors import AnalysisError # Reusing AnalysisError, or could create a SuggestionError
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Outermost {...} block in the model response (first '{' through last '}')
+_JSON_BLOCK = re.compile(r'\{.*\}', re.S)
+
+# Fields of PersonaSuggestions; both are lists of strings defaulting to []
+_SUGGESTION_FIELDS = ("existing_persona_ids", "suggested_new_personas")
+
+
+def _validate_suggestions(parsed_data: Any) -> Dict[str, List[str]]:
+    """
+    Check parsed model output against the PersonaSuggestions shape.
+
+    Mirrors PersonaSuggestions(**parsed_data).model_dump() without building
+    the model: missing fields default to empty lists and unknown keys are dropped.
+
+    Raises:
+        ValueError: If the payload is not an object or a field is not a list of strings.
+    """
+    if not isinstance(parsed_data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(parsed_data).__name__}")
+
+    suggestions: Dict[str, List[str]] = {}
+    for field in _SUGGESTION_FIELDS:
+        value = parsed_data.get(field, [])
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"'{field}' must be a list of strings")
+        suggestions[field] = value
+    return suggestions
+
+
+@functools.lru_cache(maxsize=1)
 def create_persona_pipeline():
     """
     Create and configure a persona suggestion pipeline with Google Gemini.
+
+    Created once per process and shared across requests.
     
     Returns:
-        An initialized GeminiPersonaPipeline instance.
+        The shared GeminiPersonaPipeline instance.
         
     Raises:
         ValueError: If API key is missing or configuration fails.
@@ -32,7 +63,8 @@ def create_persona_pipeline():
         raise ValueError("GEMINI_API_KEY environment variable not set")
     
     try:
-        genai.configure(api_key=api_key)
+        # Reuses the existing gRPC channel unless the key changed
+        configure_genai(api_key)
         model_name = APIConfig.GEMINI_MODEL # Use the same configured model
         logger.info(f"Creating Persona Suggestion Pipeline using model: {model_name}")
         return GeminiPersonaPipeline(model_name)
@@ -47,6 +79,8 @@ class GeminiPersonaPipeline:
     
     def __init__(self, model_name):
         """Initialize with a specific model."""
+        import google.generativeai as genai
+
         self.model = genai.GenerativeModel(model_name=model_name)
         self.system_prompt = SYSTEM_PROMPT
     
@@ -63,7 +97,7 @@ class GeminiPersonaPipeline:
             existing_personas: List of existing persona objects (e.g., {'id': '...', 'name': '...'}).
             
         Returns:
-            Dictionary containing suggestion results validated by PersonaSuggestions model.
+            Dictionary containing suggestion results matching the PersonaSuggestions shape.
             
         Raises:
             AnalysisError: If suggestion generation or parsing fails.
@@ -75,7 +109,7 @@ class GeminiPersonaPipeline:
             # Use circuit breaker from main? Or internal retry?
             # For now, direct call.
             logger.debug("Sending request to Gemini model")
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             logger.debug("Received response from Gemini model")
             
             result = self._parse_response(response.text)
@@ -98,7 +132,8 @@ class GeminiPersonaPipeline:
         # Format existing personas for the prompt
         try:
             existing_personas_json = json.dumps(existing_personas, indent=2)
-            logger.debug(f"Formatted existing personas for prompt: {existing_personas_json}") 
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Formatted existing personas for prompt: {existing_personas_json}")
         except Exception as e:
             logger.error(f"Failed to serialize existing personas to JSON: {str(e)}")
             existing_personas_json = "[] # Error serializing personas"
@@ -113,21 +148,20 @@ class GeminiPersonaPipeline:
     
     def _parse_response(self, response_text: str) -> Dict[str, Any]:
         """
-        Parse and validate the JSON response from the model using PersonaSuggestions.
+        Parse and validate the JSON response from the model against the PersonaSuggestions shape.
         Handles potential markdown code blocks and surrounding text.
         """
         try:
-            logger.debug(f"Raw Gemini response text (first 500 chars): {response_text[:500]}...")
-            json_str = response_text
-
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Raw Gemini response text (first 500 chars): {response_text[:500]}...")
             # Attempt to find JSON within potential markdown fences or other text
-            json_start = json_str.find('{')
-            json_end = json_str.rfind('}')
-
-            if json_start != -1 and json_end != -1 and json_end > json_start:
-                json_str = json_str[json_start:json_end+1]
-                logger.debug(f"Attempting to parse extracted JSON: {json_str}")
+            match = _JSON_BLOCK.search(response_text)
+            if match:
+                json_str = match.group(0)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Attempting to parse extracted JSON: {json_str}")
             else:
+                 json_str = response_text
                  logger.warning("Could not find valid JSON object delimiters {{...}} in response. Trying to parse raw text.")
                  # Fallback: Try parsing the whole string if no clear delimiters found
                  # (This might fail more often if there's extra text)
@@ -135,18 +169,19 @@ class GeminiPersonaPipeline:
             # Parse the JSON
             try:
                 parsed_data = json.loads(json_str)
-                logger.debug(f"Successfully parsed JSON: {parsed_data}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Successfully parsed JSON: {parsed_data}")
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse JSON response: {str(e)}. Response text: {json_str}")
                 raise ValueError(f"Invalid JSON in response: {str(e)}")
             
-            # Validate with Pydantic model
+            # Validate against the PersonaSuggestions shape
             try:
-                suggestions = PersonaSuggestions(**parsed_data)
-                logger.info("Successfully validated response against PersonaSuggestions model.")
-                return suggestions.model_dump() # Return as dict
-            except ValidationError as e:
-                logger.error(f"Pydantic validation failed: {str(e)}. Parsed data: {parsed_data}")
+                suggestions = _validate_suggestions(parsed_data)
+                logger.info("Successfully validated response against PersonaSuggestions shape.")
+                return suggestions
+            except ValueError as e:
+                logger.error(f"Suggestion validation failed: {str(e)}. Parsed data: {parsed_data}")
                 # Unlike analysis, suggestions are simpler. If validation fails, 
                 # maybe return empty suggestions rather than complex fixing?
                 # For now, re-raise the error to signal a problem.
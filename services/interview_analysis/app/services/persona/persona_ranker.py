@@ -0,0 +1,109 @@
+"""
+Embedding-based pre-filter that narrows a user's personas to the ones most
+relevant to a transcript before they are sent to Gemini.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Async function embedding a batch of texts, one vector per input text
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+# The embedding model only reads the first ~2k tokens; don't ship more than that
+_MAX_QUERY_CHARS = 8000
+
+# Persona embeddings keyed by persona text. Personas are short and rarely
+# renamed, so each one is embedded once per process; float16 halves the memory.
+# Bounded like the other module caches; the oldest entry is evicted when full.
+_PERSONA_EMBEDDING_CACHE_MAXSIZE = 4096
+_persona_embeddings: Dict[str, np.ndarray] = {}
+
+
+def _cache_embedding(text: str, vector: List[float]) -> np.ndarray:
+    """Cache a persona embedding as float16, evicting the oldest entry when full."""
+    if text not in _persona_embeddings and len(_persona_embeddings) >= _PERSONA_EMBEDDING_CACHE_MAXSIZE:
+        _persona_embeddings.pop(next(iter(_persona_embeddings)))
+    embedding = np.asarray(vector, dtype=np.float16)
+    _persona_embeddings[text] = embedding
+    return embedding
+
+
+def _persona_text(persona: Dict[str, Any]) -> str:
+    """Text used to embed a persona: its name, plus its description when present."""
+    name = persona.get("name", "")
+    description = persona.get("description")
+    return f"{name}: {description}" if description else name
+
+
+def create_gemini_embedder() -> EmbedFn:
+    """
+    Create an embedding function backed by the Gemini embedding API.
+
+    Assumes genai has already been configured with an API key (see create_persona_pipeline).
+
+    Returns:
+        An async function mapping a list of texts to their embeddings.
+    """
+    import google.generativeai as genai
+
+    async def embed(texts: List[str]) -> List[List[float]]:
+        response = await genai.embed_content_async(model=EMBEDDING_MODEL, content=texts)
+        return response["embedding"]
+
+    return embed
+
+
+class PersonaRanker:
+    """Ranks personas by cosine similarity between their embeddings and the transcript's."""
+
+    def __init__(self, embed_fn: EmbedFn, top_k: int = 10):
+        """
+        Initialize the ranker.
+
+        Args:
+            embed_fn: Async function returning one embedding per input text.
+            top_k: Number of personas to keep.
+        """
+        self.embed_fn = embed_fn
+        self.top_k = top_k
+
+    async def top_personas(self, transcript: str, personas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Keep the top_k personas most similar to the transcript.
+
+        Lists that already fit within top_k are returned unchanged without any
+        embedding call. Kept personas stay in their original order.
+
+        Args:
+            transcript: The formatted interview transcript.
+            personas: The user's existing personas.
+
+        Returns:
+            The selected personas.
+        """
+        if len(personas) <= self.top_k:
+            return personas
+
+        texts = [_persona_text(persona) for persona in personas]
+        # Held locally so evictions while caching can't drop a vector needed below
+        embeddings = {text: _persona_embeddings.get(text) for text in texts}
+        missing = [text for text, embedding in embeddings.items() if embedding is None]
+
+        # One round-trip: the transcript plus any personas not embedded yet
+        vectors = await self.embed_fn([transcript[:_MAX_QUERY_CHARS]] + missing)
+        query = np.asarray(vectors[0], dtype=np.float32)
+        for text, vector in zip(missing, vectors[1:]):
+            embeddings[text] = _cache_embedding(text, vector)
+
+        matrix = np.stack([embeddings[text] for text in texts]).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = matrix @ query / np.maximum(norms, 1e-12)
+
+        top = np.argpartition(-scores, self.top_k - 1)[:self.top_k]
+        selected = [personas[i] for i in sorted(top)]
+        logger.info(f"Narrowed {len(personas)} personas to the top {len(selected)} by embedding similarity")
+        return selected
@@ -10,6 +10,15 @@ from ...utils.errors import AnalysisError # Reusing AnalysisError or create Sugg
 
 logger = logging.getLogger(__name__)
 
+# "all" matches existing personas and proposes new ones; "existing_only" only matches
+SUGGESTION_MODES = ("all", "existing_only")
+# Transcripts shorter than this carry too little signal for Gemini to tag usefully
+MIN_TRANSCRIPT_LENGTH = 500
+
+
+def _empty_suggestions() -> Dict[str, List[str]]:
+    return {"existing_persona_ids": [], "suggested_new_personas": []}
+
 class PersonaSuggester:
     def __init__(self, pipeline: GeminiPersonaPipeline):
         """Initialize with the Gemini pipeline for persona suggestions."""
@@ -19,27 +28,45 @@ class PersonaSuggester:
     async def suggest_personas(
         self, 
         transcript: str, 
-        existing_personas: List[Dict[str, Any]]
+        existing_personas: List[Dict[str, Any]],
+        mode: str = "all"
     ) -> Dict[str, Any]:
         """
         Analyzes transcript and suggests personas using the Gemini pipeline.
 
+        Gemini is skipped when the transcript is too short to be useful, or when
+        only matches are wanted and the user has no existing personas.
+
         Args:
             transcript: The interview transcript text.
             existing_personas: A list of existing persona dictionaries.
+            mode: "all" to also suggest new personas, "existing_only" to only match existing ones.
 
         Returns:
             A dictionary containing suggested existing persona IDs and new persona details.
             
         Raises:
+            ValueError: If mode is not one of SUGGESTION_MODES.
             AnalysisError: If the underlying Gemini pipeline fails.
         """
+        if mode not in SUGGESTION_MODES:
+            raise ValueError(f"Unsupported suggestion mode: {mode}")
+
+        if len(transcript) < MIN_TRANSCRIPT_LENGTH:
+            logger.info(f"Skipping persona suggestion: transcript length {len(transcript)} is below {MIN_TRANSCRIPT_LENGTH}")
+            return _empty_suggestions()
+        if mode == "existing_only" and not existing_personas:
+            logger.info("Skipping persona suggestion: no existing personas to match in existing_only mode")
+            return _empty_suggestions()
+
         logger.info(f"Suggesting personas using Gemini for transcript (length: {len(transcript)}) and {len(existing_personas)} existing personas.")
         
         try:
             # Call the pipeline's run_suggestion method
             suggestions = await self.pipeline.run_suggestion(transcript, existing_personas)
             logger.info(f"Gemini generated suggestions: {suggestions}")
+            if mode == "existing_only":
+                suggestions["suggested_new_personas"] = []
             return suggestions
         except Exception as e:
             logger.error(f"Error during Gemini suggestion call: {str(e)}", exc_info=True)
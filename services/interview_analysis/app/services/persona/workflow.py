@@ -1,32 +1,100 @@
 """
 Workflow for handling persona suggestion logic.
 """
+import asyncio
+import copy
+import hashlib
+import json
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..storage.repository import InterviewRepository
 from .persona_suggester import PersonaSuggester
+from .persona_ranker import PersonaRanker
+from ...config.settings import settings
 from ...utils.errors import NotFoundError, WorkflowError
 from ...utils.transcript_utils import format_chunks_for_analysis # Import the utility
 
 logger = logging.getLogger(__name__)
 
+# Suggestions keyed by interview + persona list. Transcripts do not change once
+# analyzed, so identical inputs can skip the Gemini call entirely. Module level
+# because a workflow instance is created per request.
+_SUGGESTION_CACHE_MAXSIZE = 512
+_suggestion_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def _suggestion_cache_key(interview_id: str, existing_personas: List[Dict[str, Any]], mode: str = "all") -> str:
+    """Build a stable cache key from the interview ID, the user's persona list and the suggestion mode."""
+    personas_digest = hashlib.blake2b(
+        json.dumps(existing_personas, sort_keys=True, default=str).encode()
+    ).digest()
+    return hashlib.blake2b(
+        interview_id.encode() + b"|" + mode.encode() + b"|" + personas_digest, digest_size=16
+    ).hexdigest()
+
+
+def _get_cached_suggestions(key: str) -> Optional[Dict[str, Any]]:
+    """Return a copy of cached suggestions, or None if absent or expired."""
+    entry = _suggestion_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, suggestions = entry
+    if time.monotonic() >= expires_at:
+        _suggestion_cache.pop(key, None)
+        return None
+    return copy.deepcopy(suggestions)
+
+
+def _cache_suggestions(key: str, suggestions: Dict[str, Any]) -> None:
+    """Cache suggestions for PERSONA_SUGGESTION_CACHE_TTL seconds, evicting the oldest entry when full."""
+    ttl = settings.PERSONA_SUGGESTION_CACHE_TTL
+    if ttl <= 0:
+        return
+    if key not in _suggestion_cache and len(_suggestion_cache) >= _SUGGESTION_CACHE_MAXSIZE:
+        _suggestion_cache.pop(next(iter(_suggestion_cache)))
+    _suggestion_cache[key] = (time.monotonic() + ttl, copy.deepcopy(suggestions))
+
+
+# Suggestion runs currently in progress, keyed by interview/user/mode, so
+# concurrent identical requests (retries, several tabs) share one run.
+_inflight_suggestions: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+def _finish_inflight(key: str, task: "asyncio.Future[Dict[str, Any]]") -> None:
+    """Drop a finished suggestion run from the in-flight map."""
+    if _inflight_suggestions.get(key) is task:
+        del _inflight_suggestions[key]
+    if not task.cancelled():
+        task.exception()
+
 class PersonaWorkflow:
     """Orchestrates the persona suggestion process."""
 
-    def __init__(self, repository: InterviewRepository, suggester: PersonaSuggester):
-        """Initialize the workflow with dependencies."""
+    def __init__(
+        self,
+        repository: InterviewRepository,
+        suggester: PersonaSuggester,
+        ranker: Optional[PersonaRanker] = None
+    ):
+        """Initialize the workflow with dependencies; the ranker is optional."""
         self.repository = repository
         self.suggester = suggester
+        self.ranker = ranker
         logger.info("PersonaWorkflow initialized")
 
-    async def suggest_personas_for_interview(self, interview_id: str, user_id: str) -> Dict[str, Any]:
+    async def suggest_personas_for_interview(self, interview_id: str, user_id: str, mode: str = "all") -> Dict[str, Any]:
         """
         Fetch interview data, existing personas, and generate suggestions.
 
+        Concurrent calls with the same arguments wait on the run already in
+        progress instead of starting another one.
+
         Args:
             interview_id: The ID of the interview.
             user_id: The ID of the user making the request.
+            mode: "all" to also suggest new personas, "existing_only" to only match existing ones.
 
         Returns:
             A dictionary containing persona suggestions.
@@ -35,38 +103,64 @@ class PersonaWorkflow:
             NotFoundError: If the interview is not found.
             WorkflowError: If any step in the workflow fails.
         """
+        key = f"{interview_id}:{user_id}:{mode}"
+        inflight = _inflight_suggestions.get(key)
+        if inflight is not None:
+            logger.info(f"Joining in-flight persona suggestion for interview {interview_id} and user {user_id}")
+            # Shielded so a disconnecting caller doesn't cancel the run for the others
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        task = asyncio.ensure_future(self._suggest_personas(interview_id, user_id, mode))
+        _inflight_suggestions[key] = task
+        # Cleared when the run finishes rather than when this caller returns, so a
+        # cancelled caller leaves the run joinable; the callback also retrieves
+        # the exception of a run nobody is awaiting anymore.
+        task.add_done_callback(lambda done: _finish_inflight(key, done))
+        return await asyncio.shield(task)
+
+    async def _suggest_personas(self, interview_id: str, user_id: str, mode: str) -> Dict[str, Any]:
+        """Run the suggestion workflow; see suggest_personas_for_interview."""
         logger.info(f"Starting persona suggestion workflow for interview {interview_id} and user {user_id}")
         try:
-            # 1. Fetch interview data
-            logger.debug(f"Fetching interview {interview_id}")
-            interview = await self.repository.get_interview_by_id(interview_id)
-            
-            # Extract the list of transcript chunks
-            transcript_chunks = interview.get("analysis_data", {}).get("transcript", []) 
-            if not transcript_chunks or not isinstance(transcript_chunks, list):
-                logger.warning(f"Transcript chunk list not found or invalid for interview {interview_id}. Analysis Data Keys: {list(interview.get('analysis_data', {}).keys())}")
-                # If no transcript chunks, we cannot generate suggestions.
-                raise WorkflowError(f"Transcript chunk data is missing or invalid for interview {interview_id}")
-
-            # Format chunks into a single string using the utility
-            logger.debug(f"Formatting {len(transcript_chunks)} transcript chunks for analysis.")
-            formatted_transcript = format_chunks_for_analysis(transcript_chunks)
-            
+            # 1. Fetch the stored formatted transcript and the user's existing personas
+            # concurrently; the two lookups are independent round-trips to the database service.
+            logger.debug("Fetching formatted transcript %s and personas for user %s", interview_id, user_id)
+            formatted_transcript, existing_personas = await asyncio.gather(
+                self.repository.get_formatted_transcript(interview_id),
+                self.repository.get_personas_for_user(user_id),
+                return_exceptions=True
+            )
+            # Surface the interview failure first so a missing interview stays a NotFoundError
+            if isinstance(formatted_transcript, BaseException):
+                raise formatted_transcript
+            if isinstance(existing_personas, BaseException):
+                raise existing_personas
+            logger.debug("Fetched %d existing personas", len(existing_personas))
+
+            cache_key = _suggestion_cache_key(interview_id, existing_personas, mode)
+            cached = _get_cached_suggestions(cache_key)
+            if cached is not None:
+                logger.info(f"Returning cached persona suggestions for interview {interview_id}")
+                return cached
+
+            if formatted_transcript is None:
+                # Interviews analyzed before the formatted transcript was stored
+                formatted_transcript = await self._format_legacy_transcript(interview_id)
+
             if not formatted_transcript:
                 # Handle case where formatting results in an empty string (e.g., all chunks were empty)
                  logger.warning(f"Formatted transcript is empty for interview {interview_id}. Cannot generate suggestions.")
                  raise WorkflowError(f"Formatted transcript is empty for interview {interview_id}")
 
-            logger.debug(f"Formatted transcript length: {len(formatted_transcript)}")
+            logger.debug("Formatted transcript length: %d", len(formatted_transcript))
 
-            # 2. Fetch existing personas for the user
-            logger.debug(f"Fetching personas for user {user_id}")
-            existing_personas = await self.repository.get_personas_for_user(user_id)
-            logger.debug(f"Fetched {len(existing_personas)} existing personas")
+            # 2. Narrow large persona lists to the most relevant candidates
+            candidate_personas = await self._rank_personas(formatted_transcript, existing_personas)
 
             # 3. Call the suggestion service with the formatted transcript
             logger.debug("Calling persona suggester service")
-            suggestions = await self.suggester.suggest_personas(formatted_transcript, existing_personas)
+            suggestions = await self.suggester.suggest_personas(formatted_transcript, candidate_personas, mode=mode)
+            _cache_suggestions(cache_key, suggestions)
             logger.info(f"Successfully generated suggestions for interview {interview_id}")
             
             return suggestions
@@ -78,4 +172,52 @@ class PersonaWorkflow:
         except Exception as e:
             logger.error(f"Error during persona suggestion workflow for interview {interview_id}: {str(e)}", exc_info=True)
             # Wrap other exceptions in a generic WorkflowError
-            raise WorkflowError(f"Failed to suggest personas: {str(e)}") 
\ No newline at end of file
+            raise WorkflowError(f"Failed to suggest personas: {str(e)}") 
+
+    async def _rank_personas(self, formatted_transcript: str, existing_personas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Pre-filter personas with the ranker, falling back to the full list if it is unavailable or fails.
+
+        Args:
+            formatted_transcript: The formatted interview transcript.
+            existing_personas: The user's existing personas.
+
+        Returns:
+            The personas to send to the suggester.
+        """
+        if self.ranker is None:
+            return existing_personas
+        try:
+            return await self.ranker.top_personas(formatted_transcript, existing_personas)
+        except Exception as e:
+            logger.warning(f"Persona ranking failed, sending all {len(existing_personas)} personas: {str(e)}")
+            return existing_personas
+
+    async def _format_legacy_transcript(self, interview_id: str) -> str:
+        """
+        Rebuild the formatted transcript from the stored chunks of an interview.
+
+        Args:
+            interview_id: The ID of the interview.
+
+        Returns:
+            The formatted transcript string.
+
+        Raises:
+            NotFoundError: If the interview is not found.
+            WorkflowError: If the interview has no usable transcript chunks.
+        """
+        logger.debug("No stored formatted transcript for interview %s; formatting from chunks", interview_id)
+        # Only the transcript chunks are needed, so skip problem areas, synthesis and relations
+        interview = await self.repository.get_interview_by_id(interview_id, fields=["analysis_data.transcript"])
+
+        # Extract the list of transcript chunks
+        transcript_chunks = interview.get("analysis_data", {}).get("transcript", [])
+        if not transcript_chunks or not isinstance(transcript_chunks, list):
+            logger.warning(f"Transcript chunk list not found or invalid for interview {interview_id}. Analysis Data Keys: {list(interview.get('analysis_data', {}).keys())}")
+            # If no transcript chunks, we cannot generate suggestions.
+            raise WorkflowError(f"Transcript chunk data is missing or invalid for interview {interview_id}")
+
+        # Format chunks into a single string using the utility
+        logger.debug("Formatting %d transcript chunks for analysis.", len(transcript_chunks))
+        return format_chunks_for_analysis(transcript_chunks)
@@ -1,25 +1,265 @@
 """
 Data access layer for interview storage.
 """
+import asyncio
+import copy
+import functools
 import logging
 import os
+import time
 import httpx
-from typing import Dict, Any, Optional, List
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Tuple, Set, Callable, Awaitable, AsyncIterator
+from ...config.settings import settings
 from ...utils.errors import StorageError, NotFoundError
 from ...utils.cloud_auth import call_authenticated_service
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Per-user persona lists, cached briefly because they change rarely and a user
+# often requests suggestions for several interviews in a row. Kept at module
+# level since a repository instance is created per request. Personas are
+# written through the database service, so nothing here invalidates entries:
+# a new or deleted persona can be missed for up to PERSONA_CACHE_TTL_SECONDS.
+# Least recently used entries are evicted first.
+_PERSONA_CACHE_MAXSIZE = 1024
+_persona_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+_persona_cache_stats = {"hits": 0, "lookups": 0}
+# Per-user fetch locks and the number of tasks holding or waiting on each
+_persona_locks: Dict[str, asyncio.Lock] = {}
+_persona_lock_users: Dict[str, int] = {}
+
+
+def _get_cached_personas(user_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Return a copy of the cached personas for a user, or None if absent or expired."""
+    entry = _persona_cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, personas = entry
+    if time.monotonic() >= expires_at:
+        _persona_cache.pop(user_id, None)
+        return None
+    # Move to the end so eviction takes the least recently used entry
+    _persona_cache[user_id] = _persona_cache.pop(user_id)
+    return copy.deepcopy(personas)
+
+
+@asynccontextmanager
+async def _persona_lock(user_id: str) -> AsyncIterator[None]:
+    """Hold the per-user persona fetch lock, dropping it once no task holds or waits on it."""
+    lock = _persona_locks.setdefault(user_id, asyncio.Lock())
+    _persona_lock_users[user_id] = _persona_lock_users.get(user_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _persona_lock_users[user_id] -= 1
+        if not _persona_lock_users[user_id]:
+            del _persona_lock_users[user_id]
+            del _persona_locks[user_id]
+
+
+def _cache_personas(user_id: str, personas: List[Dict[str, Any]]) -> None:
+    """Cache a user's personas for PERSONA_CACHE_TTL_SECONDS, evicting the oldest entry when full."""
+    ttl = settings.PERSONA_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    if user_id not in _persona_cache and len(_persona_cache) >= _PERSONA_CACHE_MAXSIZE:
+        _persona_cache.pop(next(iter(_persona_cache)))
+    _persona_cache[user_id] = (time.monotonic() + ttl, copy.deepcopy(personas))
+
+
+class _PersonaBatchLoader:
+    """
+    Coalesces persona lookups issued in the same event-loop tick into one request.
+
+    Each load() queues a user ID and returns a future; the queue is flushed on
+    the next loop iteration by calling batch_load_fn with up to max_batch_size
+    user IDs at a time.
+    """
+
+    def __init__(
+        self,
+        batch_load_fn: Callable[[List[str]], Awaitable[Dict[str, List[Dict[str, Any]]]]],
+        max_batch_size: int = 50
+    ):
+        self.batch_load_fn = batch_load_fn
+        self.max_batch_size = max_batch_size
+        self._queue: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, user_id: str) -> "asyncio.Future[List[Dict[str, Any]]]":
+        """Queue a lookup for user_id and return a future for that user's personas."""
+        future = self._queue.get(user_id)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        if not self._queue:
+            loop.call_soon(self._dispatch)
+        future = self._queue[user_id] = loop.create_future()
+        return future
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, {}
+        user_ids = list(queue)
+        for start in range(0, len(user_ids), self.max_batch_size):
+            batch = {user_id: queue[user_id] for user_id in user_ids[start:start + self.max_batch_size]}
+            task = asyncio.ensure_future(self._load_batch(batch))
+            # Hold a reference so the task isn't garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: Dict[str, asyncio.Future]) -> None:
+        try:
+            results = await self.batch_load_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for user_id, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(user_id, []))
+
+
+def _unwrap(result: Any, action: str, *, not_found_message: Optional[str] = None) -> Any:
+    """
+    Return the data of a database service response, raising for error responses.
+    
+    Args:
+        result: The response returned by call_authenticated_service
+        action: What was being done, for log and error messages (e.g. "fetching interview 123")
+        not_found_message: If set, a 404 raises NotFoundError with this message instead of StorageError
+        
+    Returns:
+        The response's "data" field
+        
+    Raises:
+        NotFoundError: If the service returned 404 and not_found_message is set
+        StorageError: For any other error or an unexpected response structure
+    """
+    status = result.get("status") if isinstance(result, dict) else None
+    if status == "success":
+        return result.get("data")
+    if status == "error":
+        error_msg = result.get("message", "Unknown error from service call")
+        status_code = result.get("status_code", 500)
+        logger.error(f"Error from service call {action}: {error_msg} (Status: {status_code})")
+        if status_code == 404 and not_found_message:
+            raise NotFoundError(not_found_message)
+        raise StorageError(f"Service call error: {error_msg}")
+    logger.error(f"Unexpected response structure {action}: {result}")
+    raise StorageError(f"Unexpected response structure from database service {action}.")
+
+
+# Metadata fields copied onto the stored interview when present
+_STORED_METADATA_FIELDS = ("project_id", "userId")
+
+# One loader per database service URL, shared by the per-request repositories.
+# Batches mix lookups from several repositories, so they go out on the shared client.
+_persona_loaders: Dict[str, _PersonaBatchLoader] = {}
+
+# Last single-user persona response per user as (ETag, personas by user). Sent
+# back as If-None-Match once the TTL cache expires, so an unchanged persona list
+# costs an empty 304 instead of a full refetch. An ETag covers a whole response,
+# so batches of several users are neither revalidated nor remembered.
+_PERSONA_ETAG_CACHE_MAXSIZE = 1024
+_persona_etags: Dict[str, Tuple[str, Dict[str, List[Dict[str, Any]]]]] = {}
+
+
+def _cache_persona_etag(user_id: str, etag: str, personas_by_user: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Remember a user's persona response by its ETag, evicting the oldest entry when full."""
+    if user_id not in _persona_etags and len(_persona_etags) >= _PERSONA_ETAG_CACHE_MAXSIZE:
+        _persona_etags.pop(next(iter(_persona_etags)))
+    _persona_etags[user_id] = (etag, copy.deepcopy(personas_by_user))
+
+
+async def _fetch_personas_for_users(api_url: str, user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch the personas of several users from the database service in one call, bypassing the cache.
+
+    Database services that predate the batch endpoint answer ?userIds= with a
+    400, in which case each user is fetched with ?userId= instead.
+
+    Args:
+        api_url: Base URL of the database service.
+        user_ids: The IDs of the users whose personas to fetch.
+
+    Returns:
+        A dictionary mapping each user ID to its list of persona data dictionaries.
+
+    Raises:
+        StorageError: If there's an error during fetching.
+    """
+    endpoint_url = f"{api_url}/personas"
+    query = ",".join(user_ids)
+    logger.info(f"Fetching personas for {len(user_ids)} users from: {endpoint_url}")
+
+    try:
+        single_user = user_ids[0] if len(user_ids) == 1 else None
+        known = _persona_etags.get(single_user) if single_user else None
+        result = await call_authenticated_service(
+            service_url=endpoint_url,
+            method="GET",
+            params={"userIds": query},
+            headers={"If-None-Match": known[0]} if known else None,
+            include_etag=single_user is not None
+        )
+        if known and isinstance(result, dict) and result.get("status") == "not_modified":
+            logger.info(f"Personas for users {user_ids} unchanged; reusing the previous response")
+            return copy.deepcopy(known[1])
+        if isinstance(result, dict) and result.get("status") == "error" and result.get("status_code") == 400:
+            logger.warning("Database service rejected batched persona lookup; fetching %d users one by one", len(user_ids))
+            personas_lists = await asyncio.gather(*(_fetch_personas_for_user(endpoint_url, uid) for uid in user_ids))
+            return dict(zip(user_ids, personas_lists))
+
+        personas_by_user = _unwrap(result, f"fetching personas for users {user_ids}")
+        if not isinstance(personas_by_user, dict):
+            logger.error(f"Expected a mapping of user ID to personas but got {type(personas_by_user)}. Full response: {result}")
+            raise StorageError(f"Unexpected data type for personas: {type(personas_by_user)}")
+
+        for user_id, personas_data in personas_by_user.items():
+            if not isinstance(personas_data, list):
+                logger.error(f"Expected list but got {type(personas_data)} when fetching personas for user {user_id}. Data: {personas_data}")
+                raise StorageError(f"Unexpected data type for personas: {type(personas_data)}")
+
+        if single_user and result.get("etag"):
+            _cache_persona_etag(single_user, result["etag"], personas_by_user)
+        logger.info(f"Successfully fetched personas for {len(personas_by_user)} users")
+        return personas_by_user
+
+    except StorageError as e:
+        raise StorageError(f"Storage layer error fetching personas for users {user_ids}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error fetching personas for users {user_ids}: {str(e)}", exc_info=True)
+        raise StorageError(f"Unexpected error fetching personas for users {user_ids}: {str(e)}")
+
+
+async def _fetch_personas_for_user(endpoint_url: str, user_id: str) -> List[Dict[str, Any]]:
+    """Fetch one user's personas with the single-user ?userId= query."""
+    result = await call_authenticated_service(service_url=endpoint_url, method="GET", params={"userId": user_id})
+    personas_data = _unwrap(result, f"fetching personas for user {user_id}")
+    if not isinstance(personas_data, list):
+        logger.error(f"Expected list but got {type(personas_data)} when fetching personas for user {user_id}. Data: {personas_data}")
+        raise StorageError(f"Unexpected data type for personas: {type(personas_data)}")
+    return personas_data
+
 
 class InterviewRepository:
     """
     Repository for storing interview analysis data via the database service.
     """
     
-    def __init__(self):
-        """Initialize the repository with database service URL."""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the repository with database service URL.
+        
+        Args:
+            client: Pooled HTTP client for database service calls; defaults to the shared client
+        """
         self.api_url = os.environ.get("DATABASE_API_URL", "http://localhost:5001")
+        self.client = client
         logger.info(f"Initialized InterviewRepository with database API at: {self.api_url}")
     
     async def store_interview(
@@ -42,117 +282,171 @@ class InterviewRepository:
             StorageError: If there's an error storing the interview data
         """
         try:
-            # Prepare BASE interview data (excluding problem areas for nested creation)
+            # Prepare BASE interview data (excluding problem areas for nested creation),
+            # merging in the optional metadata fields that are set.
+            # interviewer and interview_date aren't on the base Interview model, so they're not sent.
             base_interview_data = {
                 "title": self._extract_title(analysis_result, metadata),
                 "problem_count": len(analysis_result.get("problem_areas", [])),
                 "transcript_length": analysis_result.get("metadata", {}).get("transcript_length", 0),
                 "analysis_data": analysis_result, # Keep sending the blob for backup
+                **{key: metadata[key] for key in _STORED_METADATA_FIELDS if metadata and metadata.get(key)},
             }
+
+            # Prepare NESTED problem area data (if any). The analysis pipeline has
+            # already dropped malformed problem areas and excerpts, so this is a
+            # single pass that copies the stored fields without re-validating.
+            problem_areas_payload: List[Dict[str, Any]] = [
+                {
+                    "title": pa["title"],
+                    "description": pa["description"],
+                    "excerpts": [
+                        {
+                            "quote": ex["quote"],
+                            "categories": ex["categories"],
+                            "insight": ex["insight"],
+                            "chunk_number": ex["chunk_number"],
+                        }
+                        for ex in pa.get("excerpts", [])
+                    ],
+                }
+                for pa in analysis_result.get("problem_areas", [])
+            ]
+            if problem_areas_payload: # Only add if there are problem areas
+                base_interview_data["problemAreasData"] = problem_areas_payload
+
+            # One request: the database service creates the interview and its
+            # problem areas in a single transaction, so a failure leaves nothing behind
+            return await self.create_interview(base_interview_data)
+                
+        except StorageError:
+            raise # Already logged where it was raised
+        except Exception as e:
+            logger.error(f"Error storing interview: {str(e)}", exc_info=True)
+            raise StorageError(f"Failed to store interview: {str(e)}")
+
+    async def create_interview(self, interview_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create the interview record, with any problemAreasData, in one request.
+        
+        Args:
+            interview_data: The interview fields, including the analysis_data blob
             
-            # Add optional metadata if provided
-            if metadata:
-                if "project_id" in metadata and metadata["project_id"]:
-                    base_interview_data["project_id"] = metadata["project_id"]
-                # Removed interviewer and interview_date as they aren't on the base Interview model
-                # if "interviewer" in metadata and metadata["interviewer"]:
-                #     base_interview_data["interviewer"] = metadata["interviewer"]
-                # if "interview_date" in metadata and metadata["interview_date"]:
-                #     base_interview_data["interview_date"] = metadata["interview_date"]
-                if "userId" in metadata and metadata["userId"]:
-                    base_interview_data["userId"] = metadata["userId"]
-
-            # Prepare NESTED problem area data (if any)
-            problem_areas_payload: List[Dict[str, Any]] = []
-            raw_problem_areas = analysis_result.get("problem_areas", [])
-            if isinstance(raw_problem_areas, list):
-                for pa in raw_problem_areas:
-                    if isinstance(pa, dict) and pa.get("problem_id") and pa.get("title") and pa.get("description"):
-                        excerpts_payload: List[Dict[str, Any]] = []
-                        raw_excerpts = pa.get("excerpts", [])
-                        if isinstance(raw_excerpts, list):
-                            for ex in raw_excerpts:
-                                # Basic validation of excerpt structure
-                                if isinstance(ex, dict) and ex.get("quote") and ex.get("categories") and ex.get("insight") and ex.get("chunk_number") is not None:
-                                    excerpts_payload.append({
-                                        "quote": ex["quote"],
-                                        "categories": ex["categories"],
-                                        "insight": ex["insight"],
-                                        "chunk_number": ex["chunk_number"],
-                                    })
-                                else:
-                                    logger.warning(f"Skipping invalid excerpt structure: {ex}")
-                        
-                        problem_areas_payload.append({
-                            "title": pa["title"],
-                            "description": pa["description"],
-                            "excerpts": excerpts_payload
-                        })
-                    else:
-                         logger.warning(f"Skipping invalid problem area structure: {pa}")
-            else:
-                 logger.warning(f"Problem areas field is not a list: {raw_problem_areas}")
-
-            # Combine base data and nested data for the final payload
-            final_payload = base_interview_data.copy()
-            if problem_areas_payload: # Only add if there are valid problem areas
-                final_payload["problemAreasData"] = problem_areas_payload
+        Returns:
+            The stored interview info (usually just the ID)
             
-            logger.info(f"Storing interview with title: {final_payload.get('title')}")
-            logger.debug(f"Final payload keys: {list(final_payload.keys())}")
+        Raises:
+            StorageError: If the interview could not be created
+        """
+        logger.info(f"Storing interview with title: {interview_data.get('title')}")
+        logger.debug("Payload keys: %s", list(interview_data.keys()))
+        
+        # Use authenticated service call (works in both production and development)
+        endpoint_url = f"{self.api_url}/interviews"
+        logger.info(f"Calling database service POST {endpoint_url}")
+        
+        result = await call_authenticated_service(
+            service_url=endpoint_url, 
+            method="POST", 
+            json_data=interview_data,
+            content_encoding=settings.DB_SERVICE_COMPRESSION or None,
+            client=self.client
+        )
+        
+        # Get the stored interview data (likely just the ID now)
+        stored_interview_info = _unwrap(result, "storing interview")
+        
+        if not stored_interview_info or not stored_interview_info.get('id'):
+            logger.error("No data or ID returned after interview insertion")
+            logger.error(f"Full response: {result}")
+            raise StorageError("No ID returned after interview insertion")
             
-            # Use authenticated service call (works in both production and development)
-            try:
-                endpoint_url = f"{self.api_url}/interviews"
-                logger.info(f"Calling database service POST {endpoint_url}")
-                
-                # Make the API call with the combined payload
-                result = await call_authenticated_service(
-                    service_url=endpoint_url, 
-                    method="POST", 
-                    json_data=final_payload
-                )
-                
-                # Check if the result is an error response from call_authenticated_service
-                if isinstance(result, dict) and result.get("status") == "error":
-                    error_msg = result.get("message", "Unknown error from service call")
-                    logger.error(f"Error from call_authenticated_service storing interview: {error_msg}")
-                    raise StorageError(f"Service call error: {error_msg}")
-                
-                # Check if the result is a success response from the database service
-                if isinstance(result, dict) and result.get("status") != "success":
-                    error_msg = result.get("message", "Unknown error storing interview")
-                    logger.error(f"Database service returned error on interview creation: {error_msg}")
-                    raise StorageError(f"Failed to store interview: {error_msg}")
-                
-                # Get the stored interview data (likely just the ID now)
-                stored_interview_info = result.get("data")
-                
-                if not stored_interview_info or not stored_interview_info.get('id'):
-                    logger.error("No data or ID returned after interview insertion")
-                    logger.error(f"Full response: {result}")
-                    raise StorageError("No ID returned after interview insertion")
-                    
-                logger.info(f"Successfully initiated storage for interview ID: {stored_interview_info.get('id')}")
-                # Return the essential info (like ID) received from the DB service
-                return stored_interview_info
-                    
-            except StorageError:
-                raise # Re-raise storage errors
-            except Exception as e:
-                logger.error(f"Error during authenticated call to store interview: {str(e)}", exc_info=True)
-                raise StorageError(f"Failed to call database service: {str(e)}")
-                
+        logger.info(f"Successfully initiated storage for interview ID: {stored_interview_info.get('id')}")
+        return stored_interview_info
+
+    async def update_interview_synthesis(
+        self,
+        interview_id: str,
+        synthesis: str,
+        suggested_title: Optional[str] = None,
+        title: Optional[str] = None
+    ) -> None:
+        """
+        Merge the synthesis into an interview stored before synthesis finished.
+
+        Args:
+            interview_id: The ID of the stored interview.
+            synthesis: The synthesis text.
+            suggested_title: The title suggested alongside the synthesis, if any.
+            title: New interview title; the stored title is kept when omitted.
+
+        Raises:
+            NotFoundError: If the interview is not found.
+            StorageError: If the update fails.
+        """
+        endpoint_url = f"{self.api_url}/interviews/{interview_id}/synthesis"
+        logger.info(f"Updating synthesis for interview {interview_id}")
+
+        try:
+            result = await call_authenticated_service(
+                service_url=endpoint_url,
+                method="PUT",
+                json_data={"synthesis": synthesis, "suggested_title": suggested_title, "title": title},
+                client=self.client
+            )
+            _unwrap(
+                result,
+                f"updating synthesis for interview {interview_id}",
+                not_found_message=f"Interview with ID {interview_id} not found."
+            )
+        except (NotFoundError, StorageError):
+            raise
         except Exception as e:
-            logger.error(f"Error preparing interview data for storage: {str(e)}", exc_info=True)
-            raise StorageError(f"Failed to prepare interview data: {str(e)}")
-    
-    async def get_interview_by_id(self, interview_id: str) -> Dict[str, Any]:
+            logger.error(f"Unexpected error updating synthesis for interview {interview_id}: {str(e)}", exc_info=True)
+            raise StorageError(f"Unexpected error updating synthesis for interview {interview_id}: {str(e)}")
+
+    async def delete_interview(self, interview_id: str, user_id: str) -> None:
+        """
+        Delete an interview, with its problem areas and excerpts.
+
+        Args:
+            interview_id: The ID of the stored interview.
+            user_id: The owner of the interview; the database service checks it.
+
+        Raises:
+            NotFoundError: If the interview is not found.
+            StorageError: If the deletion fails.
+        """
+        endpoint_url = f"{self.api_url}/interviews/{interview_id}"
+        logger.info(f"Deleting interview {interview_id}")
+
+        try:
+            result = await call_authenticated_service(
+                service_url=endpoint_url,
+                method="DELETE",
+                params={"userId": user_id},
+                client=self.client
+            )
+            _unwrap(
+                result,
+                f"deleting interview {interview_id}",
+                not_found_message=f"Interview with ID {interview_id} not found."
+            )
+        except (NotFoundError, StorageError):
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error deleting interview {interview_id}: {str(e)}", exc_info=True)
+            raise StorageError(f"Unexpected error deleting interview {interview_id}: {str(e)}")
+
+    async def get_interview_by_id(self, interview_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Fetch a single interview by its ID from the database service.
 
         Args:
             interview_id: The ID of the interview to fetch.
+            fields: Optional dotted field paths (e.g. "analysis_data.transcript")
+                    to project server-side. When omitted the full interview,
+                    including relations, is returned.
 
         Returns:
             The interview data as a dictionary.
@@ -162,33 +456,27 @@ class InterviewRepository:
             StorageError: If there's any other error during fetching.
         """
         endpoint_url = f"{self.api_url}/interviews/{interview_id}"
+        params = {"fields": ",".join(fields)} if fields else None
         logger.info(f"Fetching interview {interview_id} from: {endpoint_url}")
         
         try:
             result = await call_authenticated_service(
                 service_url=endpoint_url, 
-                method="GET"
+                method="GET",
+                params=params,
+                client=self.client
             )
 
-            if isinstance(result, dict) and result.get("status") == "error":
-                error_msg = result.get("message", "Unknown error fetching interview")
-                status_code = result.get("status_code", 500) 
-                logger.error(f"Error from service call fetching interview {interview_id}: {error_msg} (Status: {status_code})")
-                if status_code == 404:
-                     raise NotFoundError(f"Interview with ID {interview_id} not found.")
-                raise StorageError(f"Service call error: {error_msg}")
-
-            if isinstance(result, dict) and result.get("status") == "success":
-                interview_data = result.get("data")
-                if not interview_data:
-                     logger.error(f"No data returned for interview {interview_id}. Full response: {result}")
-                     raise StorageError(f"No data returned for interview {interview_id}")
-                logger.info(f"Successfully fetched interview {interview_id}")
-                return interview_data
-            
-            # Handle unexpected response structure
-            logger.error(f"Unexpected response structure when fetching interview {interview_id}: {result}")
-            raise StorageError(f"Unexpected response structure from database service for interview {interview_id}.")
+            interview_data = _unwrap(
+                result,
+                f"fetching interview {interview_id}",
+                not_found_message=f"Interview with ID {interview_id} not found."
+            )
+            if not interview_data:
+                 logger.error(f"No data returned for interview {interview_id}. Full response: {result}")
+                 raise StorageError(f"No data returned for interview {interview_id}")
+            logger.info(f"Successfully fetched interview {interview_id}")
+            return interview_data
 
         except NotFoundError:
              raise # Re-raise NotFoundError explicitly
@@ -198,11 +486,61 @@ class InterviewRepository:
             logger.error(f"Unexpected error fetching interview {interview_id}: {str(e)}", exc_info=True)
             raise StorageError(f"Unexpected error fetching interview {interview_id}: {str(e)}")
 
+    async def get_formatted_transcript(self, interview_id: str) -> Optional[str]:
+        """
+        Fetch the formatted transcript stored for an interview at analysis time.
+
+        Args:
+            interview_id: The ID of the interview.
+
+        Returns:
+            The formatted transcript string, or None for interviews analyzed
+            before the formatted transcript was persisted.
+
+        Raises:
+            NotFoundError: If the interview is not found.
+            StorageError: If there's any other error during fetching.
+        """
+        endpoint_url = f"{self.api_url}/interviews/{interview_id}/formatted_transcript"
+        logger.info(f"Fetching formatted transcript for interview {interview_id} from: {endpoint_url}")
+
+        try:
+            result = await call_authenticated_service(
+                service_url=endpoint_url,
+                method="GET",
+                client=self.client
+            )
+
+            data = _unwrap(
+                result,
+                f"fetching formatted transcript {interview_id}",
+                not_found_message=f"Interview with ID {interview_id} not found."
+            )
+            formatted_transcript = (data or {}).get("formatted_transcript")
+            if not formatted_transcript:
+                logger.info(f"No stored formatted transcript for interview {interview_id}")
+                return None
+            return formatted_transcript
+
+        except NotFoundError:
+            raise
+        except StorageError as e:
+            raise StorageError(f"Storage layer error fetching formatted transcript {interview_id}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Unexpected error fetching formatted transcript {interview_id}: {str(e)}", exc_info=True)
+            raise StorageError(f"Unexpected error fetching formatted transcript {interview_id}: {str(e)}")
+
 
     async def get_personas_for_user(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Fetch all personas associated with a specific user ID.
 
+        Results are cached per user for PERSONA_CACHE_TTL_SECONDS, so persona
+        changes made through the database service show up once the entry
+        expires. Concurrent misses for the same user share a single database
+        service call, and misses for different users in the same event-loop
+        tick are batched into one request.
+
         Args:
             user_id: The ID of the user whose personas to fetch.
 
@@ -212,47 +550,34 @@ class InterviewRepository:
         Raises:
             StorageError: If there's an error during fetching.
         """
-        # Assuming the endpoint structure based on common patterns
-        endpoint_url = f"{self.api_url}/personas?userId={user_id}" 
-        logger.info(f"Fetching personas for user {user_id} from: {endpoint_url}")
-        
-        try:
-            result = await call_authenticated_service(
-                service_url=endpoint_url, 
-                method="GET"
-            )
+        cached = _get_cached_personas(user_id)
+        _persona_cache_stats["lookups"] += 1
+        if cached is not None:
+            _persona_cache_stats["hits"] += 1
+        logger.info(
+            f"Persona cache {'hit' if cached is not None else 'miss'} for user {user_id} "
+            f"(hit rate {_persona_cache_stats['hits']}/{_persona_cache_stats['lookups']})"
+        )
+        if cached is not None:
+            return cached
 
-            if isinstance(result, dict) and result.get("status") == "error":
-                error_msg = result.get("message", "Unknown error fetching personas")
-                status_code = result.get("status_code", 500)
-                logger.error(f"Error from service call fetching personas for user {user_id}: {error_msg} (Status: {status_code})")
-                # Note: Depending on API design, an empty list might be returned instead of 404 for no personas.
-                # We assume an error status code indicates a real problem.
-                raise StorageError(f"Service call error fetching personas: {error_msg}")
-
-            if isinstance(result, dict) and result.get("status") == "success":
-                personas_data = result.get("data")
-                if personas_data is None: # Allow empty list, but error if 'data' key is missing
-                     logger.error(f"No 'data' field returned when fetching personas for user {user_id}. Full response: {result}")
-                     raise StorageError(f"Invalid response structure fetching personas for user {user_id}")
-                
-                # Ensure data is a list
-                if not isinstance(personas_data, list):
-                    logger.error(f"Expected list but got {type(personas_data)} when fetching personas for user {user_id}. Data: {personas_data}")
-                    raise StorageError(f"Unexpected data type for personas: {type(personas_data)}")
+        async with _persona_lock(user_id):
+            # Another request may have filled the cache while we waited
+            cached = _get_cached_personas(user_id)
+            if cached is not None:
+                return cached
+            personas = await self._persona_loader().load(user_id)
+            _cache_personas(user_id, personas)
+            return personas
 
-                logger.info(f"Successfully fetched {len(personas_data)} personas for user {user_id}")
-                return personas_data
-            
-            # Handle unexpected response structure
-            logger.error(f"Unexpected response structure when fetching personas for user {user_id}: {result}")
-            raise StorageError(f"Unexpected response structure from database service for personas.")
-
-        except StorageError as e:
-             raise StorageError(f"Storage layer error fetching personas for user {user_id}: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unexpected error fetching personas for user {user_id}: {str(e)}", exc_info=True)
-            raise StorageError(f"Unexpected error fetching personas for user {user_id}: {str(e)}")
+    def _persona_loader(self) -> _PersonaBatchLoader:
+        """Return the shared persona batch loader for this repository's database service."""
+        loader = _persona_loaders.get(self.api_url)
+        if loader is None:
+            loader = _persona_loaders[self.api_url] = _PersonaBatchLoader(
+                functools.partial(_fetch_personas_for_users, self.api_url)
+            )
+        return loader
 
     def _extract_title(self, analysis_result: Dict[str, Any], metadata: Optional[Dict[str, Any]]) -> str:
         """
@@ -265,16 +590,24 @@ class InterviewRepository:
         Returns:
             A string title for the interview
         """
-        # First try to use title from metadata
-        if metadata and metadata.get("title"):
-            return metadata["title"]
-        
-        # Next try to create a title from problem areas
-        problem_areas = analysis_result.get("problem_areas", [])
-        if problem_areas and len(problem_areas) > 0:
-            first_problem_title = problem_areas[0].get("title", "")
-            if first_problem_title:
-                return f"Interview about {first_problem_title}"
+        return (
+            (metadata or {}).get("title")
+            or self._title_from_analysis(analysis_result)
+            or "Untitled Interview"
+        )
+
+    def _title_from_analysis(self, analysis_result: Dict[str, Any]) -> Optional[str]:
+        """
+        Build a title from the first problem area that has one.
         
-        # Finally use a generic title
-        return "Untitled Interview" 
\ No newline at end of file
+        Args:
+            analysis_result: The analysis result
+            
+        Returns:
+            A title such as "Interview about <problem area>", or None if no problem area has a title
+        """
+        first_problem_title = next(
+            (pa["title"] for pa in analysis_result.get("problem_areas") or [] if isinstance(pa, dict) and pa.get("title")),
+            None
+        )
+        return f"Interview about {first_problem_title}" if first_problem_title else None 
\ No newline at end of file
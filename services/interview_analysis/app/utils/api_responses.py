@@ -1,5 +1,18 @@
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse
 from typing import Dict, Any, Optional
+from .json_codec import dumps_json
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed.
+    
+    Used as the app's default response class; analysis results carry large
+    nested problem_areas arrays that the stdlib encoder is slow to render.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
 
 class APIError(HTTPException):
     def __init__(self, message: str, status_code: int = 500, detail: Optional[Dict[str, Any]] = None):
@@ -2,23 +2,165 @@
 Utility for Cloud Run service-to-service authentication.
 """
 import os
+import asyncio
+import functools
+import gzip
 import logging
+import time
 import httpx
 import google.auth
+import google.auth.jwt
 import google.auth.transport.requests
 from google.oauth2 import id_token
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+from .json_codec import dumps_json, loads_json
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _encode_json_body(json_data: Optional[Dict[str, Any]], content_encoding: Optional[str]) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """
+    Serialize (and optionally compress) a JSON request body.
+
+    Args:
+        json_data: The JSON payload, or None for requests without a body
+        content_encoding: "gzip" to compress the body, or None
+
+    Returns:
+        Tuple of the encoded body (None if there is no body) and the headers describing it
+
+    Raises:
+        ValueError: If the content encoding is not supported
+    """
+    if json_data is None:
+        return None, {}
+    content = dumps_json(json_data)
+    headers = dict(JSON_HEADERS)
+    if content_encoding == "gzip":
+        content = gzip.compress(content, compresslevel=3)
+        headers["Content-Encoding"] = "gzip"
+    elif content_encoding:
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+    return content, headers
+
+
+# Shared client so repeated calls to the same service reuse pooled keep-alive
+# (and, over TLS, HTTP/2) connections instead of handshaking on every request.
+# One pool serves every timeout tier: timeouts are passed per request.
+# Idle connections are kept for 2 minutes (httpx defaults to 5s), long enough
+# to span the gaps between calls made around a Gemini request.
+_HTTP_KEEPALIVE_EXPIRY = 120.0
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide HTTP client, creating it on first use.
+
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_keepalive_connections=50,
+                max_connections=100,
+                keepalive_expiry=_HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# Whether we're running in Cloud Run (production) or locally (development);
+# K_SERVICE is set by Cloud Run and doesn't change for the life of the process
+_IS_PRODUCTION = os.environ.get("K_SERVICE") is not None
+
+
+@functools.lru_cache(maxsize=128)
+def _audience_for(service_url: str) -> str:
+    """Return the ID token audience for a service URL: its scheme and host (with any port)."""
+    parts = urlsplit(service_url)
+    if parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}"
+    logger.warning(f"Unusual service URL format: {service_url}")
+    return service_url
+
+
+# ID tokens per audience as (token, expiry epoch). Minting one goes through the
+# metadata server, so reuse it until shortly before it expires.
+_ID_TOKEN_REFRESH_MARGIN = 300
+_ID_TOKEN_DEFAULT_LIFETIME = 3600
+_id_token_cache: Dict[str, Tuple[str, float]] = {}
+_id_token_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _token_expiry(token: str) -> float:
+    """Return the exp claim of an ID token, or assume the default lifetime if it can't be read."""
+    try:
+        return float(google.auth.jwt.decode(token, verify=False)["exp"])
+    except Exception as e:
+        logger.warning(f"Could not read ID token expiry, assuming {_ID_TOKEN_DEFAULT_LIFETIME}s: {str(e)}")
+        return time.time() + _ID_TOKEN_DEFAULT_LIFETIME
+
+
+async def get_id_token(target_audience: str) -> str:
+    """
+    Return an ID token for the audience, fetching a new one only when the cached token is about to expire.
+
+    Args:
+        target_audience: The audience (service base URL) the token is for
+
+    Returns:
+        The ID token
+
+    Raises:
+        Exception: If a new token cannot be fetched
+    """
+    cached = _id_token_cache.get(target_audience)
+    if cached and time.time() < cached[1] - _ID_TOKEN_REFRESH_MARGIN:
+        return cached[0]
+
+    lock = _id_token_locks.setdefault(target_audience, asyncio.Lock())
+    async with lock:
+        # Another request may have refreshed the token while we waited
+        cached = _id_token_cache.get(target_audience)
+        if cached and time.time() < cached[1] - _ID_TOKEN_REFRESH_MARGIN:
+            return cached[0]
+
+        # fetch_id_token blocks on the metadata server, so keep it off the event loop
+        auth_req = google.auth.transport.requests.Request()
+        token = await asyncio.to_thread(id_token.fetch_id_token, auth_req, target_audience)
+        _id_token_cache[target_audience] = (token, _token_expiry(token))
+        logger.info(f"Successfully obtained ID token for {target_audience}")
+        return token
+
+
 async def call_authenticated_service(
     service_url: str, 
     method: str = "GET", 
     json_data: Optional[Dict[str, Any]] = None,
     files: Optional[Dict] = None,
     data: Optional[Dict] = None,
-    params: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None,
+    content_encoding: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    include_etag: bool = False
 ) -> Dict[str, Any]:
     """
     Call another Cloud Run service with Google Cloud IAM authentication.
@@ -33,173 +175,85 @@ async def call_authenticated_service(
         files: Files to upload (for POST requests)
         data: Form data to send (for POST requests with files)
         params: Query parameters
+        content_encoding: Compress the JSON body before sending; only "gzip" is
+                          supported (the receiving service must accept it)
+        headers: Extra request headers, e.g. If-None-Match for a conditional GET
+        client: HTTP client to send the request with; defaults to the shared client
+        include_etag: Add the response ETag, when there is one, to a JSON object
+                      response under "etag"
         
     Returns:
-        The JSON response from the service
+        The JSON response from the service. A 304 returns
+        {"status": "not_modified", "status_code": 304}.
         
-    Raises:
-        Exception: If the service call fails
+        Failures are returned, not raised, as {"status": "error", "message": ...}
+        (plus "status_code" for HTTP error responses). Programming errors, such
+        as an unserializable json_data, propagate.
     """
-    # Check if we're running in Cloud Run (production) or locally (development)
-    # K_SERVICE environment variable is automatically set in Cloud Run
-    is_production = os.environ.get("K_SERVICE") is not None
-    
-    if is_production:
-        logger.info(f"Making authenticated call to {service_url} (production mode)")
-        try:
-            # Extract target audience (only the host part of the URL)
-            url_parts = service_url.split("/")
-            if len(url_parts) >= 3:
-                target_audience = f"{url_parts[0]}//{url_parts[2]}"
-                logger.debug(f"Target audience for authentication: {target_audience}")
-            else:
-                target_audience = service_url
-                logger.warning(f"Unusual service URL format: {service_url}")
-            
-            # Use Google's auth library to fetch ID token
-            auth_req = google.auth.transport.requests.Request()
+    method = method.upper()
+
+    request_headers = dict(headers or {})
+
+    try:
+        if _IS_PRODUCTION:
+            # Use Google's auth library to fetch ID token (cached until close to expiry)
             try:
-                token = id_token.fetch_id_token(auth_req, target_audience)
-                logger.info(f"Successfully obtained ID token for {target_audience}")
+                request_headers["Authorization"] = f"Bearer {await get_id_token(_audience_for(service_url))}"
             except Exception as e:
-                logger.error(f"Error fetching ID token: {str(e)}")
+                logger.error("Error fetching ID token: %s", e)
                 # Fallback to unauthenticated call if token fetching fails in production
                 logger.warning("Falling back to unauthenticated call in production due to token fetch error")
-                token = None
-            
-            # Add token to headers if available
-            headers = {}
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-                logger.debug(f"Created authentication token for {target_audience}")
-            
-            # Make authenticated request
             timeout = 60.0  # Increase timeout for production environments
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                if method.upper() == "GET":
-                    logger.debug(f"Making GET request to {service_url}")
-                    response = await client.get(service_url, headers=headers, params=params)
-                elif method.upper() == "POST":
-                    logger.debug(f"Making POST request to {service_url}")
-                    if files:
-                        response = await client.post(service_url, headers=headers, files=files, data=data, params=params)
-                    else:
-                        logger.debug(f"POST with JSON data: {json_data}")
-                        response = await client.post(service_url, headers=headers, json=json_data, params=params)
-                elif method.upper() == "PUT":
-                    response = await client.put(service_url, headers=headers, json=json_data, params=params)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(service_url, headers=headers, params=params)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Check for successful response before handling JSON
-            if response.status_code >= 400:
-                error_text = response.text
-                logger.error(f"Error response from service ({response.status_code}): {error_text}")
-                # Return a properly formatted error response
-                return {
-                    "status": "error",
-                    "message": f"Service returned {response.status_code}: {error_text}"
-                }
-            
-            # Handle JSON response data
-            try:
-                response_data = response.json()
-                logger.info(f"Successfully received JSON response from {service_url}")
-                return response_data
-            except Exception as json_error:
-                logger.error(f"Error parsing JSON response: {str(json_error)}")
-                # Return an error response when JSON parsing fails
-                return {
-                    "status": "error",
-                    "message": f"Failed to parse JSON response: {str(json_error)}",
-                    "raw_response": response.text
-                }
-                
-        except httpx.TimeoutException as timeout_error:
-            logger.error(f"Timeout error calling {service_url}: {str(timeout_error)}")
-            return {
-                "status": "error",
-                "message": f"Request timed out: {str(timeout_error)}"
-            }
-        except httpx.TransportError as transport_error:
-            logger.error(f"Transport error calling {service_url}: {str(transport_error)}")
-            return {
-                "status": "error",
-                "message": f"Connection error: {str(transport_error)}"
-            }
-        except Exception as e:
-            logger.error(f"Error making authenticated call to {service_url}: {str(e)}", exc_info=True)
-            return {
-                "status": "error",
-                "message": f"Error calling service: {str(e)}"
-            }
-    else:
-        logger.info(f"Making direct call to {service_url} (development mode)")
-        # In development, make direct calls without authentication
-        try:
-            # Add debug logs for development mode
-            if method.upper() == "POST" and json_data:
-                logger.debug(f"Development mode POST with JSON: {json_data}")
-            
+        else:
+            # In development, make direct calls without authentication
             timeout = 30.0  # Default timeout for development
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                if method.upper() == "GET":
-                    logger.debug(f"Making GET request to {service_url}")
-                    response = await client.get(service_url, params=params)
-                elif method.upper() == "POST":
-                    if files:
-                        logger.debug(f"Making POST request with files to {service_url}")
-                        response = await client.post(service_url, files=files, data=data, params=params)
-                    else:
-                        logger.debug(f"Making POST request with JSON to {service_url}")
-                        response = await client.post(service_url, json=json_data, params=params)
-                elif method.upper() == "PUT":
-                    response = await client.put(service_url, json=json_data, params=params)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(service_url, params=params)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Check response
-            if response.status_code >= 400:
-                error_text = response.text
-                logger.error(f"Error response from service ({response.status_code}): {error_text}")
-                # Return a properly formatted error response
-                return {
-                    "status": "error",
-                    "message": f"Service returned {response.status_code}: {error_text}"
-                }
-            
-            try:
-                response_data = response.json()
-                logger.info(f"Successfully received JSON response from {service_url}")
-                return response_data
-            except Exception as json_error:
-                logger.error(f"Error parsing JSON response: {str(json_error)}")
-                # Return an error response when JSON parsing fails
-                return {
-                    "status": "error",
-                    "message": f"Failed to parse JSON response: {str(json_error)}",
-                    "raw_response": response.text
-                }
-                
-        except httpx.TimeoutException as timeout_error:
-            logger.error(f"Timeout error calling {service_url}: {str(timeout_error)}")
-            return {
-                "status": "error",
-                "message": f"Request timed out: {str(timeout_error)}"
-            }
-        except httpx.TransportError as transport_error:
-            logger.error(f"Transport error calling {service_url}: {str(transport_error)}")
-            return {
-                "status": "error",
-                "message": f"Connection error: {str(transport_error)}"
-            }
-        except Exception as e:
-            logger.error(f"Error making call to {service_url}: {str(e)}", exc_info=True)
-            return {
-                "status": "error",
-                "message": f"Error calling service: {str(e)}"
-            } 
\ No newline at end of file
+
+        # Serialize JSON bodies ourselves so the faster codec is used when available
+        content, content_headers = _encode_json_body(json_data, content_encoding)
+        request_headers.update(content_headers)
+        # The payload can be a full analysis blob; only render it when debug is on
+        logger.debug("Making %s request to %s with JSON data: %s", method, service_url, json_data)
+
+        client = client or get_http_client()
+        response = await client.request(
+            method, service_url, headers=request_headers, params=params, timeout=timeout,
+            files=files, data=data, content=None if files else content
+        )
+
+        if response.status_code == 304:
+            logger.info(f"Resource at {service_url} not modified")
+            return {"status": "not_modified", "status_code": 304}
+
+        if response.status_code >= 400:
+            error_text = response.text
+            logger.error("Error response from service (%s): %s", response.status_code, error_text)
+            return _error(f"Service returned {response.status_code}: {error_text}", status_code=response.status_code)
+
+        try:
+            response_data = loads_json(response.content)
+        except ValueError as json_error:  # json and orjson decode errors both subclass it
+            logger.error("Error parsing JSON response: %s", json_error)
+            return _error(f"Failed to parse JSON response: {str(json_error)}", raw_response=response.text)
+        # One info record per call; the mode is logged once at startup
+        logger.info(f"{method} {service_url} returned {response.status_code}")
+        if include_etag and isinstance(response_data, dict) and "etag" in response.headers:
+            response_data["etag"] = response.headers["etag"]
+        return response_data
+
+    except httpx.TimeoutException as timeout_error:
+        logger.error("Timeout error calling %s: %s", service_url, timeout_error)
+        return _error(f"Request timed out: {str(timeout_error)}")
+    except httpx.TransportError as transport_error:
+        logger.error("Transport error calling %s: %s", service_url, transport_error)
+        return _error(f"Connection error: {str(transport_error)}")
+    except (httpx.HTTPError, ValueError, RuntimeError) as e:
+        # The traceback is only worth formatting when debugging; these are
+        # usually transient and retried by the caller
+        logger.error("Error making call to %s: %s", service_url, e)
+        logger.debug("Traceback for call to %s", service_url, exc_info=True)
+        return _error(f"Error calling service: {str(e)}")
+
+
+def _error(message: str, **extra: Any) -> Dict[str, Any]:
+    """Build the error dict call_authenticated_service returns instead of raising."""
+    return {"status": "error", "message": message, **extra}
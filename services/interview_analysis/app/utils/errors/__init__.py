@@ -4,43 +4,47 @@ Error handling classes for the interview analysis service.
 
 class InterviewAnalysisError(Exception):
     """Base exception for all interview analysis errors."""
-    def __init__(self, message, status_code=500):
+    # BaseException still gives every instance a __dict__, which holds a
+    # per-instance status_code override; the slot only makes message a descriptor.
+    __slots__ = ("message",)
+    status_code = 500
+
+    def __init__(self, message, status_code=None):
         self.message = message
-        self.status_code = status_code
+        if status_code is not None:
+            # Only stored per instance when overriding the class default
+            self.status_code = status_code
         super().__init__(self.message)
 
 
 class FileProcessingError(InterviewAnalysisError):
     """Error in file processing."""
-    def __init__(self, message):
-        super().__init__(message, status_code=400)
+    __slots__ = ()
+    status_code = 400
 
 
 class AnalysisError(InterviewAnalysisError):
     """Error during analysis."""
-    def __init__(self, message):
-        super().__init__(message, status_code=500)
+    __slots__ = ()
 
 
 class StorageError(InterviewAnalysisError):
     """Error during storage."""
-    def __init__(self, message):
-        super().__init__(message, status_code=500)
+    __slots__ = ()
 
 
 class NotFoundError(InterviewAnalysisError):
     """Error when a requested resource is not found."""
-    def __init__(self, message):
-        super().__init__(message, status_code=404)
+    __slots__ = ()
+    status_code = 404
 
 
 class WorkflowError(InterviewAnalysisError):
     """Error during workflow execution."""
-    def __init__(self, message):
-        super().__init__(message, status_code=500)
+    __slots__ = ()
 
 
 class ConfigurationError(InterviewAnalysisError):
     """Error in service configuration."""
-    def __init__(self, message):
-        super().__init__(message, status_code=503)  # Service Unavailable 
\ No newline at end of file
+    __slots__ = ()
+    status_code = 503  # Service Unavailable
@@ -0,0 +1,24 @@
+"""
+JSON encoding and decoding, using orjson when it is installed.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; fall back to the stdlib codec
+    orjson = None
+
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+
+def loads_json(content: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
@@ -22,16 +22,12 @@ def format_chunks_for_analysis(chunks: List[Dict[str, Any]]) -> str:
         logger.warning("format_chunks_for_analysis received empty or null chunks list.")
         return "" # Return empty string for empty input
         
-    formatted_lines = []
-    for chunk in chunks:
-        # Safely get values, providing defaults
-        speaker = chunk.get('speaker', 'Unknown')
-        number = chunk.get('number', 'N/A')
-        text = chunk.get('text', '').strip()
-        
-        # Format line
-        formatted_lines.append(f"[{speaker}] (Chunk {number}): {text}")
-        
-    formatted_transcript = "\n".join(formatted_lines)
-    logger.debug(f"Formatted {len(chunks)} chunks into transcript string (length: {len(formatted_transcript)})")
+    # Single join over a generator; chunks with no text are skipped so they
+    # don't leave bare "[speaker] (Chunk n):" lines in the prompt.
+    formatted_transcript = "\n".join(
+        f"[{chunk.get('speaker', 'Unknown')}] (Chunk {chunk.get('number', 'N/A')}): {text}"
+        for chunk in chunks
+        if (text := (chunk.get('text') or '').strip())
+    )
+    logger.debug("Formatted %d chunks into transcript string (length: %d)", len(chunks), len(formatted_transcript))
     return formatted_transcript 
\ No newline at end of file
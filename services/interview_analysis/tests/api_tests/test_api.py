@@ -5,13 +5,38 @@ These tests verify individual API endpoints, request validation, error handling,
 and response formats. Tests are focused on API behavior rather than business logic.
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 import io
 import json
-from unittest.mock import patch, AsyncMock
+from pathlib import Path
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.main import app
+from app.api.dependencies import get_interview_workflow
+from app.domain.workflows import InterviewWorkflow
+
+# Realistic workflow result returned by the mocked process_interview, parsed once
+MOCK_WORKFLOW_RESULT = json.loads(
+    (Path(__file__).parents[1] / "fixtures" / "mock_workflow_result.json").read_bytes()
+)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _stub_workflow():
+    """Inject a stub workflow for the module so no test builds the analyzer or reaches the LLM."""
+    stub = MagicMock(spec=InterviewWorkflow)
+    stub.process_interview = AsyncMock()
+    app.dependency_overrides[get_interview_workflow] = lambda: stub
+    yield stub
+    app.dependency_overrides.pop(get_interview_workflow, None)
+
+
+@pytest.fixture
+def mock_process_interview(_stub_workflow):
+    """Reset the stub's process_interview to return MOCK_WORKFLOW_RESULT."""
+    mock_process = _stub_workflow.process_interview
+    mock_process.reset_mock(return_value=True, side_effect=True)
+    mock_process.return_value = MOCK_WORKFLOW_RESULT
+    return mock_process
 
-client = TestClient(app)
 
 @pytest.mark.api
 def test_root_endpoint(test_client):
@@ -41,27 +66,28 @@ def test_root_endpoint(test_client):
     assert "endpoints" in data
 
 @pytest.mark.api
-def test_file_format_validation(test_client, test_invalid_file):
+def test_file_format_validation(test_client, test_invalid_file, mock_process_interview):
     """
-    Test file format validation for non-VTT files.
+    Test file format validation for files that are neither VTT nor TXT.
     
     Args:
         test_client: FastAPI test client fixture
         test_invalid_file: Fixture providing an invalid file format
+        mock_process_interview: Mock for the workflow's process_interview
     
     Test Steps:
-        1. Submit non-VTT file to analysis endpoint
+        1. Submit a .pdf file to analysis endpoint
         2. Verify error response
         3. Validate error message format
-        4. Check specific error details
+        4. Check the workflow was never reached
     """
     # Create a test file for the API request
     invalid_file = test_invalid_file
     
-    # Make the request with an invalid file
+    # Make the request with an invalid file (.vtt and .txt are both accepted)
     response = test_client.post(
         "/api/interview_analysis/analyze",
-        files={"file": ("test.txt", invalid_file, "text/plain")}
+        files={"file": ("test.pdf", invalid_file, "application/pdf")}
     )
     
     # Check response
@@ -70,6 +96,7 @@ def test_file_format_validation(test_client, test_invalid_file):
     assert "message" in data
     assert "Invalid file format" in data["message"]
     assert data["status"] == "error"
+    mock_process_interview.assert_not_called()
 
 @pytest.mark.api
 def test_empty_file(test_client, test_empty_file):
@@ -103,103 +130,39 @@ def test_empty_file(test_client, test_empty_file):
     assert data["status"] == "error"
 
 @pytest.mark.api
-def test_vtt_processing(test_client, test_vtt_file):
+def test_vtt_processing(test_client, test_vtt_file, mock_process_interview):
     """
     Test successful VTT file processing workflow.
     
     Args:
         test_client: FastAPI test client fixture
         test_vtt_file: Fixture providing a valid VTT file
+        mock_process_interview: Stub workflow's process_interview mock
     
     Test Steps:
-        1. Mock the InterviewWorkflow process_interview method
-        2. Submit valid VTT file
-        3. Verify successful response
-        4. Validate response structure and content
-        5. Check specific analysis results
+        1. Submit valid VTT file with the workflow mocked
+        2. Verify successful response
+        3. Validate the response envelope and its analysis data
     """
-    # Mock the workflow to avoid actual LLM calls
-    with patch('app.domain.workflows.InterviewWorkflow.process_interview') as mock_process:
-        # Set up a realistic mock response
-        mock_response = {
-            "problem_areas": [
-                {
-                    "problem_id": "test-1",
-                    "title": "Infrastructure Scaling",
-                    "description": "Current systems can't handle growth",
-                    "excerpts": [
-                        {
-                            "text": "Our main issue is scaling our infrastructure",
-                            "categories": ["Technical", "Growth"],
-                            "insight_summary": "Infrastructure scaling challenges",
-                            "chunk_number": 2
-                        }
-                    ]
-                }
-            ],
-            "transcript": [
-                {
-                    "chunk_number": 1,
-                    "speaker": "Interviewer",
-                    "text": "Tell me about your biggest challenge."
-                },
-                {
-                    "chunk_number": 2,
-                    "speaker": "Interviewee",
-                    "text": "Our main issue is scaling our infrastructure."
-                }
-            ],
-            "synthesis": {
-                "background": "The company is experiencing rapid growth.",
-                "problem_areas": ["Infrastructure scaling challenges"],
-                "next_steps": ["Evaluate cloud solutions"]
-            },
-            "metadata": {
-                "transcript_length": 2,
-                "problem_areas_count": 1,
-                "excerpts_count": 1
-            },
-            "storage": {
-                "id": "test-interview-id",
-                "created_at": "2025-03-31T12:00:00"
-            }
-        }
-        
-        # Configure the workflow mock
-        mock_process.return_value = mock_response
-        
-        # Make the request
-        response = test_client.post(
-            "/api/interview_analysis/analyze",
-            files={"file": ("test.vtt", test_vtt_file, "text/vtt")}
-        )
-        
-        # Verify response status
-        assert response.status_code == 200
-        data = response.json()
-        
-        # Verify response structure
-        assert "status" in data
-        assert data["status"] == "success"
-        assert "data" in data
-        
-        # Verify data content
-        result = data["data"]
-        assert "problem_areas" in result
-        assert "synthesis" in result
-        assert "metadata" in result
-        
-        # Verify specific content
-        assert len(result["problem_areas"]) == 1
-        assert result["problem_areas"][0]["title"] == "Infrastructure Scaling"
-        assert "Infrastructure scaling challenges" in result["synthesis"]["problem_areas"]
-        
-        # Verify storage information is included
-        assert "storage" in result
-        assert result["storage"]["id"] == "test-interview-id"
-        
-        # Verify the workflow was called
-        mock_process.assert_called_once()
+    # Make the request
+    response = test_client.post(
+        "/api/interview_analysis/analyze",
+        files={"file": ("test.vtt", test_vtt_file, "text/vtt")}
+    )
+    
+    # Verify response status
+    assert response.status_code == 200
+    data = response.json()
+    
+    # Verify the workflow result is passed through unchanged, storage info included
+    assert data == {
+        "status": "success",
+        "message": "Interview analysis completed successfully",
+        "data": MOCK_WORKFLOW_RESULT
+    }
+    
+    # Verify the workflow was called
+    mock_process_interview.assert_called_once()
 
 @pytest.mark.api
 def test_missing_file(test_client):
@@ -248,4 +211,28 @@ def test_error_response_format(test_client, test_empty_file):
     assert "message" in data
     assert isinstance(data["message"], str)
     assert "status" in data
-    assert data["status"] == "error" 
\ No newline at end of file
+    assert data["status"] == "error" 
+@pytest.mark.api
+def test_analysis_response_keeps_unicode(test_client, test_vtt_file, mock_process_interview):
+    """
+    Test that analysis results render through the app's default JSON response class.
+    
+    Args:
+        test_client: FastAPI test client fixture
+        test_vtt_file: Fixture providing a valid VTT file
+        mock_process_interview: Mock for the workflow's process_interview
+    
+    Test Steps:
+        1. Return a result containing non-ASCII text from the workflow
+        2. Verify the response is JSON and decodes back to the same text
+    """
+    mock_process_interview.return_value = {**MOCK_WORKFLOW_RESULT, "synthesis": "Café onboarding — “slow”"}
+    
+    response = test_client.post(
+        "/api/interview_analysis/analyze",
+        files={"file": ("test.vtt", test_vtt_file, "text/vtt")}
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["data"]["synthesis"] == "Café onboarding — “slow”"
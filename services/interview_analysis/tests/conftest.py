@@ -1,31 +1,24 @@
+import functools
+import hashlib
+import json
 import pytest
 from fastapi.testclient import TestClient
 import sys
 import os
 import io
-from unittest.mock import AsyncMock, MagicMock
+import re
+from importlib import resources
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add the app directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.main import app
 
-#
-# Common Fixtures
-#
-
-@pytest.fixture
-def test_client():
-    """Create a test client for the FastAPI application."""
-    return TestClient(app)
-
-@pytest.fixture
-def test_vtt_content():
-    """Return sample VTT content for testing.
-    
-    This is a simple transcript with clear speaker identifiers and timestamps.
-    """
-    return """WEBVTT
+# Sample VTT transcript, stored encoded since uploads need bytes
+_TEST_VTT_BYTES = b"""WEBVTT
 
 1
 00:00:00.000 --> 00:00:05.000
@@ -41,116 +34,261 @@ and our current systems can't keep up with the demand.
 Interviewee: We need a more robust solution that can handle increased load 
 and maintain performance during peak times."""
 
-@pytest.fixture
-def test_vtt_file(test_vtt_content):
-    """Create a test VTT file in-memory."""
-    return io.BytesIO(test_vtt_content.encode())
+#
+# Common Fixtures
+#
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def test_client():
+    """Create a test client for the FastAPI application.
+    
+    Shared by the whole session, so app startup and shutdown run once.
+    """
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def test_vtt_content():
+    """Return sample VTT content for testing.
+    
+    This is a simple transcript with clear speaker identifiers and timestamps.
+    """
+    return _TEST_VTT_BYTES.decode()
+
+# Upload fixtures are raw bytes, built once; the test client wraps them per request
+
+@pytest.fixture(scope="session")
+def test_vtt_file():
+    """Return the sample VTT file contents as bytes."""
+    return _TEST_VTT_BYTES
+
+@pytest.fixture(scope="session")
 def test_invalid_file():
-    """Create an invalid test file for error testing."""
-    content = b"This is not a VTT file"
-    return io.BytesIO(content)
+    """Return the contents of an invalid file for error testing."""
+    return b"This is not a VTT file"
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_empty_file():
-    """Create an empty file for error testing."""
-    return io.BytesIO(b"")
+    """Return the contents of an empty file for error testing."""
+    return b""
 
 #
 # Real Transcript Test Fixtures
 #
 
+# The real transcript ships as package data of tests.transcripts
+_REAL_TRANSCRIPT = resources.files("tests.transcripts").joinpath("test_transcript_20250218.vtt")
+
+@functools.lru_cache(maxsize=8)
+def _load_fixture_bytes(path):
+    """Read a fixture file once per process."""
+    return path.read_bytes()
+
+@pytest.fixture(scope="session")
+def real_transcript_bytes():
+    """Return the real transcript contents, read from disk once per session."""
+    if not _REAL_TRANSCRIPT.is_file():
+        pytest.skip("Real transcript file not found")
+    return _load_fixture_bytes(_REAL_TRANSCRIPT)
+
 @pytest.fixture
-def real_transcript_file():
+def real_transcript_file(real_transcript_bytes):
     """Load the real transcript file for integration testing.
     
     This fixture uses the actual interview transcript for realistic testing.
-    It's particularly useful for integration tests.
+    Use it where a file-like object is needed; tests that only need the
+    content should take real_transcript_bytes. Each test gets its own file
+    object over the cached bytes.
     """
-    # Look in the transcripts directory (preferred location)
-    transcripts_path = os.path.join(os.path.dirname(__file__), "transcripts", "test_transcript_20250218.vtt")
-    
-    if os.path.exists(transcripts_path):
-        with open(transcripts_path, "rb") as f:
-            content = f.read()
-        return io.BytesIO(content)
-    
-    # Fallback to project root (for local development)
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../.."))
-    transcript_path = os.path.join(project_root, "test_transcript_20250218.vtt")
-    
-    try:
-        with open(transcript_path, "rb") as f:
-            content = f.read()
-        return io.BytesIO(content)
-    except FileNotFoundError:
-        pytest.skip("Real transcript file not found")
-        return None
+    return io.BytesIO(real_transcript_bytes)
 
 #
 # LLM Mocks
 #
 
-@pytest.fixture
-def mock_problem_chain():
-    """Create a mock for the problem extraction chain."""
-    mock = AsyncMock()
-    mock.ainvoke.return_value = {
-        "problem_areas": [
-            {
-                "problem_id": "test-1",
-                "title": "Test Problem",
-                "description": "This is a test problem description",
-                "relevance": "High"
-            }
-        ]
+@pytest.fixture(scope="session")
+def _mock_chain_templates():
+    """Build the canned chain outputs once; mock_chain returns them by name."""
+    return {
+        "problem": {
+            "problem_areas": [
+                {
+                    "problem_id": "test-1",
+                    "title": "Test Problem",
+                    "description": "This is a test problem description",
+                    "relevance": "High"
+                }
+            ]
+        },
+        "excerpt": {
+            "excerpts": [
+                {
+                    "excerpt_id": "exc-1",
+                    "problem_id": "test-1",
+                    "chunk_indices": [1, 2, 3],
+                    "transcript_text": "Sample text from transcript",
+                    "relevance": "High"
+                }
+            ]
+        },
+        "synthesis": {
+            "synthesis": "This is a synthesized analysis."
+        }
     }
-    return mock
 
 @pytest.fixture
-def mock_excerpt_chain():
-    """Create a mock for the excerpt extraction chain."""
+def mock_chain(request, _mock_chain_templates):
+    """Create a mock chain returning the canned output named by the parameter.
+    
+    Select the chain with indirect parametrization, e.g.
+    @pytest.mark.parametrize("mock_chain", ["problem", "excerpt", "synthesis"], indirect=True)
+    """
     mock = AsyncMock()
-    mock.ainvoke.return_value = {
-        "excerpts": [
-            {
-                "excerpt_id": "exc-1",
-                "problem_id": "test-1",
-                "chunk_indices": [1, 2, 3],
-                "transcript_text": "Sample text from transcript",
-                "relevance": "High"
-            }
-        ]
-    }
+    mock.ainvoke.return_value = _mock_chain_templates[request.param]
     return mock
 
+@pytest.fixture(scope="module")
+def _patched_generative_model():
+    """Patch the Gemini model class once per module for tests that build pipelines.
+    
+    The SDK module itself is mocked, like in test_api_config, so these tests
+    never construct a real client.
+    """
+    mock_genai = MagicMock()
+    with patch.dict(sys.modules, {"google.generativeai": mock_genai}):
+        yield mock_genai.GenerativeModel
+
+@pytest.fixture(scope="module")
+def analysis_chain_factory(_patched_generative_model):
+    """Return a builder for analysis pipelines on the patched Gemini model class."""
+    from app.services.analysis.gemini_pipeline.analysis_pipeline import GeminiAnalysisPipeline, SAFETY_SETTINGS
+
+    def build(model_name="gemini-2.0-flash"):
+        # Same settings create_analysis_pipeline passes in production
+        return GeminiAnalysisPipeline(model_name, SAFETY_SETTINGS)
+    return build
+
 @pytest.fixture
-def mock_synthesis_chain():
-    """Create a mock for the synthesis chain."""
-    mock = AsyncMock()
-    mock.ainvoke.return_value = {
-        "synthesis": "This is a synthesized analysis."
-    }
-    return mock
+def gemini_model_factory():
+    """Return a builder for a mock Gemini model that answers each pipeline step.
+    
+    The builder takes the step 1 response, the excerpt responses by problem_id
+    and the synthesis response. Each is a dict, or an exception to raise from
+    that call. Step 1 is streamed back in small chunks like the real API.
+    """
+    def build(problem_areas, excerpts, synthesis, chunk_size=40):
+        async def generate_content_async(prompt, stream=False):
+            if stream:
+                if isinstance(problem_areas, Exception):
+                    raise problem_areas
+                text = json.dumps(problem_areas)
+
+                async def chunks():
+                    for start in range(0, len(text), chunk_size):
+                        yield SimpleNamespace(text=text[start:start + chunk_size])
+                return chunks()
+            if '"suggested_title"' in prompt:
+                response = synthesis
+            else:
+                # The system message has its own example problem_id; read the one sent
+                provided = prompt.split("Problem Areas Provided:", 1)[1]
+                response = excerpts[re.search(r'"problem_id":\s*"([^"]+)"', provided).group(1)]
+            if isinstance(response, Exception):
+                raise response
+            return SimpleNamespace(text=json.dumps(response))
+
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(side_effect=generate_content_async)
+        return model
+    return build
+
+# Recorded Gemini analyses, one JSON file per transcript hash
+_LLM_MOCKS_DIR = Path(__file__).parent / "fixtures" / "llm_mocks"
+
+@pytest.fixture
+def use_mock_llm(monkeypatch):
+    """Serve GeminiAnalysisPipeline.run_analysis from recorded responses.
+    
+    Responses are keyed by the SHA-256 of the formatted transcript. Run with
+    UPDATE_MOCK_CACHE=1 (and a real GEMINI_API_KEY) to call Gemini and
+    re-record them. Returns the list of transcripts the pipeline was called with.
+    """
+    from app.services.analysis import analyzer
+    from app.services.analysis.gemini_pipeline.analysis_pipeline import GeminiAnalysisPipeline
+
+    record = os.environ.get("UPDATE_MOCK_CACHE") == "1"
+    run_analysis = GeminiAnalysisPipeline.run_analysis
+    calls = []
+
+    async def replay(self, transcript_text, *args, **kwargs):
+        calls.append(transcript_text)
+        path = _LLM_MOCKS_DIR / f"{hashlib.sha256(transcript_text.encode()).hexdigest()}.json"
+        if record:
+            result = await run_analysis(self, transcript_text, *args, **kwargs)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(result, indent=2) + "\n")
+            return result
+        if not path.exists():
+            pytest.fail(f"No recorded LLM response {path.name}; rerun with UPDATE_MOCK_CACHE=1")
+        return json.loads(path.read_bytes())
+
+    monkeypatch.setattr(GeminiAnalysisPipeline, "run_analysis", replay)
+    if not record:
+        # Replaying needs no Gemini client
+        monkeypatch.setattr(
+            analyzer, "create_analysis_pipeline", lambda: GeminiAnalysisPipeline.__new__(GeminiAnalysisPipeline)
+        )
+    return calls
 
 #
 # Setup and Teardown
 #
 
-@pytest.fixture(scope="session", autouse=True)
+@pytest.fixture(autouse=True)
+def clear_module_caches():
+    """Empty the process-wide caches so results don't depend on test order."""
+    from app.services.analysis import analysis_cache
+    from app.services.persona import persona_ranker, workflow as persona_workflow
+    from app.services.storage import repository
+    from app.utils import cloud_auth
+    from app.services.analysis.gemini_pipeline.analysis_pipeline import create_analysis_pipeline
+    from app.services.persona.gemini_pipeline.pipeline import create_persona_pipeline
+    from app.api.dependencies import get_analyzer
+
+    caches = (
+        analysis_cache._semantic_entries,
+        analysis_cache._exact_cache,
+        persona_workflow._suggestion_cache,
+        persona_workflow._inflight_suggestions,
+        persona_ranker._persona_embeddings,
+        repository._persona_cache,
+        repository._persona_locks,
+        repository._persona_lock_users,
+        repository._persona_loaders,
+        repository._persona_etags,
+        cloud_auth._id_token_cache,
+        cloud_auth._id_token_locks,
+    )
+    factories = (create_analysis_pipeline, create_persona_pipeline, get_analyzer)
+    for cache in caches:
+        cache.clear()
+    for factory in factories:
+        factory.cache_clear()
+    yield
+    for cache in caches:
+        cache.clear()
+    for factory in factories:
+        factory.cache_clear()
+
+
+@pytest.fixture(scope="session")
 def setup_test_data():
-    """Ensure test data is available for the test suite."""
-    # Ensure the transcripts directory exists
-    transcripts_dir = os.path.join(os.path.dirname(__file__), "transcripts")
-    if not os.path.exists(transcripts_dir):
-        os.makedirs(transcripts_dir)
-    
-    # Check if the test transcript file is already in place
-    test_transcript_path = os.path.join(transcripts_dir, "test_transcript_20250218.vtt")
+    """Ensure the transcripts directory exists; opt in from tests that write to it."""
+    transcripts_dir = Path(__file__).parent / "transcripts"
+    transcripts_dir.mkdir(parents=True, exist_ok=True)
     
-    # Just print a warning if it's not available
-    if not os.path.exists(test_transcript_path):
+    # Just print a warning if the test transcript is not available
+    if not _REAL_TRANSCRIPT.is_file():
         print("Warning: Test transcript file not found in the transcripts directory")
     
-    yield 
\ No newline at end of file
+    yield transcripts_dir
@@ -4,116 +4,98 @@ Integration tests for the analysis chain components.
 These tests verify the integration between different chain components
 and their prompt templates. Tests ensure proper variable handling and chain communication.
 """
-import pytest
 import json
-from unittest.mock import patch, AsyncMock, MagicMock, mock_open, Mock
+import pytest
+from pathlib import Path
 from app.services.analysis.gemini_pipeline.analysis_pipeline import GeminiAnalysisPipeline
-from app.config.api_config import APIConfig
 
-def mock_gemini_response(response_content):
-    """
-    Helper function to mock Gemini responses.
-    
-    Args:
-        response_content: Content to return in mock responses
-    
-    Returns:
-        A mocked response object
-    """
-    mock_response = Mock()
-    mock_response.text = json.dumps(response_content) if isinstance(response_content, dict) else response_content
-    return mock_response
+# Keep the module on one xdist worker so session fixtures are built once
+pytestmark = pytest.mark.xdist_group("interview_analysis")
+
+# Canned Gemini responses for each pipeline step
+MOCK_STEP_RESPONSES = json.loads((Path(__file__).parents[1] / "fixtures" / "mock_gemini_result.json").read_bytes())
+
+TRANSCRIPT = (
+    "[Interviewer] (Chunk 1): What's your biggest challenge?\n"
+    "[Interviewee] (Chunk 2): Our main issue is scaling our infrastructure.\n"
+    "[Interviewee] (Chunk 3): We need a more robust solution that can handle increased load."
+)
+TRANSCRIPT_CHUNKS = [{"number": 1}, {"number": 2}, {"number": 3}]
+
+
+def _pipeline_with_model(model):
+    """Build a pipeline around a mock model without touching the Gemini SDK."""
+    chain = GeminiAnalysisPipeline.__new__(GeminiAnalysisPipeline)
+    chain.model = model
+    return chain
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-@patch('google.generativeai.GenerativeModel')
-async def test_analysis_chain_integration(mock_model_class):
+async def test_analysis_chain_integration(gemini_model_factory):
     """
     Test integration of analysis chain.
     
+    Args:
+        gemini_model_factory: Builds a mock model answering each pipeline step
+    
     Test Steps:
-        1. Create chain with mocked Gemini model
-        2. Test analysis with sample transcript
-        3. Validate response structure
+        1. Create chain with a mocked Gemini model that streams step 1
+        2. Run the analysis, collecting the early excerpts callback
+        3. Validate the streamed problem areas, merged excerpts and synthesis
     """
-    # Create a mock for the Gemini model
-    mock_model = MagicMock()
-    mock_model_class.return_value = mock_model
-    
-    # Mock response for generate_content
-    mock_result = {
-        "problem_areas": [
-            {
-                "problem_id": "p1",
-                "title": "Infrastructure Scaling",
-                "description": "Current systems can't handle growth",
-                "excerpts": [
-                    {
-                        "text": "Our main issue is scaling",
-                        "categories": ["Technical"],
-                        "insight_summary": "Scaling challenges",
-                        "chunk_number": 1
-                    }
-                ]
-            }
-        ],
-        "synthesis": {
-            "background": "Technical discussion",
-            "problem_areas": ["Infrastructure scaling"],
-            "next_steps": ["Evaluate solutions"]
-        }
-    }
-    
-    mock_response = mock_gemini_response(mock_result)
-    mock_model.generate_content.return_value = mock_response
+    model = gemini_model_factory(chunk_size=16, **MOCK_STEP_RESPONSES)
+    chain = _pipeline_with_model(model)
+    early_results = []
     
-    # Create the chain
-    chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-    chain.model = mock_model
-    
-    # Test analysis with a transcript
-    transcript = "[Interviewer] (Chunk 1): What's your biggest challenge?\n[Interviewee] (Chunk 2): Our main issue is scaling."
-    
-    # Run the analysis
-    result = await chain.run_analysis(transcript)
+    result = await chain.run_analysis(
+        TRANSCRIPT, TRANSCRIPT_CHUNKS, ["Interviewer", "Interviewee"], on_excerpts=early_results.append
+    )
     
     # Verify response format
-    assert "problem_areas" in result
-    assert "synthesis" in result
-    assert len(result["problem_areas"]) > 0
+    assert [pa["problem_id"] for pa in result["problem_areas"]] == ["p1", "p2"]
     assert result["problem_areas"][0]["title"] == "Infrastructure Scaling"
-    assert mock_model.generate_content.called
+    assert [len(pa["excerpts"]) for pa in result["problem_areas"]] == [1, 1]
+    assert result["participants"] == ["Interviewer", "Interviewee"]
+    assert result["suggested_title"] == MOCK_STEP_RESPONSES["synthesis"]["suggested_title"]
+    
+    # Excerpts were handed over before synthesis filled in the result
+    assert len(early_results) == 1
+    assert early_results[0]["synthesis"] == "Analysis incomplete."
+    assert early_results[0]["problem_areas"] == result["problem_areas"]
+    
+    # Step 1 is streamed; excerpt and synthesis calls are not
+    calls = model.generate_content_async.await_args_list
+    assert calls[0].kwargs == {"stream": True}
+    assert all(call.kwargs == {} for call in calls[1:])
+    assert len(calls) == 4
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-@patch('google.generativeai.GenerativeModel')
-async def test_chain_error_handling(mock_model_class):
+async def test_chain_error_handling(gemini_model_factory):
     """
     Test error handling in the analysis chain.
     
+    Args:
+        gemini_model_factory: Builds a mock model answering each pipeline step
+    
     Test Steps:
-        1. Create chain with mocked Gemini model that raises an exception
-        2. Verify error handling when model fails
+        1. Fail the excerpt call for one problem area
+        2. Verify that area is kept without excerpts while the other keeps its own
+        3. Verify synthesis still runs
     """
-    # Create a mock for the Gemini model
-    mock_model = MagicMock()
-    mock_model_class.return_value = mock_model
-    
-    # Mock response to raise an exception
-    mock_model.generate_content.side_effect = ValueError("API error")
-    
-    # Create chain
-    chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-    chain.model = mock_model
-    
-    # Test with a transcript
-    transcript = "[Interviewer] (Chunk 1): What's your biggest challenge?\n[Interviewee] (Chunk 2): Our main issue is scaling."
+    excerpts = {**MOCK_STEP_RESPONSES["excerpts"], "p2": ValueError("API error")}
+    model = gemini_model_factory(
+        problem_areas=MOCK_STEP_RESPONSES["problem_areas"], excerpts=excerpts,
+        synthesis=MOCK_STEP_RESPONSES["synthesis"]
+    )
+    chain = _pipeline_with_model(model)
     
-    # Run analysis and expect an error
-    with pytest.raises(ValueError) as excinfo:
-        await chain.run_analysis(transcript)
+    result = await chain.run_analysis(TRANSCRIPT, TRANSCRIPT_CHUNKS, [])
     
-    assert "Analysis chain failed" in str(excinfo.value)
-    assert mock_model.generate_content.called 
\ No newline at end of file
+    excerpts_by_problem = {pa["problem_id"]: pa["excerpts"] for pa in result["problem_areas"]}
+    assert len(excerpts_by_problem["p1"]) == 1
+    assert excerpts_by_problem["p2"] == []
+    assert result["metadata"] == {"problem_areas_count": 2, "excerpts_count": 1}
+    assert result["synthesis"] == MOCK_STEP_RESPONSES["synthesis"]["synthesis"]
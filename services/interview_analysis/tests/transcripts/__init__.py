@@ -0,0 +1 @@
+"""Interview transcripts used as test data."""
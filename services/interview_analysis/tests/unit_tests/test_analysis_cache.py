@@ -0,0 +1,137 @@
+"""
+Unit tests for the analysis result caches.
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.analysis.analysis_cache import SemanticAnalysisCache
+from app.services.analysis.analyzer import TranscriptAnalyzer
+
+ANALYSIS = {"problem_areas": [{"problem_id": "1", "title": "Slow Reporting"}], "synthesis": "Reporting is slow."}
+
+
+def _embedder(vectors_by_text):
+    """Embed each window with the vector of the first key it contains."""
+    async def embed(texts):
+        return [next(v for key, v in vectors_by_text.items() if key in text) for text in texts]
+    return AsyncMock(side_effect=embed)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_semantic_cache_reuses_near_duplicates_in_namespace():
+    """
+    Test that near-duplicate transcripts hit the cache only within their namespace.
+
+    Test Steps:
+        1. Store an analysis for a transcript
+        2. Look up a near-duplicate in the same namespace and verify a hit
+        3. Verify a different namespace and a dissimilar transcript miss
+    """
+    cache = SemanticAnalysisCache(embed_fn=_embedder({
+        "reports": [1.0, 0.0],
+        "Reports": [0.99, 0.05],
+        "hiring": [0.0, 1.0],
+    }))
+    original = await cache.embed("Exporting reports takes hours.")
+    cache.store("project-1:user-1", original, ANALYSIS)
+
+    near_duplicate = await cache.embed("Exporting Reports takes hours!")
+    assert cache.lookup("project-1:user-1", near_duplicate) == ANALYSIS
+    assert cache.lookup("project-2:user-1", near_duplicate) is None
+    assert cache.lookup("project-1:user-1", await cache.embed("We struggle with hiring.")) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_semantic_cache_returns_copies_and_expires():
+    """
+    Test that hits are independent copies and expired entries are not reused.
+
+    Test Steps:
+        1. Store an analysis and mutate the returned hit
+        2. Verify the cached analysis is unchanged
+        3. Store with a zero TTL and verify it misses
+    """
+    cache = SemanticAnalysisCache(embed_fn=_embedder({"reports": [1.0, 0.0]}))
+    embedding = await cache.embed("Exporting reports takes hours.")
+    cache.store("ns", embedding, ANALYSIS)
+
+    hit = cache.lookup("ns", embedding)
+    hit["synthesis"] = "changed"
+    assert cache.lookup("ns", embedding) == ANALYSIS
+
+    expired = SemanticAnalysisCache(embed_fn=cache.embed_fn, ttl_seconds=0)
+    expired.store("expired-ns", embedding, ANALYSIS)
+    assert expired.lookup("expired-ns", embedding) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_analyzer_skips_pipeline_on_semantic_hit():
+    """
+    Test that the analyzer reuses a cached analysis instead of calling Gemini.
+
+    Test Steps:
+        1. Run the pipeline once through the analyzer with a cache namespace
+        2. Run it again for a near-duplicate transcript with different participants
+        3. Verify the pipeline ran once and the hit carries the new participants
+    """
+    analyzer = TranscriptAnalyzer.__new__(TranscriptAnalyzer)
+    analyzer.analysis_pipeline = AsyncMock()
+    analyzer.analysis_pipeline.run_analysis.return_value = dict(ANALYSIS, participants=["Alex"])
+    analyzer.semantic_cache = SemanticAnalysisCache(embed_fn=_embedder({"reports": [1.0, 0.0]}))
+
+    await analyzer._run_pipeline("Exporting reports takes hours.", [], ["Alex"], "ns")
+    result = await analyzer._run_pipeline("Exporting reports takes hours!", [], ["Sam"], "ns")
+
+    analyzer.analysis_pipeline.run_analysis.assert_awaited_once()
+    assert result["participants"] == ["Sam"]
+    assert result["synthesis"] == ANALYSIS["synthesis"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_analyzer_exact_cache_hit_and_opt_out():
+    """
+    Test exact-match reuse and that a missing namespace always runs the pipeline.
+
+    Test Steps:
+        1. Analyze a transcript twice, the second time with different whitespace
+        2. Verify the pipeline ran once
+        3. Analyze it without a namespace and verify the pipeline ran again
+    """
+    analyzer = TranscriptAnalyzer.__new__(TranscriptAnalyzer)
+    analyzer.analysis_pipeline = AsyncMock()
+    analyzer.analysis_pipeline.run_analysis.return_value = dict(ANALYSIS, participants=["Alex"])
+    analyzer.semantic_cache = None
+
+    await analyzer._run_pipeline("[Alex] (Chunk 1): Exporting reports takes hours.", [], ["Alex"], "ns")
+    result = await analyzer._run_pipeline("[Alex] (Chunk 1):  Exporting reports takes hours.\n", [], ["Alex"], "ns")
+    assert analyzer.analysis_pipeline.run_analysis.await_count == 1
+    assert result["synthesis"] == ANALYSIS["synthesis"]
+
+    await analyzer._run_pipeline("[Alex] (Chunk 1): Exporting reports takes hours.", [], ["Alex"], None)
+    assert analyzer.analysis_pipeline.run_analysis.await_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_analyzer_skips_semantic_cache_when_not_reusing_similar():
+    """
+    Test that near-duplicates are not reused when the caller disallows it.
+
+    Test Steps:
+        1. Analyze a transcript, then a near-duplicate, in the same namespace with reuse_similar=False
+        2. Verify the pipeline ran both times and nothing was embedded
+    """
+    analyzer = TranscriptAnalyzer.__new__(TranscriptAnalyzer)
+    analyzer.analysis_pipeline = AsyncMock()
+    analyzer.analysis_pipeline.run_analysis.return_value = dict(ANALYSIS, participants=["Alex"])
+    analyzer.semantic_cache = SemanticAnalysisCache(embed_fn=_embedder({"reports": [1.0, 0.0]}))
+
+    await analyzer._run_pipeline("Exporting reports takes hours.", [], ["Alex"], ":", reuse_similar=False)
+    await analyzer._run_pipeline("Exporting reports takes hours!", [], ["Sam"], ":", reuse_similar=False)
+
+    assert analyzer.analysis_pipeline.run_analysis.await_count == 2
+    analyzer.semantic_cache.embed_fn.assert_not_awaited()
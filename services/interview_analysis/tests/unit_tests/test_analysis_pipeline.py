@@ -0,0 +1,216 @@
+"""
+Unit tests for the GeminiAnalysisPipeline.
+
+These tests drive the multi-step analysis with a mocked Gemini model and
+verify how the per-step responses are combined.
+"""
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from tenacity import wait_none
+
+from app.services.analysis.gemini_pipeline.analysis_pipeline import GeminiAnalysisPipeline, _extract_and_parse_json
+
+TRANSCRIPT_TEXT = (
+    "[Interviewer] (Chunk 1): What slows you down?\n"
+    "[Interviewee] (Chunk 2): Exporting reports takes hours every week."
+)
+TRANSCRIPT_CHUNKS = [
+    {"number": 1, "speaker": "Interviewer", "text": "What slows you down?"},
+    {"number": 2, "speaker": "Interviewee", "text": "Exporting reports takes hours every week."}
+]
+PROBLEM_AREAS = [
+    {"problem_id": "1", "title": "Slow Reporting", "description": "Reports take hours."},
+    {"problem_id": "2", "title": "Manual Exports", "description": "Exports are manual."}
+]
+
+
+def _response(data):
+    """Wrap a JSON payload the way the Gemini SDK exposes response text."""
+    return SimpleNamespace(text=f"```json\n{json.dumps(data)}\n```")
+
+
+async def _stream(data, chunk_size=7):
+    """Stream a JSON payload in small chunks, like a streamed Gemini response."""
+    text = json.dumps(data)
+    for i in range(0, len(text), chunk_size):
+        yield SimpleNamespace(text=text[i:i + chunk_size])
+
+
+def _fake_generate(prompt, stream=False):
+    """Answer each analysis step based on its prompt."""
+    if "identify the key problem areas" in prompt:
+        assert stream
+        return _stream({"problem_areas": PROBLEM_AREAS})
+    if "Find relevant excerpts" in prompt:
+        # The prompt's own example uses problem_id "1", so match on the title instead
+        problem_id = "2" if "Manual Exports" in prompt else "1"
+        return _response({"problem_areas": [{"problem_id": problem_id, "excerpts": [{
+            "quote": f"Quote for {problem_id}",
+            "categories": "Pain Point",
+            "insight": "Reporting is slow.",
+            "chunk_number": "2"
+        }]}]})
+    return _response({"synthesis": "Reporting is the main pain.", "suggested_title": "Interview with Sam"})
+
+
+@pytest.fixture
+def pipeline():
+    """Create a pipeline around a mocked Gemini model."""
+    instance = GeminiAnalysisPipeline.__new__(GeminiAnalysisPipeline)
+    instance.model = AsyncMock()
+    instance.model.generate_content_async.side_effect = _fake_generate
+    return instance
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_run_analysis_extracts_excerpts_per_problem_area(pipeline):
+    """
+    Test that excerpts are requested once per problem area and merged back.
+
+    Test Steps:
+        1. Run the analysis with two identified problem areas
+        2. Verify one excerpt request was made per problem area
+        3. Verify each problem area got its own normalized excerpts
+    """
+    result = await pipeline.run_analysis(TRANSCRIPT_TEXT, TRANSCRIPT_CHUNKS, ["Interviewer", "Interviewee"])
+
+    # Problem areas, two excerpt requests, synthesis
+    assert pipeline.model.generate_content_async.await_count == 4
+    assert [pa["excerpts"][0]["quote"] for pa in result["problem_areas"]] == ["Quote for 1", "Quote for 2"]
+    assert result["problem_areas"][0]["excerpts"][0]["categories"] == ["Pain Point"]
+    assert result["problem_areas"][0]["excerpts"][0]["chunk_number"] == 2
+    assert result["metadata"] == {"problem_areas_count": 2, "excerpts_count": 2}
+    assert result["suggested_title"] == "Interview with Sam"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_excerpt_request_only_affects_its_problem_area(pipeline):
+    """
+    Test that one failing excerpt request leaves the other problem areas intact.
+
+    Test Steps:
+        1. Make the excerpt request for problem area 2 raise
+        2. Run the analysis
+        3. Verify problem area 1 keeps its excerpts and problem area 2 gets none
+    """
+    def generate(prompt, stream=False):
+        if "Find relevant excerpts" in prompt and "Manual Exports" in prompt:
+            raise RuntimeError("deadline exceeded")
+        return _fake_generate(prompt, stream)
+
+    pipeline.model.generate_content_async.side_effect = generate
+
+    result = await pipeline.run_analysis(TRANSCRIPT_TEXT, TRANSCRIPT_CHUNKS, [])
+
+    assert len(result["problem_areas"][0]["excerpts"]) == 1
+    assert result["problem_areas"][1]["excerpts"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_on_excerpts_receives_result_before_synthesis(pipeline):
+    """
+    Test that the partial result is handed over before the synthesis step.
+    
+    Test Steps:
+        1. Run the analysis with an on_excerpts callback
+        2. Verify the callback saw the excerpts and metadata but no synthesis
+        3. Verify the returned result has the synthesis
+    """
+    partials = []
+
+    result = await pipeline.run_analysis(TRANSCRIPT_TEXT, TRANSCRIPT_CHUNKS, [], on_excerpts=partials.append)
+
+    assert len(partials) == 1
+    assert partials[0]["metadata"] == {"problem_areas_count": 2, "excerpts_count": 2}
+    assert partials[0]["synthesis"] == "Analysis incomplete."
+    assert partials[0]["suggested_title"] is None
+    assert result["synthesis"] == "Reporting is the main pain."
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("response_text", [
+    '{"synthesis": "Done."}',
+    '```json\n{"synthesis": "Done."}\n```',
+    'Here you go: {"synthesis": "Done."} Thanks!',
+])
+def test_extract_and_parse_json_handles_json_mode_and_fenced_output(response_text):
+    """
+    Test that bare JSON-mode responses and older fenced responses both parse.
+    
+    Test Steps:
+        1. Parse bare, fenced and surrounded JSON
+        2. Verify each yields the same object
+    """
+    assert _extract_and_parse_json(response_text) == {"synthesis": "Done."}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_excerpts_start_while_problem_areas_stream(pipeline):
+    """
+    Test that excerpt extraction starts before the problem area stream finishes.
+    
+    Test Steps:
+        1. Stream the problem areas and record calls made while the stream is open
+        2. Verify the first area's excerpt request was made mid-stream
+        3. Verify both areas still get their excerpts
+    """
+    calls_during_stream = []
+
+    async def slow_stream(data):
+        async for chunk in _stream(data):
+            # Let started tasks run, as waiting on the network would
+            await asyncio.sleep(0)
+            yield chunk
+        calls_during_stream.extend(call.args[0] for call in pipeline.model.generate_content_async.call_args_list)
+
+    def generate(prompt, stream=False):
+        if "identify the key problem areas" in prompt:
+            return slow_stream({"problem_areas": PROBLEM_AREAS})
+        return _fake_generate(prompt, stream)
+
+    pipeline.model.generate_content_async.side_effect = generate
+
+    result = await pipeline.run_analysis(TRANSCRIPT_TEXT, TRANSCRIPT_CHUNKS, [])
+
+    assert any("Find relevant excerpts" in prompt and "Slow Reporting" in prompt for prompt in calls_during_stream)
+    assert [pa["excerpts"][0]["quote"] for pa in result["problem_areas"]] == ["Quote for 1", "Quote for 2"]
+
+
+class _RateLimited(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted."""
+    code = 429
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch.object(GeminiAnalysisPipeline._generate.retry, "wait", wait_none())
+async def test_transient_errors_retry_only_the_failing_step(pipeline):
+    """
+    Test that a rate-limited step is retried without repeating the others.
+    
+    Test Steps:
+        1. Make the synthesis call fail with a 429 once
+        2. Run the analysis
+        3. Verify the synthesis succeeded on retry and the other steps ran once
+    """
+    failures = [_RateLimited("quota exceeded")]
+
+    def generate(prompt, stream=False):
+        if "identify the key problem areas" not in prompt and "Find relevant excerpts" not in prompt and failures:
+            raise failures.pop()
+        return _fake_generate(prompt, stream)
+
+    pipeline.model.generate_content_async.side_effect = generate
+
+    result = await pipeline.run_analysis(TRANSCRIPT_TEXT, TRANSCRIPT_CHUNKS, [])
+
+    assert result["synthesis"] == "Reporting is the main pain."
+    # Problem areas, two excerpt requests, synthesis twice
+    assert pipeline.model.generate_content_async.await_count == 5
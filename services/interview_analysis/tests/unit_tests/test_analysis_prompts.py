@@ -0,0 +1,34 @@
+"""
+Unit tests for the pre-rendered analysis prompts.
+
+These tests check that the compiled renderers produce exactly what the
+LangChain templates would.
+"""
+import pytest
+
+from app.services.analysis.gemini_pipeline.analysis_prompts import (
+    PROBLEM_PROMPT, EXCERPT_PROMPT, SYNTHESIS_PROMPT, compile_prompt
+)
+
+VALUES = {
+    "transcript": "[Alex] (Chunk 1): Exports {take} hours.",
+    "problem_areas": '{"problem_areas": [{"problem_id": "1"}]}',
+    "analyzed_content": '{"problem_areas": []}',
+    "max_chunk_number": 12,
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("prompt", [PROBLEM_PROMPT, EXCERPT_PROMPT, SYNTHESIS_PROMPT])
+def test_compiled_prompt_matches_template(prompt):
+    """
+    Test that a compiled prompt renders the same text as its template.
+    
+    Test Steps:
+        1. Compile the prompt
+        2. Render it with values containing braces and a non-string number
+        3. Verify the result equals format_prompt(...).to_string()
+    """
+    values = {name: VALUES[name] for name in prompt.input_variables}
+
+    assert compile_prompt(prompt)(**values) == prompt.format_prompt(**values).to_string()
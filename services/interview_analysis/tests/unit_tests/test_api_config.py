@@ -0,0 +1,70 @@
+"""
+Unit tests for the Gemini API configuration helpers.
+"""
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.api.dependencies import get_analyzer
+from app.config import api_config
+from app.services.analysis.gemini_pipeline.analysis_pipeline import create_analysis_pipeline
+
+
+@pytest.mark.unit
+def test_configure_genai_only_reconfigures_on_key_change():
+    """
+    Test that genai is configured once per API key.
+
+    Test Steps:
+        1. Configure twice with the same key and once with a new key
+        2. Verify genai.configure ran only for the first call and the key change
+    """
+    mock_genai = MagicMock()
+    with patch.dict(sys.modules, {"google.generativeai": mock_genai}), \
+         patch.object(api_config, "_configured_api_key", None):
+        api_config.configure_genai("key-1")
+        api_config.configure_genai("key-1")
+        api_config.configure_genai("key-2")
+
+    assert [c.kwargs["api_key"] for c in mock_genai.configure.call_args_list] == ["key-1", "key-2"]
+
+
+@pytest.mark.unit
+@patch.dict('os.environ', {"GEMINI_API_KEY": "test-key"})
+@patch('app.services.analysis.gemini_pipeline.analysis_pipeline.GeminiAnalysisPipeline')
+@patch('app.services.analysis.gemini_pipeline.analysis_pipeline.configure_genai')
+def test_create_analysis_pipeline_is_shared(mock_configure, mock_pipeline_class):
+    """
+    Test that the analysis pipeline is created once and reused.
+    
+    Args:
+        mock_configure: Mock for the genai configuration helper
+        mock_pipeline_class: Mock for the pipeline class
+    
+    Test Steps:
+        1. Create the pipeline twice
+        2. Verify both calls return the same instance built once
+    """
+    assert create_analysis_pipeline() is create_analysis_pipeline()
+    mock_pipeline_class.assert_called_once()
+
+
+@pytest.mark.unit
+@patch('app.api.dependencies.settings')
+@patch('app.api.dependencies.TranscriptAnalyzer')
+def test_get_analyzer_is_shared(mock_analyzer_class, mock_settings):
+    """
+    Test that the analyzer dependency is built once and reused across requests.
+    
+    Args:
+        mock_analyzer_class: Mock for the analyzer class
+        mock_settings: Mock settings with the semantic cache disabled
+    
+    Test Steps:
+        1. Resolve the dependency twice
+        2. Verify both calls return the same analyzer built once
+    """
+    mock_settings.ANALYSIS_SEMANTIC_CACHE_TTL = 0
+
+    assert get_analyzer() is get_analyzer()
+    mock_analyzer_class.assert_called_once_with(semantic_cache=None)
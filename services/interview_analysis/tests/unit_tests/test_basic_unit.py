@@ -7,20 +7,22 @@ VTT files, including timestamp and speaker identification patterns.
 import pytest
 import re
 
+# Common timestamp pattern used in VTT files
+TIMESTAMP_PATTERN = re.compile(r'(\d{2}):(\d{2}):(\d{2})\.(\d{3})\s+-->\s+(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
+
+# Common pattern to extract speaker from transcript lines
+SPEAKER_PATTERN = re.compile(r'^([^:]+):\s+(.+)$')
+
 @pytest.mark.unit
 def test_timestamp_regex():
     """
     Test VTT timestamp pattern validation.
     
     Test Steps:
-        1. Define timestamp regex pattern
-        2. Test against valid timestamp formats
-        3. Test against invalid timestamp formats
-        4. Verify pattern matching behavior
+        1. Test against valid timestamp formats
+        2. Test against invalid timestamp formats
+        3. Verify pattern matching behavior
     """
-    # Common timestamp pattern used in VTT files
-    timestamp_pattern = re.compile(r'(\d{2}):(\d{2}):(\d{2})\.(\d{3})\s+-->\s+(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
-    
     # Valid timestamps
     valid_timestamps = [
         "00:00:00.000 --> 00:00:05.000",
@@ -36,11 +38,11 @@ def test_timestamp_regex():
     
     # Test valid timestamps
     for timestamp in valid_timestamps:
-        assert timestamp_pattern.match(timestamp) is not None
+        assert TIMESTAMP_PATTERN.match(timestamp) is not None
     
     # Test invalid timestamps
     for timestamp in invalid_timestamps:
-        assert timestamp_pattern.match(timestamp) is None
+        assert TIMESTAMP_PATTERN.match(timestamp) is None
 
 @pytest.mark.unit
 def test_speaker_regex():
@@ -48,14 +50,10 @@ def test_speaker_regex():
     Test speaker identification pattern validation.
     
     Test Steps:
-        1. Define speaker regex pattern
-        2. Test against valid speaker formats
-        3. Test against invalid speaker formats
-        4. Verify pattern capture groups
+        1. Test against valid speaker formats
+        2. Test against invalid speaker formats
+        3. Verify pattern capture groups
     """
-    # Common pattern to extract speaker from transcript lines
-    speaker_pattern = re.compile(r'^([^:]+):\s+(.+)$')
-    
     # Valid speaker lines
     valid_lines = [
         "Interviewer: Tell me about your experience.",
@@ -72,7 +70,7 @@ def test_speaker_regex():
     
     # Test valid lines
     for line in valid_lines:
-        match = speaker_pattern.match(line)
+        match = SPEAKER_PATTERN.match(line)
         assert match is not None
         assert len(match.groups()) == 2
         assert match.group(1)  # Speaker should be captured
@@ -80,5 +78,5 @@ def test_speaker_regex():
     
     # Test invalid lines
     for line in invalid_lines:
-        match = speaker_pattern.match(line)
+        match = SPEAKER_PATTERN.match(line)
         assert match is None 
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Unit tests for the Cloud Run service-to-service auth helpers.
+
+These tests verify how ID tokens are fetched and reused between calls.
+"""
+import time
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.utils import cloud_auth
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.utils.cloud_auth.id_token.fetch_id_token')
+async def test_get_id_token_is_cached_until_near_expiry(mock_fetch_id_token):
+    """
+    Test that ID tokens are reused per audience until close to expiry.
+
+    Args:
+        mock_fetch_id_token: Mock for the metadata server token fetch
+
+    Test Steps:
+        1. Fetch a token twice for the same audience
+        2. Verify the metadata server was hit once
+        3. Expire the cached token and verify the next call fetches again
+    """
+    audience = "https://database-service.example.run.app"
+    mock_fetch_id_token.return_value = "token-1"
+    cloud_auth._id_token_cache.pop(audience, None)
+
+    with patch('app.utils.cloud_auth._token_expiry', return_value=time.time() + 3600):
+        assert await cloud_auth.get_id_token(audience) == "token-1"
+        assert await cloud_auth.get_id_token(audience) == "token-1"
+    assert mock_fetch_id_token.call_count == 1
+
+    # Inside the refresh margin the token is treated as expired
+    cloud_auth._id_token_cache[audience] = ("token-1", time.time() + 60)
+    mock_fetch_id_token.return_value = "token-2"
+    with patch('app.utils.cloud_auth._token_expiry', return_value=time.time() + 3600):
+        assert await cloud_auth.get_id_token(audience) == "token-2"
+    assert mock_fetch_id_token.call_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_conditional_get_reports_etag_and_not_modified(monkeypatch):
+    """
+    Test that response ETags are surfaced on request and a 304 is reported as not modified.
+
+    Args:
+        monkeypatch: Pytest fixture used to force development mode
+
+    Test Steps:
+        1. Serve a JSON body with an ETag, and a 304 when If-None-Match matches it
+        2. Verify the body only carries its ETag when the caller asks for it
+        3. Verify the conditional call returns the not_modified status
+    """
+    monkeypatch.setattr(cloud_auth, "_IS_PRODUCTION", False)
+
+    def handler(request):
+        if request.headers.get("if-none-match") == 'W/"abc"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"status": "success", "data": []}, headers={"ETag": 'W/"abc"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch('app.utils.cloud_auth.get_http_client', return_value=client):
+        plain = await cloud_auth.call_authenticated_service("http://database-service/personas")
+        first = await cloud_auth.call_authenticated_service("http://database-service/personas", include_etag=True)
+        second = await cloud_auth.call_authenticated_service(
+            "http://database-service/personas", headers={"If-None-Match": first["etag"]}
+        )
+
+    assert plain == {"status": "success", "data": []}
+    assert first == {"status": "success", "data": [], "etag": 'W/"abc"'}
+    assert second == {"status": "not_modified", "status_code": 304}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.utils.cloud_auth.httpx.AsyncClient')
+async def test_shared_http_client_keeps_connections_alive(mock_client_class, monkeypatch):
+    """
+    Test that the shared client is created once with a long keep-alive expiry.
+    
+    Args:
+        mock_client_class: Mock for the httpx.AsyncClient constructor
+        monkeypatch: Pytest fixture used to set aside the app's own client
+    
+    Test Steps:
+        1. Get the shared client twice
+        2. Verify one client was created with the longer keep-alive expiry
+        3. Close it and verify the next call creates a new client
+    """
+    # The session test client's startup may already have created the real one
+    monkeypatch.setattr(cloud_auth, "_http_client", None)
+    mock_client_class.return_value.is_closed = False
+    mock_client_class.return_value.aclose = AsyncMock()
+
+    assert cloud_auth.get_http_client() is cloud_auth.get_http_client()
+    limits = mock_client_class.call_args.kwargs["limits"]
+    assert limits.keepalive_expiry == cloud_auth._HTTP_KEEPALIVE_EXPIRY
+    assert mock_client_class.call_count == 1
+
+    await cloud_auth.close_http_client()
+    cloud_auth.get_http_client()
+    assert mock_client_class.call_count == 2
+    await cloud_auth.close_http_client()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.utils.cloud_auth.get_id_token', new_callable=AsyncMock, return_value="token-1")
+async def test_production_call_is_authenticated_and_reports_errors(mock_get_id_token, monkeypatch):
+    """
+    Test that production calls carry the ID token and error responses keep their status code.
+    
+    Args:
+        mock_get_id_token: Mock for the cached ID token lookup
+        monkeypatch: Pytest fixture used to force production mode
+    
+    Test Steps:
+        1. Serve a 500 from a mocked service in production mode
+        2. Verify the token was requested for the service's base URL and sent as a bearer token
+        3. Verify the error dict carries the message and status code
+    """
+    monkeypatch.setattr(cloud_auth, "_IS_PRODUCTION", True)
+    seen = {}
+
+    def handler(request):
+        seen["authorization"] = request.headers.get("authorization")
+        return httpx.Response(500, text="boom")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = await cloud_auth.call_authenticated_service(
+        "https://database-service.example.run.app/interviews", method="post", json_data={"title": "t"}, client=client
+    )
+
+    mock_get_id_token.assert_awaited_once_with("https://database-service.example.run.app")
+    assert seen["authorization"] == "Bearer token-1"
+    assert result == {"status": "error", "message": "Service returned 500: boom", "status_code": 500}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("service_url, audience", [
+    ("https://database-service.example.run.app/interviews/123?fields=id", "https://database-service.example.run.app"),
+    ("http://localhost:5001/personas", "http://localhost:5001"),
+    ("http://[::1]:5001/interviews", "http://[::1]:5001"),
+    ("database-service", "database-service"),
+])
+def test_audience_for(service_url, audience):
+    """
+    Test that the token audience is the scheme and host of the service URL.
+    
+    Test Steps:
+        1. Derive the audience for URLs with paths, queries, ports and IPv6 hosts
+        2. Verify a URL without a host is used as-is
+    """
+    assert cloud_auth._audience_for(service_url) == audience
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_transport_errors_are_returned_and_programming_errors_raised(monkeypatch):
+    """
+    Test that connection failures become error dicts while bugs propagate.
+
+    Args:
+        monkeypatch: Pytest fixture used to force development mode
+
+    Test Steps:
+        1. Make the transport fail to connect and verify an error dict is returned
+        2. Make the transport raise a TypeError and verify it propagates
+    """
+    monkeypatch.setattr(cloud_auth, "_IS_PRODUCTION", False)
+    errors = [httpx.ConnectError("refused"), TypeError("bad argument")]
+
+    def handler(request):
+        raise errors.pop(0)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = await cloud_auth.call_authenticated_service("http://database-service/interviews", client=client)
+    assert result == {"status": "error", "message": "Connection error: refused"}
+
+    with pytest.raises(TypeError):
+        await cloud_auth.call_authenticated_service("http://database-service/interviews", client=client)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_invalid_json_response_is_returned_as_error(monkeypatch):
+    """
+    Test that a non-JSON success body is reported with the raw response.
+
+    Args:
+        monkeypatch: Pytest fixture used to force development mode
+
+    Test Steps:
+        1. Serve a 200 response whose body is not JSON
+        2. Verify the error dict carries the parse failure and the raw body
+    """
+    monkeypatch.setattr(cloud_auth, "_IS_PRODUCTION", False)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<html>")))
+
+    result = await cloud_auth.call_authenticated_service("http://database-service/interviews", client=client)
+
+    assert result["status"] == "error"
+    assert result["message"].startswith("Failed to parse JSON response")
+    assert result["raw_response"] == "<html>"
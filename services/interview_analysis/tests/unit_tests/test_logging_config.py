@@ -0,0 +1,38 @@
+"""
+Unit tests for the logging configuration.
+"""
+import logging
+import logging.handlers
+import pytest
+
+from app.config import logging_config
+
+
+@pytest.mark.unit
+def test_stop_logging_restores_original_handlers():
+    """
+    Test that stopping the queue listener puts the original handlers back.
+
+    Test Steps:
+        1. Route a logger through the queue listener
+        2. Stop logging twice
+        3. Verify the logger has its original handler again and no listener is left running
+    """
+    # Start from the plain handlers, in case the app already started a listener
+    logging_config.stop_logging()
+    logger = logging.getLogger("fastapi")
+    handler = logging.NullHandler()
+    saved = logger.handlers
+    logger.handlers = [handler]
+    try:
+        logging_config._start_queue_listener()
+        assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+
+        logging_config.stop_logging()
+        logging_config.stop_logging()
+
+        assert logger.handlers == [handler]
+        assert logging_config._queue_listener is None
+    finally:
+        logging_config.stop_logging()
+        logger.handlers = saved
@@ -0,0 +1,59 @@
+"""
+Unit tests for parsing Gemini persona suggestion responses.
+
+These tests check that the hand-written validation in the pipeline stays in
+line with the PersonaSuggestions model.
+"""
+import json
+import pytest
+from pydantic import ValidationError
+
+from app.services.persona.gemini_pipeline.pipeline import GeminiPersonaPipeline
+from app.services.persona.gemini_pipeline.persona_response_models import PersonaSuggestions
+
+
+@pytest.fixture
+def pipeline():
+    """Create a pipeline without configuring a Gemini model; parsing needs none."""
+    return GeminiPersonaPipeline.__new__(GeminiPersonaPipeline)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("data", [
+    {"existing_persona_ids": ["tag-1"], "suggested_new_personas": ["b2b saas"]},
+    {"existing_persona_ids": ["tag-1"]},
+    {},
+    {"existing_persona_ids": [], "suggested_new_personas": [], "reasoning": "extra key"},
+])
+def test_parse_response_matches_model(pipeline, data):
+    """
+    Test that valid responses parse exactly like the PersonaSuggestions model.
+
+    Test Steps:
+        1. Parse a response covering full, missing-field and unknown-key payloads
+        2. Verify the result equals PersonaSuggestions(**data).model_dump()
+    """
+    response_text = f"```json\n{json.dumps(data)}\n```"
+
+    assert pipeline._parse_response(response_text) == PersonaSuggestions(**data).model_dump()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("data", [
+    {"existing_persona_ids": "tag-1"},
+    {"suggested_new_personas": {"name": "Founder"}},
+    {"existing_persona_ids": [1, 2]},
+    {"suggested_new_personas": ["b2b saas", None]},
+])
+def test_parse_response_rejects_what_model_rejects(pipeline, data):
+    """
+    Test that invalid responses are rejected like the PersonaSuggestions model.
+
+    Test Steps:
+        1. Parse payloads with non-list values and non-string items
+        2. Verify both the model and the pipeline reject them
+    """
+    with pytest.raises(ValidationError):
+        PersonaSuggestions(**data)
+    with pytest.raises(ValueError):
+        pipeline._parse_response(json.dumps(data))
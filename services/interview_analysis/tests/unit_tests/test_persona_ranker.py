@@ -0,0 +1,79 @@
+"""
+Unit tests for the PersonaRanker embedding pre-filter.
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services.persona import persona_ranker
+from app.services.persona.persona_ranker import PersonaRanker
+
+# Toy 2-d embeddings: "founder"-like texts point along x, "engineer"-like along y
+VECTORS = {
+    "Founder": [1.0, 0.0],
+    "CEO": [0.9, 0.1],
+    "Engineer": [0.0, 1.0],
+    "Designer": [0.2, 0.8],
+}
+
+
+def _fake_embed(transcript_vector):
+    async def embed(texts):
+        return [transcript_vector] + [VECTORS[text] for text in texts[1:]]
+    return AsyncMock(side_effect=embed)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_top_personas_keeps_most_similar_in_order():
+    """
+    Test that the ranker keeps the top_k most similar personas.
+
+    Test Steps:
+        1. Rank four personas against a founder-like transcript with top_k=2
+        2. Verify the two founder-like personas are kept in their original order
+    """
+    personas = [{"id": str(i), "name": name} for i, name in enumerate(VECTORS)]
+    ranker = PersonaRanker(embed_fn=_fake_embed([1.0, 0.05]), top_k=2)
+
+    result = await ranker.top_personas("[Interviewee] (Chunk 1): I started the company.", personas)
+
+    assert [persona["name"] for persona in result] == ["Founder", "CEO"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_top_personas_skips_small_lists():
+    """
+    Test that lists within top_k are returned as-is without embedding.
+
+    Test Steps:
+        1. Rank two personas with top_k=10
+        2. Verify the list is unchanged and the embedder was never called
+    """
+    embed_fn = AsyncMock()
+    personas = [{"id": "1", "name": "Founder"}, {"id": "2", "name": "Engineer"}]
+    ranker = PersonaRanker(embed_fn=embed_fn, top_k=10)
+
+    assert await ranker.top_personas("transcript", personas) is personas
+    embed_fn.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_persona_embedding_cache_is_bounded():
+    """
+    Test that the persona embedding cache evicts old entries when full.
+
+    Test Steps:
+        1. Shrink the cache limit to 2 and rank four personas with top_k=1
+        2. Verify ranking still uses all four embeddings and the cache holds at most 2
+    """
+    personas = [{"id": str(i), "name": name} for i, name in enumerate(VECTORS)]
+    ranker = PersonaRanker(embed_fn=_fake_embed([0.0, 1.0]), top_k=1)
+
+    with patch.object(persona_ranker, "_PERSONA_EMBEDDING_CACHE_MAXSIZE", 2):
+        result = await ranker.top_personas("[Interviewee] (Chunk 1): I write the code.", personas)
+
+        assert len(persona_ranker._persona_embeddings) <= 2
+
+    assert [persona["name"] for persona in result] == ["Engineer"]
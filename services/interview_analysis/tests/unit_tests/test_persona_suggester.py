@@ -0,0 +1,58 @@
+"""
+Unit tests for the PersonaSuggester class.
+
+These tests verify when the suggester calls the Gemini pipeline and how
+the suggestion mode shapes the result.
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.persona.persona_suggester import PersonaSuggester, MIN_TRANSCRIPT_LENGTH
+
+LONG_TRANSCRIPT = "[Interviewee] (Chunk 1): " + "We track every lead by hand. " * 40
+EMPTY_SUGGESTIONS = {"existing_persona_ids": [], "suggested_new_personas": []}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_skips_short_transcripts():
+    """
+    Test that transcripts below the minimum length never reach Gemini.
+
+    Test Steps:
+        1. Suggest personas for a short transcript
+        2. Verify empty suggestions are returned without calling the pipeline
+    """
+    mock_pipeline = AsyncMock()
+    suggester = PersonaSuggester(pipeline=mock_pipeline)
+
+    result = await suggester.suggest_personas("x" * (MIN_TRANSCRIPT_LENGTH - 1), [{"id": "tag-1", "name": "Founder"}])
+
+    assert result == EMPTY_SUGGESTIONS
+    mock_pipeline.run_suggestion.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_existing_only_mode():
+    """
+    Test the existing_only mode.
+
+    Test Steps:
+        1. Verify no pipeline call when there are no existing personas to match
+        2. Verify new persona suggestions are dropped when there are
+    """
+    mock_pipeline = AsyncMock()
+    mock_pipeline.run_suggestion.return_value = {
+        "existing_persona_ids": ["tag-1"],
+        "suggested_new_personas": ["b2b saas"]
+    }
+    suggester = PersonaSuggester(pipeline=mock_pipeline)
+
+    assert await suggester.suggest_personas(LONG_TRANSCRIPT, [], mode="existing_only") == EMPTY_SUGGESTIONS
+    mock_pipeline.run_suggestion.assert_not_called()
+
+    result = await suggester.suggest_personas(
+        LONG_TRANSCRIPT, [{"id": "tag-1", "name": "Founder"}], mode="existing_only"
+    )
+    assert result == {"existing_persona_ids": ["tag-1"], "suggested_new_personas": []}
@@ -0,0 +1,290 @@
+"""
+Unit tests for the PersonaWorkflow class.
+
+These tests verify how the persona suggestion workflow gathers its inputs
+from the repository and hands them to the suggester.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.api import dependencies
+from app.services.persona.workflow import PersonaWorkflow
+from app.utils.errors import NotFoundError, StorageError, WorkflowError
+
+SAMPLE_INTERVIEW = {
+    "id": "interview-1",
+    "analysis_data": {
+        "transcript": [
+            {"number": 1, "speaker": "Interviewer", "text": "Tell me about your role."},
+            {"number": 2, "speaker": "Interviewee", "text": "I run a small B2B SaaS startup."}
+        ]
+    }
+}
+
+SAMPLE_FORMATTED_TRANSCRIPT = (
+    "[Interviewer] (Chunk 1): Tell me about your role.\n"
+    "[Interviewee] (Chunk 2): I run a small B2B SaaS startup."
+)
+
+SAMPLE_PERSONAS = [{"id": "tag-founder", "name": "Founder"}]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_for_interview():
+    """
+    Test a successful persona suggestion run using the stored formatted transcript.
+
+    Test Steps:
+        1. Mock repository lookups and suggester output
+        2. Run the workflow
+        3. Verify the stored transcript is used without fetching the full interview
+    """
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = SAMPLE_FORMATTED_TRANSCRIPT
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS
+    mock_suggester = AsyncMock()
+    mock_suggester.suggest_personas.return_value = {
+        "existing_persona_ids": ["tag-founder"],
+        "suggested_new_personas": ["b2b saas"]
+    }
+
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+    result = await workflow.suggest_personas_for_interview("interview-1", "user-1")
+
+    assert result["existing_persona_ids"] == ["tag-founder"]
+    mock_repository.get_formatted_transcript.assert_awaited_once_with("interview-1")
+    mock_repository.get_personas_for_user.assert_awaited_once_with("user-1")
+    mock_repository.get_interview_by_id.assert_not_called()
+    mock_suggester.suggest_personas.assert_awaited_once_with(
+        SAMPLE_FORMATTED_TRANSCRIPT, SAMPLE_PERSONAS, mode="all"
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_legacy_interview():
+    """
+    Test that interviews without a stored formatted transcript fall back to the chunks.
+
+    Test Steps:
+        1. Return no stored transcript and a full interview record
+        2. Run the workflow
+        3. Verify the suggester got the transcript formatted from the chunks
+    """
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = None
+    mock_repository.get_interview_by_id.return_value = SAMPLE_INTERVIEW
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS
+    mock_suggester = AsyncMock()
+    mock_suggester.suggest_personas.return_value = {
+        "existing_persona_ids": [],
+        "suggested_new_personas": []
+    }
+
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+    await workflow.suggest_personas_for_interview("legacy-interview", "user-1")
+
+    mock_repository.get_interview_by_id.assert_awaited_once_with(
+        "legacy-interview", fields=["analysis_data.transcript"]
+    )
+    transcript, personas = mock_suggester.suggest_personas.call_args.args
+    assert transcript == SAMPLE_FORMATTED_TRANSCRIPT
+    assert personas == SAMPLE_PERSONAS
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_interview_not_found():
+    """
+    Test that a missing interview surfaces as NotFoundError.
+
+    Test Steps:
+        1. Make the interview lookup raise NotFoundError and the persona lookup fail too
+        2. Verify NotFoundError takes precedence and the suggester is never called
+    """
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.side_effect = NotFoundError("Interview not found")
+    mock_repository.get_personas_for_user.side_effect = StorageError("Database unavailable")
+    mock_suggester = AsyncMock()
+
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+    with pytest.raises(NotFoundError):
+        await workflow.suggest_personas_for_interview("missing", "user-1")
+
+    mock_suggester.suggest_personas.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_storage_error():
+    """
+    Test that repository failures are wrapped in WorkflowError.
+
+    Test Steps:
+        1. Make the persona lookup raise StorageError
+        2. Verify the workflow raises WorkflowError
+    """
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = SAMPLE_FORMATTED_TRANSCRIPT
+    mock_repository.get_personas_for_user.side_effect = StorageError("Database unavailable")
+    mock_suggester = AsyncMock()
+
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+    with pytest.raises(WorkflowError):
+        await workflow.suggest_personas_for_interview("interview-1", "user-1")
+
+    mock_suggester.suggest_personas.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_suggest_personas_reuses_cached_suggestions():
+    """
+    Test that repeated requests with unchanged inputs skip the suggester.
+
+    Test Steps:
+        1. Run the workflow twice for the same interview and persona list
+        2. Verify the suggester ran once and both results match
+        3. Change the persona list and verify the suggester runs again
+    """
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = SAMPLE_FORMATTED_TRANSCRIPT
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS
+    mock_suggester = AsyncMock()
+    mock_suggester.suggest_personas.return_value = {
+        "existing_persona_ids": ["tag-founder"],
+        "suggested_new_personas": []
+    }
+
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+    first = await workflow.suggest_personas_for_interview("cached-interview", "user-1")
+    second = await workflow.suggest_personas_for_interview("cached-interview", "user-1")
+
+    assert first == second
+    assert mock_suggester.suggest_personas.await_count == 1
+
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS + [{"id": "tag-new", "name": "New"}]
+    await workflow.suggest_personas_for_interview("cached-interview", "user-1")
+    assert mock_suggester.suggest_personas.await_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_run():
+    """
+    Test that concurrent requests for the same interview and user are coalesced.
+
+    Test Steps:
+        1. Start two identical suggestion requests while the suggester is blocked
+        2. Release the suggester
+        3. Verify it ran once and both callers got the same suggestions
+    """
+    release = asyncio.Event()
+
+    async def slow_suggest(*args, **kwargs):
+        await release.wait()
+        return {"existing_persona_ids": ["tag-founder"], "suggested_new_personas": []}
+
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = SAMPLE_FORMATTED_TRANSCRIPT
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS
+    mock_suggester = AsyncMock()
+    mock_suggester.suggest_personas.side_effect = slow_suggest
+
+    requests = asyncio.gather(
+        PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+            .suggest_personas_for_interview("inflight-interview", "user-1"),
+        PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+            .suggest_personas_for_interview("inflight-interview", "user-1")
+    )
+    await asyncio.sleep(0)
+    release.set()
+    first, second = await requests
+
+    assert first == second == {"existing_persona_ids": ["tag-founder"], "suggested_new_personas": []}
+    assert mock_suggester.suggest_personas.await_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ranking_failure_falls_back_to_all_personas():
+    """
+    Test that a failing ranker doesn't fail the suggestion run.
+
+    Test Steps:
+        1. Configure a ranker whose embedding call raises
+        2. Run the workflow
+        3. Verify the suggester got the full persona list
+    """
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = SAMPLE_FORMATTED_TRANSCRIPT
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS
+    mock_suggester = AsyncMock()
+    mock_suggester.suggest_personas.return_value = {"existing_persona_ids": [], "suggested_new_personas": []}
+    mock_ranker = AsyncMock()
+    mock_ranker.top_personas.side_effect = RuntimeError("embedding quota exceeded")
+
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester, ranker=mock_ranker)
+    await workflow.suggest_personas_for_interview("ranking-interview", "user-1")
+
+    mock_ranker.top_personas.assert_awaited_once_with(SAMPLE_FORMATTED_TRANSCRIPT, SAMPLE_PERSONAS)
+    mock_suggester.suggest_personas.assert_awaited_once_with(
+        SAMPLE_FORMATTED_TRANSCRIPT, SAMPLE_PERSONAS, mode="all"
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("top_k, expects_ranker", [(0, False), (5, True)])
+def test_persona_workflow_ranker_depends_on_top_k(top_k, expects_ranker):
+    """
+    Test that the ranker is only wired in when PERSONA_TOP_K is positive.
+
+    Test Steps:
+        1. Build the workflow dependency with PERSONA_TOP_K set to 0 and to 5
+        2. Verify the ranker is absent or configured with that top_k
+    """
+    with patch("app.api.dependencies.create_persona_pipeline"), \
+         patch("app.api.dependencies.create_gemini_embedder"), \
+         patch.object(dependencies.settings, "PERSONA_TOP_K", top_k):
+        workflow = dependencies.get_persona_workflow(repository=AsyncMock())
+
+    assert (workflow.ranker is not None) == expects_ranker
+    if expects_ranker:
+        assert workflow.ranker.top_k == top_k
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancelled_caller_leaves_run_joinable():
+    """
+    Test that cancelling the first caller doesn't start a second run.
+
+    Test Steps:
+        1. Start a suggestion request and cancel it while the suggester is blocked
+        2. Issue the same request again and release the suggester
+        3. Verify the second caller joined the original run
+    """
+    release = asyncio.Event()
+
+    async def slow_suggest(*args, **kwargs):
+        await release.wait()
+        return {"existing_persona_ids": ["tag-founder"], "suggested_new_personas": []}
+
+    mock_repository = AsyncMock()
+    mock_repository.get_formatted_transcript.return_value = SAMPLE_FORMATTED_TRANSCRIPT
+    mock_repository.get_personas_for_user.return_value = SAMPLE_PERSONAS
+    mock_suggester = AsyncMock()
+    mock_suggester.suggest_personas.side_effect = slow_suggest
+    workflow = PersonaWorkflow(repository=mock_repository, suggester=mock_suggester)
+
+    first = asyncio.ensure_future(workflow.suggest_personas_for_interview("cancelled-interview", "user-1"))
+    await asyncio.sleep(0)
+    first.cancel()
+    second = asyncio.ensure_future(workflow.suggest_personas_for_interview("cancelled-interview", "user-1"))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == {"existing_persona_ids": ["tag-founder"], "suggested_new_personas": []}
+    assert mock_suggester.suggest_personas.await_count == 1
@@ -4,14 +4,18 @@ Unit tests for the InterviewRepository class.
 These tests verify the functionality of the storage repository,
 focusing on database interactions and error handling.
 """
+import asyncio
+import gzip
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import httpx
 import json
+import time
 from datetime import datetime
 
+from app.services.storage import repository as repository_module
 from app.services.storage.repository import InterviewRepository
-from app.utils.errors import StorageError
+from app.utils.errors import NotFoundError, StorageError
 
 @pytest.mark.unit
 def test_repository_initialization():
@@ -29,15 +33,33 @@ def test_repository_initialization():
     assert repository.api_url is not None
     assert "database" in repository.api_url or "localhost" in repository.api_url
 
+@pytest.mark.unit
+def test_extract_title():
+    """
+    Test the title fallbacks used when storing an interview.
+    
+    Test Steps:
+        1. Verify a metadata title wins
+        2. Verify the first titled problem area is used otherwise
+        3. Verify the generic title when nothing is available
+    """
+    repository = InterviewRepository()
+    analysis = {"problem_areas": [{"title": ""}, {"title": "Manual lead tracking"}]}
+    
+    assert repository._extract_title(analysis, {"title": "Customer call"}) == "Customer call"
+    assert repository._extract_title(analysis, None) == "Interview about Manual lead tracking"
+    assert repository._extract_title({"problem_areas": []}, {"title": ""}) == "Untitled Interview"
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('httpx.AsyncClient')
-async def test_store_interview_success(mock_client_class):
+@patch('app.utils.cloud_auth.get_http_client')
+async def test_store_interview_success(mock_get_client):
     """
     Test successful interview storage.
     
     Args:
-        mock_client_class: Mock for the httpx.AsyncClient
+        mock_get_client: Mock for the shared httpx.AsyncClient accessor
     
     Test Steps:
         1. Mock HTTP client response
@@ -47,20 +69,20 @@ async def test_store_interview_success(mock_client_class):
     """
     # Configure mock client
     mock_client = AsyncMock()
-    mock_client_class.return_value.__aenter__.return_value = mock_client
+    mock_get_client.return_value = mock_client
     
     # Set up mock response
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.json.return_value = {
+    mock_response.content = json.dumps({
         "status": "success",
         "message": "Interview stored successfully",
         "data": {
             "id": "test-id-123",
             "created_at": "2025-01-01T12:00:00Z"
         }
-    }
-    mock_client.post.return_value = mock_response
+    }).encode()
+    mock_client.request.return_value = mock_response
     
     # Test data
     analysis_data = {
@@ -86,18 +108,20 @@ async def test_store_interview_success(mock_client_class):
     result = await repository.store_interview(analysis_data, metadata)
     
     # Verify client call
-    mock_client.post.assert_called_once()
-    args, kwargs = mock_client.post.call_args
+    mock_client.request.assert_called_once()
+    args, kwargs = mock_client.request.call_args
     
     # Check URL
-    assert args[0].endswith("interviews")
+    assert args == ("POST", f"{repository.api_url}/interviews")
     
-    # Check payload directly without trying to load it as JSON
-    payload = kwargs["json"]
+    # Check the serialized JSON body
+    assert kwargs["headers"]["Content-Type"] == "application/json"
+    payload = json.loads(kwargs["content"])
     assert payload["title"] == metadata["title"]
     assert payload["project_id"] == metadata["project_id"]
-    assert payload["interviewer"] == metadata["interviewer"]
-    assert payload["interview_date"] == metadata["interview_date"]
+    # Not fields of the stored interview
+    assert "interviewer" not in payload
+    assert "interview_date" not in payload
     assert "analysis_data" in payload
     
     # Check result
@@ -107,13 +131,13 @@ async def test_store_interview_success(mock_client_class):
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('httpx.AsyncClient')
-async def test_store_interview_minimal_metadata(mock_client_class):
+@patch('app.utils.cloud_auth.get_http_client')
+async def test_store_interview_minimal_metadata(mock_get_client):
     """
     Test storage with minimal metadata.
     
     Args:
-        mock_client_class: Mock for the httpx.AsyncClient
+        mock_get_client: Mock for the shared httpx.AsyncClient accessor
     
     Test Steps:
         1. Mock HTTP client response
@@ -122,18 +146,18 @@ async def test_store_interview_minimal_metadata(mock_client_class):
     """
     # Configure mock client
     mock_client = AsyncMock()
-    mock_client_class.return_value.__aenter__.return_value = mock_client
+    mock_get_client.return_value = mock_client
     
     # Set up mock response
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.json.return_value = {
+    mock_response.content = json.dumps({
         "status": "success",
         "data": {
             "id": "test-id-minimal"
         }
-    }
-    mock_client.post.return_value = mock_response
+    }).encode()
+    mock_client.request.return_value = mock_response
     
     # Test data
     analysis_data = {
@@ -151,11 +175,11 @@ async def test_store_interview_minimal_metadata(mock_client_class):
     result = await repository.store_interview(analysis_data, metadata)
     
     # Verify client call
-    mock_client.post.assert_called_once()
+    mock_client.request.assert_called_once()
     
     # Check payload
-    args, kwargs = mock_client.post.call_args
-    payload = kwargs["json"]
+    args, kwargs = mock_client.request.call_args
+    payload = json.loads(kwargs["content"])
     
     # Check default title
     assert "title" in payload
@@ -166,13 +190,88 @@ async def test_store_interview_minimal_metadata(mock_client_class):
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('httpx.AsyncClient')
-async def test_store_interview_error_status_code(mock_client_class):
+@patch('app.services.storage.repository.settings.DB_SERVICE_COMPRESSION', 'gzip')
+@patch('app.utils.cloud_auth.get_http_client')
+async def test_store_interview_gzip_compression(mock_get_client):
+    """
+    Test that the interview upload is gzipped when compression is enabled.
+    
+    Args:
+        mock_get_client: Mock for the shared httpx.AsyncClient accessor
+    
+    Test Steps:
+        1. Enable gzip compression and mock a successful response
+        2. Store an interview
+        3. Verify the body is gzip-encoded JSON with matching headers
+    """
+    mock_client = AsyncMock()
+    mock_get_client.return_value = mock_client
+    mock_response = MagicMock()
+    mock_response.status_code = 201
+    mock_response.content = json.dumps({"status": "success", "data": {"id": "test-id-gzip"}}).encode()
+    mock_client.request.return_value = mock_response
+    
+    repository = InterviewRepository()
+    result = await repository.store_interview({"problem_areas": [], "transcript": []}, {"title": "Compressed"})
+    
+    args, kwargs = mock_client.request.call_args
+    assert kwargs["headers"]["Content-Encoding"] == "gzip"
+    assert kwargs["headers"]["Content-Type"] == "application/json"
+    payload = json.loads(gzip.decompress(kwargs["content"]))
+    assert payload["title"] == "Compressed"
+    assert result["id"] == "test-id-gzip"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.utils.cloud_auth.get_http_client')
+async def test_store_interview_problem_areas_payload(mock_get_client):
+    """
+    Test that problem areas are sent with the interview, in one request, with only the stored fields.
+    
+    Args:
+        mock_get_client: Mock for the shared httpx.AsyncClient accessor
+    
+    Test Steps:
+        1. Store an analysis whose problem areas and excerpts carry extra keys
+        2. Verify a single POST /interviews is made
+        3. Verify problemAreasData keeps just the stored fields, in order
+    """
+    mock_client = AsyncMock()
+    mock_get_client.return_value = mock_client
+    mock_response = MagicMock()
+    mock_response.status_code = 201
+    mock_response.content = json.dumps({"status": "success", "data": {"id": "test-id"}}).encode()
+    mock_client.request.return_value = mock_response
+    excerpt = {"quote": "Exports take hours", "categories": ["Pain Point"], "insight": "Slow", "chunk_number": 2, "extra": 1}
+    analysis_data = {"problem_areas": [
+        {"problem_id": "1", "title": "Slow Reporting", "description": "Reports take hours.", "excerpts": [excerpt]},
+        {"problem_id": "2", "title": "Manual Exports", "description": "Exports are manual."}
+    ]}
+    
+    repository = InterviewRepository()
+    await repository.store_interview(analysis_data, {"title": "Payload"})
+    
+    mock_client.request.assert_called_once()
+    assert mock_client.request.call_args.args == ("POST", f"{repository.api_url}/interviews")
+    payload = json.loads(mock_client.request.call_args.kwargs["content"])
+    assert payload["problemAreasData"] == [
+        {"title": "Slow Reporting", "description": "Reports take hours.", "excerpts": [
+            {"quote": "Exports take hours", "categories": ["Pain Point"], "insight": "Slow", "chunk_number": 2}
+        ]},
+        {"title": "Manual Exports", "description": "Exports are manual.", "excerpts": []}
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.utils.cloud_auth.get_http_client')
+async def test_store_interview_error_status_code(mock_get_client):
     """
     Test handling of HTTP error status codes.
     
     Args:
-        mock_client_class: Mock for the httpx.AsyncClient
+        mock_get_client: Mock for the shared httpx.AsyncClient accessor
     
     Test Steps:
         1. Mock HTTP client to return error status
@@ -181,7 +280,7 @@ async def test_store_interview_error_status_code(mock_client_class):
     """
     # Configure mock client
     mock_client = AsyncMock()
-    mock_client_class.return_value.__aenter__.return_value = mock_client
+    mock_get_client.return_value = mock_client
     
     # Set up mock response with error status
     mock_response = MagicMock()
@@ -192,7 +291,7 @@ async def test_store_interview_error_status_code(mock_client_class):
         request=MagicMock(),
         response=mock_response
     )
-    mock_client.post.return_value = mock_response
+    mock_client.request.return_value = mock_response
     
     # Test data
     analysis_data = {"problem_areas": [], "transcript": [], "synthesis": {}, "metadata": {}}
@@ -210,13 +309,13 @@ async def test_store_interview_error_status_code(mock_client_class):
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('httpx.AsyncClient')
-async def test_store_interview_network_error(mock_client_class):
+@patch('app.utils.cloud_auth.get_http_client')
+async def test_store_interview_network_error(mock_get_client):
     """
     Test handling of network errors.
     
     Args:
-        mock_client_class: Mock for the httpx.AsyncClient
+        mock_get_client: Mock for the shared httpx.AsyncClient accessor
     
     Test Steps:
         1. Mock HTTP client to raise connection error
@@ -225,10 +324,10 @@ async def test_store_interview_network_error(mock_client_class):
     """
     # Configure mock client
     mock_client = AsyncMock()
-    mock_client_class.return_value.__aenter__.return_value = mock_client
+    mock_get_client.return_value = mock_client
     
     # Set up mock to raise connection error
-    mock_client.post.side_effect = httpx.RequestError("Connection failed")
+    mock_client.request.side_effect = httpx.RequestError("Connection failed")
     
     # Test data
     analysis_data = {"problem_areas": [], "transcript": [], "synthesis": {}, "metadata": {}}
@@ -242,4 +341,266 @@ async def test_store_interview_network_error(mock_client_class):
         await repository.store_interview(analysis_data, metadata)
     
     # Verify error message
-    assert "Connection failed" in str(excinfo.value) 
\ No newline at end of file
+    assert "Connection failed" in str(excinfo.value) 
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_get_personas_for_user_is_cached(mock_call_service):
+    """
+    Test that persona lists are served from the per-user cache.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Fetch personas twice for the same user
+        2. Verify the database service was called once
+        3. Expire the entry and verify the next fetch calls the service again
+    """
+    mock_call_service.return_value = {
+        "status": "success",
+        "data": {"cache-user": [{"id": "tag-founder", "name": "Founder"}]}
+    }
+    
+    repository = InterviewRepository()
+    first = await repository.get_personas_for_user("cache-user")
+    second = await repository.get_personas_for_user("cache-user")
+    
+    assert first == second == [{"id": "tag-founder", "name": "Founder"}]
+    assert mock_call_service.await_count == 1
+    
+    # Callers get their own copy, so mutating it must not affect the cache
+    second.append({"id": "tag-extra", "name": "Extra"})
+    assert await repository.get_personas_for_user("cache-user") == first
+    
+    with patch('app.services.storage.repository.time.monotonic', return_value=time.monotonic() + 3600):
+        await repository.get_personas_for_user("cache-user")
+    assert mock_call_service.await_count == 2
+
+
+@pytest.mark.unit
+@patch('app.services.storage.repository._PERSONA_CACHE_MAXSIZE', 2)
+def test_persona_cache_evicts_least_recently_used():
+    """
+    Test that a full persona cache evicts the least recently read user.
+    
+    Test Steps:
+        1. Cache two users and read the first one again
+        2. Cache a third user
+        3. Verify the second user was evicted and the first kept
+    """
+    repository_module._cache_personas("user-a", [])
+    repository_module._cache_personas("user-b", [])
+    assert repository_module._get_cached_personas("user-a") == []
+    
+    repository_module._cache_personas("user-c", [])
+    
+    assert list(repository_module._persona_cache) == ["user-a", "user-c"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_concurrent_persona_misses_share_one_fetch(mock_call_service):
+    """
+    Test that concurrent misses for one user fetch once and release the lock.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Fetch personas for the same user from three concurrent requests
+        2. Verify the database service was called once
+        3. Verify the per-user lock was dropped afterwards
+    """
+    mock_call_service.return_value = {
+        "status": "success",
+        "data": {"lock-user": [{"id": "tag-founder", "name": "Founder"}]}
+    }
+    
+    repository = InterviewRepository()
+    results = await asyncio.gather(*(repository.get_personas_for_user("lock-user") for _ in range(3)))
+    
+    assert all(result == [{"id": "tag-founder", "name": "Founder"}] for result in results)
+    assert mock_call_service.await_count == 1
+    assert "lock-user" not in repository_module._persona_locks
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_get_personas_for_users_are_batched(mock_call_service):
+    """
+    Test that concurrent persona lookups for different users share one request.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Fetch personas for two users concurrently
+        2. Verify a single call was made with both user IDs
+        3. Verify each user got their own personas
+    """
+    mock_call_service.return_value = {
+        "status": "success",
+        "data": {
+            "batch-user-a": [{"id": "tag-a", "name": "Founder"}],
+            "batch-user-b": []
+        }
+    }
+    
+    repository = InterviewRepository()
+    personas_a, personas_b = await asyncio.gather(
+        repository.get_personas_for_user("batch-user-a"),
+        InterviewRepository().get_personas_for_user("batch-user-b")
+    )
+    
+    assert personas_a == [{"id": "tag-a", "name": "Founder"}]
+    assert personas_b == []
+    mock_call_service.assert_awaited_once()
+    assert mock_call_service.call_args.kwargs["params"] == {"userIds": "batch-user-a,batch-user-b"}
+    # A batch's ETag covers both users, so it isn't used for revalidation
+    assert mock_call_service.call_args.kwargs["include_etag"] is False
+    assert not repository_module._persona_etags
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_get_personas_revalidates_with_etag(mock_call_service):
+    """
+    Test that expired persona lists are revalidated with a conditional GET.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Fetch personas, receiving an ETag
+        2. Expire the cache and fetch again, receiving a 304
+        3. Verify If-None-Match was sent and the previous personas were reused
+    """
+    mock_call_service.side_effect = [
+        {"status": "success", "data": {"etag-user": [{"id": "tag-founder", "name": "Founder"}]}, "etag": 'W/"abc"'},
+        {"status": "not_modified", "status_code": 304}
+    ]
+    
+    repository = InterviewRepository()
+    first = await repository.get_personas_for_user("etag-user")
+    with patch('app.services.storage.repository.time.monotonic', return_value=time.monotonic() + 3600):
+        second = await repository.get_personas_for_user("etag-user")
+    
+    assert first == second == [{"id": "tag-founder", "name": "Founder"}]
+    assert mock_call_service.call_args_list[0].kwargs["headers"] is None
+    assert mock_call_service.call_args_list[0].kwargs["include_etag"] is True
+    assert mock_call_service.call_args_list[1].kwargs["headers"] == {"If-None-Match": 'W/"abc"'}
+    assert list(repository_module._persona_etags) == ["etag-user"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_get_personas_falls_back_to_single_user_query(mock_call_service):
+    """
+    Test persona lookups against a database service without the batch endpoint.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Reject the batched ?userIds= query with a 400
+        2. Verify the personas are fetched with ?userId= instead
+    """
+    mock_call_service.side_effect = [
+        {"status": "error", "message": "Missing required query parameter: userId", "status_code": 400},
+        {"status": "success", "data": [{"id": "tag-founder", "name": "Founder"}]}
+    ]
+    
+    personas = await InterviewRepository().get_personas_for_user("legacy-user")
+    
+    assert personas == [{"id": "tag-founder", "name": "Founder"}]
+    assert mock_call_service.call_args.kwargs["params"] == {"userId": "legacy-user"}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_get_interview_by_id_with_fields(mock_call_service):
+    """
+    Test that requested fields are sent to the database service for projection.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Fetch an interview with a field list
+        2. Verify the fields are passed as a comma-joined query parameter
+        3. Fetch without fields and verify no projection is requested
+    """
+    mock_call_service.return_value = {
+        "status": "success",
+        "data": {"analysis_data": {"transcript": []}}
+    }
+    
+    repository = InterviewRepository()
+    result = await repository.get_interview_by_id(
+        "interview-1", fields=["analysis_data.transcript", "userId"]
+    )
+    
+    assert result == {"analysis_data": {"transcript": []}}
+    kwargs = mock_call_service.call_args.kwargs
+    assert kwargs["service_url"].endswith("/interviews/interview-1")
+    assert kwargs["params"] == {"fields": "analysis_data.transcript,userId"}
+    
+    await repository.get_interview_by_id("interview-1")
+    assert mock_call_service.call_args.kwargs["params"] is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_get_interview_by_id_not_found(mock_call_service):
+    """
+    Test that a 404 from the database service surfaces as NotFoundError.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Return a 404 error response
+        2. Verify NotFoundError is raised
+        3. Return a 500 error response and verify StorageError instead
+    """
+    repository = InterviewRepository()
+    
+    mock_call_service.return_value = {"status": "error", "message": "Service returned 404", "status_code": 404}
+    with pytest.raises(NotFoundError):
+        await repository.get_interview_by_id("missing-interview")
+    
+    mock_call_service.return_value = {"status": "error", "message": "Service returned 500", "status_code": 500}
+    with pytest.raises(StorageError):
+        await repository.get_interview_by_id("broken-interview")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@patch('app.services.storage.repository.call_authenticated_service', new_callable=AsyncMock)
+async def test_repository_uses_injected_client(mock_call_service):
+    """
+    Test that the repository sends its calls through the client it was given.
+    
+    Args:
+        mock_call_service: Mock for the authenticated service call
+    
+    Test Steps:
+        1. Create a repository with an explicit HTTP client
+        2. Fetch a formatted transcript
+        3. Verify the call was made with that client
+    """
+    mock_call_service.return_value = {"status": "success", "data": {"formatted_transcript": "text"}}
+    client = MagicMock(spec=httpx.AsyncClient)
+    
+    await InterviewRepository(client=client).get_formatted_transcript("interview-1")
+    
+    assert mock_call_service.call_args.kwargs["client"] is client
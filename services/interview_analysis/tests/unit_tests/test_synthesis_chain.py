@@ -6,11 +6,15 @@ which is responsible for processing interview transcripts using Google's Gemini
 """
 import pytest
 import json
+from pathlib import Path
 from typing import Dict, Any
-from unittest.mock import patch, AsyncMock, MagicMock
 
-from app.services.analysis.gemini_pipeline.analysis_pipeline import GeminiAnalysisPipeline
-from app.config.api_config import APIConfig
+from app.services.analysis.gemini_pipeline.analysis_pipeline import (
+    SAFETY_SETTINGS,
+    _extract_and_parse_json,
+    _is_problem_area,
+)
+from app.services.analysis.gemini_pipeline.analysis_prompts import render_problem_prompt
 
 
 @pytest.fixture
@@ -24,240 +28,180 @@ def sample_transcript():
 
 
 @pytest.fixture
-def sample_chain_response():
-    """Fixture providing sample chain response for testing."""
-    return {
-        "problem_areas": [
-            {
-                "problem_id": "p1",
-                "title": "Infrastructure Scaling",
-                "description": "Current systems cannot handle growth",
-                "excerpts": [
-                    {
-                        "text": "Our main issue is scaling our infrastructure",
-                        "categories": ["Technical", "Infrastructure"],
-                        "insight_summary": "Current architecture doesn't scale",
-                        "chunk_number": 2
-                    }
-                ]
-            }
-        ],
-        "synthesis": {
-            "background": "Interview about technical challenges",
-            "problem_areas": ["Infrastructure scaling issues"],
-            "next_steps": ["Evaluate cloud solutions"]
-        }
-    }
+def sample_transcript_chunks():
+    """Fixture providing the structured chunks behind sample_transcript."""
+    return [
+        {"number": 1, "speaker": "Interviewer", "text": "Tell me about your biggest challenge."},
+        {"number": 2, "speaker": "Interviewee", "text": "Our main issue is scaling our infrastructure."},
+        {"number": 3, "speaker": "Interviewee", "text": "We need a more robust solution that can handle increased load."},
+    ]
 
 
-@pytest.fixture
-def mock_gemini():
-    """Create a mock for the Gemini model."""
-    mock = MagicMock()
-    mock.generate_content = MagicMock()
-    return mock
+@pytest.fixture(scope="module")
+def sample_chain_response() -> Dict[str, Any]:
+    """Fixture providing canned Gemini responses for each pipeline step."""
+    return json.loads((Path(__file__).parents[1] / "fixtures" / "mock_gemini_result.json").read_bytes())
+
+
+@pytest.fixture(scope="module")
+def shared_chain(analysis_chain_factory):
+    """Build one pipeline for the tests that only read from it."""
+    return analysis_chain_factory()
 
 
-@pytest.mark.asyncio
 @pytest.mark.unit
-async def test_chain_initialization():
+def test_chain_initialization(shared_chain, _patched_generative_model):
     """
     Test GeminiAnalysisPipeline initialization.
-    
+
+    Args:
+        shared_chain: Module-wide pipeline fixture
+        _patched_generative_model: The patched Gemini model class
+
     Test Steps:
         1. Initialize GeminiAnalysisPipeline
-        2. Verify model is properly set up
+        2. Verify the model is built with the production safety settings in JSON mode
     """
-    # Initialize chain with a patch to prevent actual API call
-    with patch('google.generativeai.GenerativeModel') as MockModel:
-        chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-        assert chain.model is not None
-        
+    assert shared_chain.model is _patched_generative_model.return_value
+    kwargs = _patched_generative_model.call_args.kwargs
+    assert kwargs["safety_settings"] == SAFETY_SETTINGS
+    assert kwargs["generation_config"] == {"response_mime_type": "application/json"}
+
 
-@pytest.mark.asyncio
 @pytest.mark.unit
-async def test_chain_prompt_creation(sample_transcript):
+def test_chain_prompt_creation(sample_transcript):
     """
     Test prompt creation for analysis.
-    
+
     Args:
         sample_transcript: Sample transcript fixture
-    
+
     Test Steps:
-        1. Initialize chain
-        2. Create prompt for transcript
-        3. Verify prompt contains transcript content
+        1. Render the problem identification prompt for the transcript
+        2. Verify prompt contains transcript content
     """
-    # Arrange
-    with patch('google.generativeai.GenerativeModel') as MockModel:
-        chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-        
-        # Act
-        prompt = chain._create_prompt(sample_transcript)
-        
-        # Assert
-        if isinstance(prompt, str):
-            assert sample_transcript in prompt
-        else:
-            # For structured prompts, check that the transcript is included
-            prompt_text = str(prompt)
-            assert "challenge" in prompt_text
-            assert "infrastructure" in prompt_text
-            assert "robust solution" in prompt_text
+    prompt = render_problem_prompt(transcript=sample_transcript)
+
+    assert sample_transcript in prompt
 
 
-@pytest.mark.asyncio
 @pytest.mark.unit
-async def test_parse_response():
+def test_parse_response():
     """
     Test response parsing.
-    
+
     Test Steps:
-        1. Initialize chain
-        2. Parse sample JSON response
-        3. Verify parsed structure
+        1. Parse a JSON response wrapped in a markdown code block
+        2. Verify parsed structure
     """
-    # Sample LLM response with proper JSON format
     response_text = """```json
     {
         "problem_areas": [
-            {
-                "problem_id": "p1", 
-                "title": "Infrastructure Scaling",
-                "description": "Systems cannot handle growth",
-                "excerpts": [
-                    {
-                        "text": "Our main issue is scaling our infrastructure",
-                        "categories": ["Technical"],
-                        "insight_summary": "Growth issues",
-                        "chunk_number": 2
-                    }
-                ]
-            }
-        ],
-        "synthesis": {
-            "background": "Technical interview",
-            "problem_areas": ["Infrastructure scaling"],
-            "next_steps": ["Evaluate solutions"]
-        }
+            {"problem_id": "p1", "title": "Infrastructure Scaling", "description": "Systems cannot handle growth"}
+        ]
     }
     ```"""
 
-    # Arrange
-    with patch('google.generativeai.GenerativeModel') as MockModel:
-        chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-        
-        # Act
-        result = chain._parse_response(response_text)
-        
-        # Assert
-        assert "problem_areas" in result
-        assert "synthesis" in result
-        assert result["problem_areas"][0]["title"] == "Infrastructure Scaling"
-        assert result["synthesis"]["background"] == "Technical interview"
+    result = _extract_and_parse_json(response_text)
+
+    assert result["problem_areas"][0]["title"] == "Infrastructure Scaling"
 
 
-@pytest.mark.asyncio
 @pytest.mark.unit
-async def test_parse_malformed_response():
+def test_parse_malformed_response():
     """
     Test handling of malformed response.
-    
+
     Test Steps:
-        1. Initialize chain
-        2. Parse invalid JSON response
-        3. Verify fallback response structure
+        1. Parse invalid JSON response
+        2. Verify None is returned instead of raising
     """
-    # Malformed JSON response
     response_text = """Some text
     not valid JSON
     {
         "incomplete": "structure
     }"""
 
-    # Arrange
-    with patch('google.generativeai.GenerativeModel') as MockModel:
-        chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-        
-        # Act
-        # This should handle the error and provide a fallback
-        result = chain._parse_response(response_text)
-        
-        # Assert
-        assert isinstance(result, dict)
-        assert "problem_areas" in result
-        assert "synthesis" in result
-        assert "metadata" in result
-        assert result["metadata"]["parsed"] is False
+    assert _extract_and_parse_json(response_text) is None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("problem_area, valid", [
+    ({"problem_id": "p1", "title": "Scaling", "description": "Can't keep up"}, True),
+    ({"problem_id": "p1", "title": "Scaling"}, False),
+    ({"problem_id": "p1", "title": "", "description": "Can't keep up"}, False),
+    ({"problem_id": "p1", "title": "Scaling", "description": None}, False),
+    ("p1", False),
+])
+def test_is_problem_area(problem_area, valid):
+    """
+    Test that problem areas need a non-empty id, title and description.
+
+    Test Steps:
+        1. Check complete, incomplete, empty-valued and non-dict problem areas
+    """
+    assert _is_problem_area(problem_area) is valid
 
 
 @pytest.mark.asyncio
 @pytest.mark.unit
-@patch('google.generativeai.GenerativeModel')
-async def test_run_analysis_success(mock_model_class, mock_gemini, sample_transcript, sample_chain_response):
+async def test_run_analysis_success(analysis_chain_factory, gemini_model_factory, sample_transcript,
+                                    sample_transcript_chunks, sample_chain_response):
     """
     Test successful analysis run.
-    
+
     Args:
-        mock_model_class: Mocked GenerativeModel class
-        mock_gemini: Mock Gemini model fixture
+        analysis_chain_factory: Builds pipelines on the patched Gemini model
+        gemini_model_factory: Builds a mock model answering each pipeline step
         sample_transcript: Sample transcript fixture
-        sample_chain_response: Sample chain response fixture
-    
+        sample_transcript_chunks: Structured chunks for the transcript
+        sample_chain_response: Canned responses for each step
+
     Test Steps:
-        1. Mock Gemini model response
+        1. Mock Gemini responses for problem areas, excerpts and synthesis
         2. Run analysis with transcript
-        3. Verify analysis result structure
+        3. Verify excerpts are normalized and merged into their problem areas
     """
-    # Arrange
-    # Configure mock
-    mock_model_class.return_value = mock_gemini
-    
-    mock_response = MagicMock()
-    mock_response.text = json.dumps(sample_chain_response)
-    mock_gemini.generate_content.return_value = mock_response
-    
-    # Create chain
-    chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-    chain.model = mock_gemini
-    
-    # Act
-    result = await chain.run_analysis(sample_transcript)
-    
-    # Assert
-    assert "problem_areas" in result
-    assert "synthesis" in result
-    assert result["problem_areas"][0]["title"] == "Infrastructure Scaling"
-    mock_gemini.generate_content.assert_called_once()
+    chain = analysis_chain_factory()
+    chain.model = gemini_model_factory(**sample_chain_response)
+
+    result = await chain.run_analysis(sample_transcript, sample_transcript_chunks, ["Interviewer", "Interviewee"])
+
+    assert [pa["title"] for pa in result["problem_areas"]] == ["Infrastructure Scaling", "Peak Load Performance"]
+    first_excerpt = result["problem_areas"][0]["excerpts"][0]
+    assert first_excerpt["categories"] == ["Pain Point"]
+    assert first_excerpt["chunk_number"] == 2
+    assert result["synthesis"] == sample_chain_response["synthesis"]["synthesis"]
+    assert result["suggested_title"] == sample_chain_response["synthesis"]["suggested_title"]
+    assert result["metadata"] == {"problem_areas_count": 2, "excerpts_count": 2}
+    # One streamed call, one excerpt call per problem area, one synthesis call
+    assert chain.model.generate_content_async.await_count == 4
 
 
 @pytest.mark.asyncio
 @pytest.mark.unit
-@patch('google.generativeai.GenerativeModel')
-async def test_run_analysis_error(mock_model_class, mock_gemini, sample_transcript):
+async def test_run_analysis_error(analysis_chain_factory, gemini_model_factory, sample_transcript,
+                                  sample_transcript_chunks):
     """
     Test error handling during analysis.
-    
+
     Args:
-        mock_model_class: Mocked GenerativeModel class
-        mock_gemini: Mock Gemini model fixture
+        analysis_chain_factory: Builds pipelines on the patched Gemini model
+        gemini_model_factory: Builds a mock model answering each pipeline step
         sample_transcript: Sample transcript fixture
-    
+        sample_transcript_chunks: Structured chunks for the transcript
+
     Test Steps:
-        1. Mock Gemini to raise exception
-        2. Attempt analysis
-        3. Verify error is propagated
+        1. Mock Gemini to raise on every call
+        2. Run analysis
+        3. Verify a fallback result is returned instead of raising
     """
-    # Arrange
-    mock_model_class.return_value = mock_gemini
-    mock_gemini.generate_content.side_effect = ValueError("API error")
-    
-    # Create chain
-    chain = GeminiAnalysisPipeline(model_name="gemini-2.0-flash")
-    chain.model = mock_gemini
-    
-    # Act & Assert
-    with pytest.raises(ValueError) as excinfo:
-        await chain.run_analysis(sample_transcript)
-    
-    assert "Analysis chain failed" in str(excinfo.value) 
\ No newline at end of file
+    error = ValueError("API error")
+    chain = analysis_chain_factory()
+    chain.model = gemini_model_factory(problem_areas=error, excerpts={}, synthesis=error)
+
+    result = await chain.run_analysis(sample_transcript, sample_transcript_chunks, [])
+
+    assert result["problem_areas"] == []
+    assert result["synthesis"] == "Synthesis generation failed."
+    assert result["suggested_title"] is None
@@ -15,7 +15,7 @@ from app.utils.errors import FileProcessingError, AnalysisError
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('app.services.analysis.analyzer.create_analysis_chain')
+@patch('app.services.analysis.analyzer.create_analysis_pipeline')
 async def test_analyzer_initialization(mock_chain_factory):
     """
     Test the initialization of the TranscriptAnalyzer.
@@ -33,11 +33,11 @@ async def test_analyzer_initialization(mock_chain_factory):
     
     # Verify basic properties
     assert isinstance(analyzer, TranscriptAnalyzer)
-    assert analyzer.analysis_chain is mock_chain
+    assert analyzer.analysis_pipeline is mock_chain
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('app.services.analysis.analyzer.create_analysis_chain')
+@patch('app.services.analysis.analyzer.create_analysis_pipeline')
 async def test_transcript_analysis(mock_chain_factory, test_vtt_content):
     """
     Test the transcript analysis process.
@@ -82,7 +82,7 @@ async def test_transcript_analysis(mock_chain_factory, test_vtt_content):
     analyzer = TranscriptAnalyzer()
     
     # Run analysis
-    result = await analyzer.analyze_transcript(test_vtt_content.encode())
+    result = await analyzer.analyze_transcript(test_vtt_content.encode(), "test.vtt")
     
     # Verify result structure
     assert "problem_areas" in result
@@ -95,7 +95,7 @@ async def test_transcript_analysis(mock_chain_factory, test_vtt_content):
     
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('app.services.analysis.analyzer.create_analysis_chain')
+@patch('app.services.analysis.analyzer.create_analysis_pipeline')
 async def test_empty_transcript(mock_chain_factory):
     """
     Test handling of empty transcript.
@@ -114,7 +114,7 @@ async def test_empty_transcript(mock_chain_factory):
     
     # Test with empty bytes
     with pytest.raises(FileProcessingError) as exc_info:
-        await analyzer.analyze_transcript(b"")
+        await analyzer.analyze_transcript(b"", "empty.vtt")
     
     # Verify error message contains relevant text
     assert "No valid content" in str(exc_info.value)
@@ -124,7 +124,7 @@ async def test_empty_transcript(mock_chain_factory):
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('app.services.analysis.analyzer.create_analysis_chain')
+@patch('app.services.analysis.analyzer.create_analysis_pipeline')
 async def test_invalid_vtt_format(mock_chain_factory):
     """
     Test handling of invalid VTT format.
@@ -146,7 +146,7 @@ async def test_invalid_vtt_format(mock_chain_factory):
     
     # Should raise an error
     with pytest.raises(FileProcessingError) as exc_info:
-        await analyzer.analyze_transcript(invalid_content)
+        await analyzer.analyze_transcript(invalid_content, "invalid.vtt")
     
     # Verify error message
     assert "No valid content" in str(exc_info.value)
@@ -156,7 +156,7 @@ async def test_invalid_vtt_format(mock_chain_factory):
 
 @pytest.mark.unit
 @pytest.mark.asyncio
-@patch('app.services.analysis.analyzer.create_analysis_chain')
+@patch('app.services.analysis.analyzer.create_analysis_pipeline')
 async def test_llm_error_handling(mock_chain_factory, test_vtt_content):
     """
     Test handling of LLM chain errors.
@@ -180,7 +180,7 @@ async def test_llm_error_handling(mock_chain_factory, test_vtt_content):
     
     # Run analysis, expect error
     with pytest.raises(AnalysisError) as exc_info:
-        await analyzer.analyze_transcript(test_vtt_content.encode())
+        await analyzer.analyze_transcript(test_vtt_content.encode(), "test.vtt")
     
     # Verify error message includes our custom message text
     assert "Analysis failed" in str(exc_info.value)
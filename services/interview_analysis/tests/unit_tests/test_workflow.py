@@ -4,6 +4,7 @@ Unit tests for the InterviewWorkflow class in the domain layer.
 These tests verify the core business logic of processing interviews,
 focusing on workflow orchestration and error handling.
 """
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import io
@@ -95,10 +96,13 @@ async def test_successful_workflow_execution():
     }
     
     # Process the interview
-    result = await workflow.process_interview(file_content, metadata)
+    result = await workflow.process_interview(file_content, metadata, "interview.vtt")
     
     # Verify services were called with correct parameters
-    mock_analyzer.analyze_transcript.assert_called_once_with(file_content)
+    mock_analyzer.analyze_transcript.assert_called_once()
+    assert mock_analyzer.analyze_transcript.call_args.args == (file_content, "interview.vtt")
+    # Anonymous uploads share a cache namespace, so near-duplicates aren't reused
+    assert mock_analyzer.analyze_transcript.call_args.kwargs["reuse_similar"] is False
     mock_repository.store_interview.assert_called_once()
     storage_call_args = mock_repository.store_interview.call_args[0]
     assert storage_call_args[0] == analysis_result
@@ -139,7 +143,7 @@ async def test_analyzer_error_handling():
     
     # Process the interview and expect exception
     with pytest.raises(AnalysisError) as excinfo:
-        await workflow.process_interview(file_content, metadata)
+        await workflow.process_interview(file_content, metadata, "interview.vtt")
     
     # Verify exception message
     assert "Analysis failed" in str(excinfo.value)
@@ -157,7 +161,7 @@ async def test_storage_error_handling():
         1. Configure analyzer to return valid results
         2. Configure storage service to raise an exception
         3. Process interview with workflow
-        4. Verify analysis result is returned but with storage error
+        4. Verify the storage failure is raised as a StorageError
     """
     # Create mock services
     mock_analyzer = AsyncMock()
@@ -186,14 +190,113 @@ async def test_storage_error_handling():
     file_content = b"WEBVTT\n\n1\n00:00:00.000 --> 00:00:05.000\nTest content"
     metadata = {"title": "Test Interview"}
     
-    # Process the interview
-    result = await workflow.process_interview(file_content, metadata)
+    # Process the interview and expect the storage failure to be raised
+    with pytest.raises(StorageError) as excinfo:
+        await workflow.process_interview(file_content, metadata, "interview.vtt")
     
-    # Verify result contains analysis but with storage error
-    assert "problem_areas" in result
-    assert "transcript" in result
-    assert "synthesis" in result
-    assert "metadata" in result
-    assert "storage" in result
-    assert "error" in result["storage"]
-    assert "Storage failed" in result["storage"]["error"] 
\ No newline at end of file
+    assert "Storage failed" in str(excinfo.value)
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_storage_overlaps_synthesis():
+    """
+    Test that problem areas are stored while the synthesis is still running.
+    
+    Test Steps:
+        1. Make the analyzer report partial results, then wait on the synthesis
+        2. Verify the interview is stored before the synthesis finishes
+        3. Verify the synthesis and suggested title are merged in afterwards
+    """
+    store_started = asyncio.Event()
+    mock_repository = AsyncMock()
+
+    async def store_interview(result, metadata):
+        store_started.set()
+        return {"id": "test-id"}
+
+    mock_repository.store_interview.side_effect = store_interview
+
+    async def analyze_transcript(file_content, filename, cache_namespace=None, on_excerpts=None, reuse_similar=True):
+        partial = {"problem_areas": [], "participants": ["Alex"], "synthesis": "Analysis incomplete."}
+        on_excerpts(partial)
+        # The synthesis only finishes once storage has started
+        await asyncio.wait_for(store_started.wait(), timeout=1)
+        return dict(partial, synthesis="Done.", suggested_title="Interview with Alex")
+
+    mock_analyzer = MagicMock()
+    mock_analyzer.analyze_transcript.side_effect = analyze_transcript
+
+    workflow = InterviewWorkflow(mock_analyzer, mock_repository)
+    result = await workflow.process_interview(b"content", {"title": "Upload"}, "interview.vtt")
+
+    stored_result, stored_metadata = mock_repository.store_interview.call_args[0]
+    assert stored_result["synthesis"] == "Analysis incomplete."
+    assert stored_metadata["title"] == "Upload"
+    mock_repository.update_interview_synthesis.assert_awaited_once_with(
+        "test-id", "Done.", suggested_title="Interview with Alex", title="Interview with Alex"
+    )
+    assert result["storage"]["id"] == "test-id"
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("user_id", ["user-1", None])
+async def test_failed_analysis_discards_early_store(user_id):
+    """
+    Test that an interview stored before the analysis failed is cleaned up.
+    
+    Args:
+        user_id: Owner of the upload; anonymous uploads can't be deleted
+    
+    Test Steps:
+        1. Store problem areas early, then fail the synthesis
+        2. Verify the original error propagates
+        3. Verify the interview is deleted for its owner, or marked as failed when anonymous
+    """
+    mock_repository = AsyncMock()
+    mock_repository.store_interview.return_value = {"id": "test-id"}
+
+    async def analyze_transcript(file_content, filename, cache_namespace=None, on_excerpts=None, reuse_similar=True):
+        on_excerpts({"problem_areas": [], "participants": [], "synthesis": "Analysis incomplete."})
+        raise AnalysisError("Synthesis failed")
+
+    mock_analyzer = MagicMock()
+    mock_analyzer.analyze_transcript.side_effect = analyze_transcript
+
+    workflow = InterviewWorkflow(mock_analyzer, mock_repository)
+    with pytest.raises(AnalysisError):
+        await workflow.process_interview(b"content", {"title": "Upload", "userId": user_id}, "interview.vtt")
+
+    if user_id:
+        mock_repository.delete_interview.assert_awaited_once_with("test-id", "user-1")
+        mock_repository.update_interview_synthesis.assert_not_awaited()
+    else:
+        mock_repository.delete_interview.assert_not_awaited()
+        mock_repository.update_interview_synthesis.assert_awaited_once_with("test-id", "Analysis failed: Synthesis failed")
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_early_store_is_surfaced():
+    """
+    Test that an error from the early store is raised rather than lost.
+    
+    Test Steps:
+        1. Make the early store fail while the analysis succeeds
+        2. Verify a StorageError carrying the store's error is raised
+        3. Verify no synthesis update is attempted
+    """
+    mock_repository = AsyncMock()
+    mock_repository.store_interview.side_effect = StorageError("Database unavailable")
+
+    async def analyze_transcript(file_content, filename, cache_namespace=None, on_excerpts=None, reuse_similar=True):
+        partial = {"problem_areas": [], "participants": [], "synthesis": "Analysis incomplete."}
+        on_excerpts(partial)
+        return dict(partial, synthesis="Done.")
+
+    mock_analyzer = MagicMock()
+    mock_analyzer.analyze_transcript.side_effect = analyze_transcript
+
+    workflow = InterviewWorkflow(mock_analyzer, mock_repository)
+    with pytest.raises(StorageError, match="Database unavailable"):
+        await workflow.process_interview(b"content", {"title": "Upload"}, "interview.vtt")
+
+    mock_repository.update_interview_synthesis.assert_not_awaited()